@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+import os
+
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,9 +42,12 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework.authtoken',
     'core',
+    'chan',
+    'user',
 ]
 
 MIDDLEWARE = [
+    'chan.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -76,13 +82,71 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
+# Connections are kept for DB_CONN_MAX_AGE seconds and checked before
+# being reused by a new request. With DB_POOL_SIZE > 0 connections are
+# instead given back after each request to an in-process pool of at
+# most DB_POOL_SIZE connections shared by every server thread
+
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'HOST': 'db',
-        'NAME': 'app',
-        'USER': 'postgres',
-        'PASSWORD': 'supersecretpassword',
+        'ENGINE': 'core.db.backends.postgresql',
+        'HOST': os.environ.get('DB_HOST', 'db'),
+        'PORT': os.environ.get('DB_PORT', ''),
+        'NAME': os.environ.get('DB_NAME', 'app'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASS', 'supersecretpassword'),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL_SIZE else
+            int(os.environ.get('DB_CONN_MAX_AGE', 60))
+        ),
+        'CONN_HEALTH_CHECKS': (
+            os.environ.get('DB_HEALTH_CHECKS', '1').lower()
+            in ('1', 'true', 'yes')
+        ),
+        'POOL': {
+            'MAX_SIZE': DB_POOL_SIZE,
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'MAX_LIFETIME': int(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+            'MAX_IDLE': int(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        },
+    }
+}
+
+# Read replicas, one database per host of DB_REPLICA_HOSTS (comma
+# separated) with the settings of the primary. Safe requests to the
+# board, thread and reply endpoints read from a random replica, clients
+# read from the primary for STICKY_SECONDS after each of their writes
+
+DATABASES.update({
+    f'replica{index}': dict(
+        DATABASES['default'], HOST=host, TEST={'MIRROR': 'default'}
+    )
+    for index, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))
+    )
+})
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+CHAN_REPLICAS = {
+    'DATABASES': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': 10,
+    'COOKIE_NAME': 'chan_primary',
+}
+
+
+# Cache shared by every worker (e.g. CACHE_BACKEND
+# django.core.cache.backends.memcached.PyLibMCCache with
+# CACHE_LOCATION host:port), the default cache is local to the process
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -129,4 +193,178 @@ MEDIA_URL = '/media/'
 STATIC_ROOT = 'vol/web/static'
 MEDIA_ROOT = 'vol/web/media'
 
+# Uploads are stored once under their content digest, files nobody
+# references anymore are deleted by the collect_media command
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+# Media files are served by core.views.serve_media, BACKEND can be
+# 'x-accel-redirect' (nginx, with an internal location at ACCEL_PREFIX
+# aliased to MEDIA_ROOT) or 'x-sendfile' (Apache, lighttpd) to hand the
+# transfer over to the front web server
+MEDIA_SERVING = {
+    'BACKEND': None,
+    'ACCEL_PREFIX': '/protected-media/',
+    'MAX_AGE': 31536000,
+}
+
 AUTH_USER_MODEL = 'core.User'
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'chan.pagination.ChanCursorPagination',
+    'PAGE_SIZE': 50,
+}
+
+
+# Write-behind vote buffer, votes are coalesced in memory and
+# written in bulk every FLUSH_INTERVAL seconds when enabled
+
+CHAN_VOTE_BUFFER = {
+    'ENABLED': False,
+    'FLUSH_INTERVAL': 1.0,
+    'MAX_BATCH_SIZE': 1000,
+}
+
+
+# Cache of serialized thread and board payloads, kept in a CACHES alias
+# shared by every worker (set CACHE_BACKEND) so invalidations reach all
+# of them. 'chan.cache.LocMemLRUBackend' is only for a single process.
+
+CHAN_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'BACKEND': 'chan.cache.DjangoCacheBackend',
+    'OPTIONS': {'alias': 'default'},
+    'TIMEOUT': 60,
+}
+
+
+# Realtime thread and board updates streamed by the ASGI application
+# at /api/6chan/stream/ (server-sent events or WebSocket), BACKEND can
+# be 'chan.broker.RedisBackend' with OPTIONS {'url': ...} to share
+# events between workers
+
+CHAN_REALTIME = {
+    'ENABLED': False,
+    'BACKEND': 'chan.broker.LocalBackend',
+    'OPTIONS': {},
+    'MAX_QUEUE_SIZE': 100,
+    'MAX_CHANNELS': 50,
+    'KEEPALIVE': 15,
+}
+
+
+# Cache of authenticated API tokens, CACHE is an alias of CACHES shared
+# by every process so revoked tokens and changed users apply everywhere
+
+TOKEN_AUTH_CACHE = {
+    'CACHE': 'default',
+    'TIMEOUT': 300,
+}
+
+
+# Uploaded images are validated, stripped of EXIF data and thumbnailed
+# by a pool of WORKERS threads after the upload is committed, EAGER
+# processes them synchronously instead
+
+CHAN_IMAGES = {
+    'EAGER': False,
+    'WORKERS': 2,
+    'MAX_DIMENSION': 8000,
+    'MAX_PIXELS': 40000000,
+    'THUMBNAIL_SIZES': {'small': 150, 'medium': 480},
+    'QUALITY': 85,
+}
+
+
+# Full-text search, PostgreSQL ranks documents with a tsvector GIN index
+# using the CONFIG text search configuration, other databases fall back
+# to term postings ranked by tf-idf
+
+CHAN_SEARCH = {
+    'CONFIG': 'english',
+    'MAX_TERMS': 10,
+    'TITLE_WEIGHT': 2.0,
+}
+
+
+# Hot ranking of threads (?sort=hot), votes and replies posted within
+# VELOCITY_WINDOW hours count on a log scale against the thread age,
+# scores are stored by the recompute_thread_scores command which only
+# recomputes threads active within LOOKBACK hours
+
+CHAN_RANKING = {
+    'REPLY_WEIGHT': 0.5,
+    'VELOCITY_WINDOW': 6,
+    'DECAY': 45000,
+    'LOOKBACK': 12,
+    'BATCH_SIZE': 500,
+}
+
+
+# Thread archival, the archive_threads command moves threads past the
+# MAX_THREADS most recently bumped threads of a board, or not bumped
+# within MAX_AGE_DAYS, to the read-only archive. Boards may override
+# both limits, None disables a limit
+
+CHAN_ARCHIVE = {
+    'MAX_THREADS': 200,
+    'MAX_AGE_DAYS': None,
+    'BATCH_SIZE': 50,
+    'COMPRESSION_LEVEL': 6,
+}
+
+
+# Thread and reply list and retrieve are rendered from values() rows
+# with precompiled field accessors instead of model serializers, and
+# encoded with orjson when it is installed, the payload is unchanged
+
+CHAN_FAST_PATH = {
+    'ENABLED': True,
+}
+
+
+# Request profiling, when enabled query count, SQL time, serializer
+# time and total time of every request are aggregated per view and
+# action into histograms served at /api/6chan/profiling/
+
+CHAN_PROFILING = {
+    'ENABLED': os.environ.get('CHAN_PROFILING', '').lower() in (
+        '1', 'true', 'yes'
+    ),
+    'TIME_BUCKETS': [
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+    ],
+    'QUERY_BUCKETS': [1, 2, 3, 5, 10, 20, 50, 100],
+}
+
+
+# Anti-flood throttles, every action has a COOLDOWN in seconds between
+# two requests of a user (or IP when anonymous) and sliding window rates
+# per USER, IP and BOARD counted in the CACHE shared by every worker
+# (a process local backend is refused when ENABLED, use django-redis to
+# count every scope in one round trip), the cooldown starts once a
+# request succeeded, staff are exempt when EXEMPT_STAFF is set
+
+CHAN_THROTTLES = {
+    'ENABLED': os.environ.get('CHAN_THROTTLING', '').lower() in (
+        '1', 'true', 'yes'
+    ),
+    'CACHE': 'default',
+    'KEY_PREFIX': 'throttle:',
+    'EXEMPT_STAFF': True,
+    'ACTIONS': {
+        'thread': {
+            'COOLDOWN': 30, 'USER': '10/hour', 'IP': '20/hour',
+            'BOARD': '120/hour',
+        },
+        'reply': {
+            'COOLDOWN': 5, 'USER': '120/hour', 'IP': '240/hour',
+            'BOARD': '1200/hour',
+        },
+        'vote': {'USER': '60/min', 'IP': '120/min'},
+        'signup': {'COOLDOWN': 10, 'IP': '5/hour'},
+    },
+}
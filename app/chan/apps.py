@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ChanConfig(AppConfig):
     name = 'chan'
+
+    def ready(self):
+        """Register cache invalidation signal handlers"""
+        import chan.signals  # noqa: F401
@@ -0,0 +1 @@
+"""Benchmark suite of the 6chan API, run with ``manage.py benchmark``"""
@@ -0,0 +1,147 @@
+import random
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from core.models import reply_tree_path
+from core.ndjson import DumpEncoder, import_records
+from core.ranking import recompute_scores
+
+
+DEFAULT_SIZES = {
+    'USERS': 200,
+    'BOARDS': 8,
+    'THREADS': 400,
+    'MAX_REPLIES': 1000,
+    'REPLY_ALPHA': 1.2,
+    'NESTED_RATIO': 0.4,
+    'MAX_VOTES': 20,
+}
+
+PASSWORD = 'benchpass'
+
+WORDS = (
+    'analog synth modular patch cable oscillator filter envelope drum '
+    'machine sampler sequencer tape delay reverb vintage keyboard '
+    'guitar pedal amp speaker record vinyl mixer studio live set'
+).split()
+
+
+def sentence(rng, length):
+    """Return length random words"""
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def reply_count(rng, sizes):
+    """Return a reply count following a power law, most threads get
+    a few replies and a few threads get most of them"""
+    count = int(rng.paretovariate(sizes['REPLY_ALPHA'])) - 1
+
+    return min(count, sizes['MAX_REPLIES'])
+
+
+def create_users(sizes):
+    """Create the benchmark users sharing the same password,
+    return their usernames"""
+    password = make_password(PASSWORD)
+    usernames = [f'bench{i}' for i in range(sizes['USERS'])]
+    get_user_model().objects.bulk_create([
+        get_user_model()(
+            username=username, email=f'{username}@bench.local',
+            password=password
+        )
+        for username in usernames
+    ], batch_size=500)
+
+    return usernames
+
+
+def generate_records(rng, sizes, usernames):
+    """Yield the records of boards, threads, nested replies and votes
+    in dump order"""
+    now = timezone.now()
+    threads, replies, votes = [], [], []
+    reply_id = 0
+
+    for board in range(1, sizes['BOARDS'] + 1):
+        yield {
+            'model': 'board', 'id': board, 'user': usernames[0],
+            'name': f'Bench board {board}', 'code': f'b{board}',
+        }
+
+    for thread_id in range(1, sizes['THREADS'] + 1):
+        created = now - timedelta(minutes=rng.randint(10, 60 * 24 * 7))
+        bumped = created
+        posts = []
+
+        for _ in range(reply_count(rng, sizes)):
+            reply_id += 1
+            bumped = min(bumped + timedelta(seconds=rng.randint(1, 900)), now)
+            parent = None
+
+            if posts and rng.random() < sizes['NESTED_RATIO']:
+                parent = rng.choice(posts)
+
+            posts.append({
+                'model': 'reply', 'id': reply_id,
+                'user': rng.choice(usernames),
+                'text': sentence(rng, rng.randint(3, 40)),
+                'thread': None if parent else thread_id,
+                'reply': parent['id'] if parent else None,
+                'root_thread': thread_id,
+                'depth': parent['depth'] + 1 if parent else 0,
+                'path': reply_tree_path(
+                    reply_id, parent['path'] if parent else ''
+                ),
+                'date_created': bumped,
+            })
+
+        voters = rng.sample(
+            usernames, min(rng.randint(0, sizes['MAX_VOTES']), len(usernames))
+        )
+        upvoters = [user for user in voters if rng.random() < 0.7]
+
+        for user in voters:
+            model = 'upvote' if user in upvoters else 'downvote'
+            votes.append({'model': model, 'user': user, 'thread': thread_id})
+
+        threads.append({
+            'model': 'thread', 'id': thread_id, 'user': rng.choice(usernames),
+            'board': rng.randint(1, sizes['BOARDS']),
+            'title': sentence(rng, rng.randint(2, 8)),
+            'content': sentence(rng, rng.randint(10, 80)),
+            'date_created': created, 'last_bumped_at': bumped,
+            'reply_count': len(posts), 'upvote_count': len(upvoters),
+            'downvote_count': len(voters) - len(upvoters),
+        })
+        replies.extend(posts)
+
+    yield from threads
+    yield from replies
+    # Votes are sorted by model so that they are imported in batches
+    yield from sorted(votes, key=lambda vote: vote['model'] == 'downvote')
+
+
+def generate(seed=0, sizes=None):
+    """Fill the database with a reproducible synthetic data set,
+    return the number of rows created per model"""
+    sizes = dict(DEFAULT_SIZES, **(sizes or {}))
+    rng = random.Random(seed)
+    usernames = create_users(sizes)
+    encoder = DumpEncoder()
+    stats = import_records(
+        encoder.encode(record) for record in generate_records(
+            rng, sizes, usernames
+        )
+    )
+    recompute_scores()
+
+    counts = {'user': len(usernames)}
+    counts.update(
+        (label, stat['imported']) for label, stat in stats.items()
+    )
+
+    return counts
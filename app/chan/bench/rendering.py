@@ -0,0 +1,74 @@
+import time
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from chan.fastpath import FastJSONRenderer, get_representation
+from chan.serializers import ThreadSerializer, ReplySerializer
+from chan.views import ManageThreadViewSet
+from core.models import Thread, Reply
+
+
+# Serializer, queryset and fast path expressions of each rendered model
+TARGETS = {
+    'thread': (
+        ThreadSerializer, Thread.objects.order_by('-last_bumped_at', '-id'),
+        ManageThreadViewSet.fast_path_expressions
+    ),
+    'reply': (
+        ReplySerializer, Reply.objects.order_by('date_created', 'id'), None
+    ),
+}
+
+
+def best_time(render, repeat):
+    """Return the best of repeat timings of render"""
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def run_rendering(rows=200, repeat=5):
+    """Return the cost per row in microseconds of fetching and rendering
+    a page of each model with the serializers and with the fast path"""
+    request = Request(APIRequestFactory().get('/'))
+    results = {}
+
+    for label, (serializer_class, queryset, expressions) in TARGETS.items():
+        representation = get_representation(serializer_class, expressions)
+        count = len(queryset.all()[:rows].values_list('pk', flat=True))
+
+        if not count:
+            continue
+
+        def serializers():
+            serializer = serializer_class(
+                queryset.all()[:rows], many=True,
+                context={'request': request}
+            )
+
+            return JSONRenderer().render(serializer.data)
+
+        def fast_path():
+            data = representation.to_representations(
+                representation.values(queryset.all())[:rows], request
+            )
+
+            return FastJSONRenderer().render(data)
+
+        serializer_us = best_time(serializers, repeat) / count * 1e6
+        fast_path_us = best_time(fast_path, repeat) / count * 1e6
+        results[label] = {
+            'rows': count,
+            'serializer_us': round(serializer_us, 2),
+            'fast_path_us': round(fast_path_us, 2),
+            'speedup': round(serializer_us / fast_path_us, 2),
+        }
+
+    return results
@@ -0,0 +1,192 @@
+import math
+import platform
+import random
+import subprocess
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import django
+
+from django.db import connection, connections
+
+from rest_framework.test import APIClient
+
+from chan.bench.scenarios import SCENARIOS, BenchContext
+
+
+# Metrics compared across runs, with whether a higher value is better
+COMPARED_METRICS = [
+    ('throughput', True),
+    ('latency_ms.p50', False),
+    ('latency_ms.p95', False),
+    ('latency_ms.p99', False),
+    ('queries.mean', False),
+]
+
+
+class QueryCounter:
+    """Execute wrapper counting queries"""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+
+        return execute(sql, params, many, context)
+
+
+def percentile(values, rank):
+    """Return the nearest-rank percentile of sorted values"""
+    if not values:
+        return 0
+
+    return values[max(math.ceil(rank / 100 * len(values)) - 1, 0)]
+
+
+def run_steps(scenario, ctx, steps):
+    """Run steps requests of a scenario in the current thread,
+    return (latency seconds, queries, status code) per request"""
+    client = APIClient()
+    samples = []
+
+    for _ in range(steps):
+        counter = QueryCounter()
+
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(counter))
+
+            start = time.perf_counter()
+            response = scenario(client, ctx)
+            elapsed = time.perf_counter() - start
+
+        samples.append((elapsed, counter.queries, response.status_code))
+
+    return samples
+
+
+def run_worker(scenario, ctx, steps):
+    """Run steps in a worker thread, closing its connections after"""
+    try:
+        return run_steps(scenario, ctx, steps)
+    finally:
+        connections.close_all()
+
+
+def run_scenario(name, ctx, iterations, warmup=0, concurrency=1):
+    """Run a scenario and return its throughput, latency percentiles
+    and query counts"""
+    scenario = SCENARIOS[name]
+    run_steps(scenario, ctx, warmup)
+    shares = [
+        iterations // concurrency + (worker < iterations % concurrency)
+        for worker in range(concurrency)
+    ]
+    start = time.perf_counter()
+
+    if concurrency == 1:
+        samples = run_steps(scenario, ctx, iterations)
+    else:
+        with ThreadPoolExecutor(concurrency) as executor:
+            samples = [
+                sample
+                for result in executor.map(
+                    lambda steps: run_worker(scenario, ctx, steps), shares
+                )
+                for sample in result
+            ]
+
+    wall = time.perf_counter() - start
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    queries = [sample[1] for sample in samples]
+
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample[2] >= 400),
+        'throughput': round(len(samples) / wall, 2) if wall else 0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(latencies[-1], 3),
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2),
+            'max': max(queries),
+        },
+    }
+
+
+def git_commit():
+    """Return the current commit, None outside of a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(scenarios, iterations, warmup=0, concurrency=1, seed=0,
+                   dataset=None):
+    """Run scenarios against the current database, return the results
+    document"""
+    ctx = BenchContext(random.Random(seed))
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'seed': seed,
+            'iterations': iterations,
+            'concurrency': concurrency,
+            'dataset': dataset,
+        },
+        'scenarios': {},
+    }
+
+    for name in scenarios:
+        results['scenarios'][name] = run_scenario(
+            name, ctx, iterations, warmup, concurrency
+        )
+
+    return results
+
+
+def metric(result, path):
+    """Return the value of a dotted metric path of a scenario result"""
+    for key in path.split('.'):
+        result = result[key]
+
+    return result
+
+
+def compare(baseline, current, threshold=10.0):
+    """Return a row per scenario and metric found in both results, with
+    the relative change in percent and whether it is a regression
+    larger than threshold percent"""
+    rows = []
+
+    for name, result in current['scenarios'].items():
+        if name not in baseline['scenarios']:
+            continue
+
+        for path, higher_is_better in COMPARED_METRICS:
+            old = metric(baseline['scenarios'][name], path)
+            new = metric(result, path)
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if higher_is_better else change
+            rows.append({
+                'scenario': name, 'metric': path, 'baseline': old,
+                'current': new, 'change': round(change, 1),
+                'regression': worse > threshold,
+            })
+
+    return rows
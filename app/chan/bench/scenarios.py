@@ -0,0 +1,118 @@
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from core.models import Board, Thread
+
+
+class BenchContext:
+    """Rows the scenarios pick from, popular threads are read and
+    voted on more often"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.boards = list(Board.objects.values_list('id', flat=True))
+        self.threads = list(Thread.objects.order_by(
+            '-reply_count', 'id'
+        ).values_list('id', flat=True))
+        self.users = list(get_user_model().objects.filter(
+            username__startswith='bench'
+        ).order_by('id'))
+        self.signups = itertools.count()
+        # Zipf-like weights, the n-th most replied thread has weight 1/n
+        self.weights = list(itertools.accumulate(
+            1 / rank for rank in range(1, len(self.threads) + 1)
+        ))
+
+    def popular_thread(self):
+        return self.rng.choices(self.threads, cum_weights=self.weights)[0]
+
+    def user(self):
+        return self.rng.choice(self.users)
+
+
+def thread_url(thread_id, action=''):
+    return reverse('6chan:thread-detail', args=[thread_id]) + action
+
+
+def browse_catalog(client, ctx):
+    """Board catalog, board listing and hot threads of a board"""
+    client.force_authenticate(user=None)
+    page = ctx.rng.random()
+
+    if page < 0.4:
+        return client.get(reverse('6chan:catalog'))
+
+    if page < 0.6:
+        return client.get(reverse('6chan:board-list'))
+
+    return client.get(reverse('6chan:thread-list'), {
+        'board': ctx.rng.choice(ctx.boards),
+        'sort': ctx.rng.choice(['bumped', 'hot', 'top', 'new']),
+    })
+
+
+def read_thread(client, ctx):
+    """Thread detail, reply tree and polling for new replies"""
+    client.force_authenticate(user=None)
+    thread = ctx.popular_thread()
+    page = ctx.rng.random()
+
+    if page < 0.3:
+        return client.get(thread_url(thread))
+
+    if page < 0.8:
+        return client.get(thread_url(thread, 'tree/'))
+
+    return client.get(thread_url(thread, 'replies/'))
+
+
+def post(client, ctx):
+    """Replies to popular threads and new threads"""
+    client.force_authenticate(user=ctx.user())
+
+    if ctx.rng.random() < 0.8:
+        return client.post(reverse('6chan:reply-list'), {
+            'text': 'benchmark reply', 'thread': ctx.popular_thread(),
+        })
+
+    return client.post(reverse('6chan:thread-list'), {
+        'title': 'benchmark thread', 'content': 'benchmark content',
+        'board': ctx.rng.choice(ctx.boards),
+    })
+
+
+def vote_storm(client, ctx):
+    """Many users toggling votes on the same few threads"""
+    client.force_authenticate(user=ctx.user())
+    thread = ctx.rng.choice(ctx.threads[:3])
+    action = ctx.rng.choice(['upvote-thread/', 'downvote-thread/'])
+
+    return client.post(thread_url(thread, action), {'thread': thread})
+
+
+def signup(client, ctx):
+    """Sign up bursts, every other request signs in the new user"""
+    client.force_authenticate(user=None)
+    number = next(ctx.signups)
+    username = f'signup{number // 2}'
+
+    if number % 2:
+        return client.post(reverse('user:signin'), {
+            'username': username, 'password': 'benchpass',
+        })
+
+    return client.post(reverse('user:signup'), {
+        'email': f'{username}@bench.local', 'username': username,
+        'password': 'benchpass',
+    })
+
+
+SCENARIOS = {
+    'catalog': browse_catalog,
+    'thread': read_thread,
+    'post': post,
+    'vote_storm': vote_storm,
+    'signup': signup,
+}
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'BACKEND': 'chan.broker.LocalBackend',
+    'OPTIONS': {},
+    'MAX_QUEUE_SIZE': 100,
+    'MAX_CHANNELS': 50,
+    'KEEPALIVE': 15,
+}
+
+
+class LocalBackend:
+    """Broker backend delivering events inside the current process"""
+
+    def start(self, deliver, interrupt):
+        """Register the callable delivering events to subscribers,
+        events are never lost in process so interrupt is not used"""
+        self.deliver = deliver
+
+    def publish(self, channel, event):
+        """Publish event to channel"""
+        self.deliver(channel, event)
+
+
+class RedisBackend:
+    """Broker backend sharing events between workers through
+    Redis pub/sub, requires the ``redis`` package
+
+    A lost connection is logged and opened again after ``backoff``
+    seconds, doubled on every failed attempt up to ``max_backoff``.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='6chan:',
+                 backoff=1, max_backoff=30):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                'RedisBackend requires the redis package'
+            )
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def start(self, deliver, interrupt):
+        """Listen to every chan channel in a background thread"""
+        threading.Thread(
+            target=self.listen, args=(deliver, interrupt),
+            name='chan-broker', daemon=True
+        ).start()
+
+    def listen(self, deliver, interrupt):
+        """Deliver published events until the process exits, calling
+        interrupt whenever the connection was lost"""
+        delay = self.backoff
+
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+
+            try:
+                pubsub.psubscribe(f'{self.prefix}*')
+                delay = self.backoff
+
+                for message in pubsub.listen():
+                    self.receive(message, deliver)
+            except Exception:
+                logger.exception(
+                    'Listening to Redis failed, reconnecting in %s seconds',
+                    delay
+                )
+            finally:
+                pubsub.close()
+
+            # Events published until the next subscription are missed
+            interrupt()
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    def receive(self, message, deliver):
+        """Deliver one pub/sub message, a malformed one is skipped"""
+        try:
+            channel = message['channel'].decode()[len(self.prefix):]
+            event = json.loads(message['data'])
+        except (KeyError, AttributeError, ValueError):
+            logger.warning('Skipped malformed event %r', message)
+            return
+
+        deliver(channel, event)
+
+    def publish(self, channel, event):
+        """Publish event to channel"""
+        self.client.publish(f'{self.prefix}{channel}', json.dumps(event))
+
+
+class Subscription:
+    """Bounded event queue of one subscriber, when the subscriber is
+    too slow or the broker lost events the oldest events are dropped
+    and an ``overflow`` event tells it to refetch"""
+
+    def __init__(self, broker, channels, max_queue_size):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self.interrupted = False
+
+    def put(self, event):
+        """Queue event, called from the subscriber event loop"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+
+        self.queue.put_nowait(event)
+
+    def interrupt(self):
+        """Report that events may have been missed, called from the
+        subscriber event loop"""
+        self.interrupted = True
+
+    async def get(self):
+        """Return the next event of the subscription"""
+        if self.dropped or self.interrupted:
+            event = {'type': 'overflow', 'dropped': self.dropped}
+
+            if self.interrupted:
+                event['interrupted'] = True
+
+            self.dropped, self.interrupted = 0, False
+
+            return event
+
+        return await self.queue.get()
+
+    def close(self):
+        """Stop receiving events"""
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Fan-out of chan events to the subscribers of this process"""
+
+    def __init__(self, backend, max_queue_size=100):
+        self.backend = backend
+        self.max_queue_size = max_queue_size
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        backend.start(self._deliver, self._interrupt)
+
+    def subscribe(self, channels):
+        """Subscribe to channels from a running event loop"""
+        subscription = Subscription(self, channels, self.max_queue_size)
+
+        with self._lock:
+            for channel in channels:
+                self._subscriptions.setdefault(channel, set()).add(
+                    subscription
+                )
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription from every channel"""
+        with self._lock:
+            for channel in subscription.channels:
+                subscriptions = self._subscriptions.get(channel, set())
+                subscriptions.discard(subscription)
+
+                if not subscriptions:
+                    self._subscriptions.pop(channel, None)
+
+    def publish(self, channel, event):
+        """Publish event to every subscriber of channel"""
+        try:
+            self.backend.publish(channel, event)
+        except Exception:
+            logger.exception('Publishing event to %s failed', channel)
+
+    def _deliver(self, channel, event):
+        """Hand event over to the event loop of each subscriber"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, dict(event, channel=channel)
+                )
+            except RuntimeError:
+                # The event loop of the subscriber is closed
+                self.unsubscribe(subscription)
+
+    def _interrupt(self):
+        """Tell every subscriber events may have been missed"""
+        with self._lock:
+            subscriptions = set().union(*self._subscriptions.values())
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.interrupt
+                )
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+    def stats(self):
+        """Return the number of subscriptions per channel"""
+        with self._lock:
+            return {
+                channel: len(subscriptions)
+                for channel, subscriptions in self._subscriptions.items()
+            }
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_realtime_settings():
+    """Return realtime settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'CHAN_REALTIME', {}))
+
+
+def get_broker():
+    """Return the process wide broker,
+    None when realtime updates are disabled"""
+    global _broker
+
+    config = get_realtime_settings()
+
+    if not config['ENABLED']:
+        return None
+
+    with _broker_lock:
+        if _broker is None:
+            backend = import_string(config['BACKEND'])(**config['OPTIONS'])
+            _broker = Broker(
+                backend, max_queue_size=config['MAX_QUEUE_SIZE']
+            )
+
+    return _broker
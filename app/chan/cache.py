@@ -0,0 +1,282 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from rest_framework.response import Response
+
+from core.db.routers import primary_reads
+
+from chan.conditional import not_modified, validator_headers
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'BACKEND': 'chan.cache.DjangoCacheBackend',
+    'OPTIONS': {},
+    'TIMEOUT': 60,
+}
+
+
+class LocMemLRUBackend:
+    """Process local cache backend with LRU eviction and TTL, other
+    processes do not see its invalidations"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value of key, None when missing"""
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is None:
+                return None
+
+            value, expires = item
+
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+
+            return value
+
+    def set(self, key, value, timeout=None):
+        """Store value under key for timeout seconds"""
+        expires = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key from the cache"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def add(self, key, value):
+        """Store value under key if missing, return the stored value"""
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is None:
+                self._data[key] = (value, None)
+                return value
+
+            return item[0]
+
+    def incr(self, key):
+        """Increase the integer stored under key, a missing key
+        is initialized from the clock"""
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is None:
+                self._data[key] = (time.time_ns(), None)
+            else:
+                self._data[key] = (item[0] + 1, item[1])
+
+            self._data.move_to_end(key)
+
+    def clear(self):
+        """Remove every cached value"""
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """Shared cache backend using one of the configured CACHES"""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        """Return the cached value of key, None when missing"""
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout=None):
+        """Store value under key for timeout seconds"""
+        self.cache.set(key, value, timeout)
+
+    def delete(self, key):
+        """Remove key from the cache"""
+        self.cache.delete(key)
+
+    def add(self, key, value):
+        """Store value under key if missing, return the stored value"""
+        self.cache.add(key, value, None)
+
+        return self.cache.get(key, value)
+
+    def incr(self, key):
+        """Increase the integer stored under key, a missing key
+        is initialized from the clock"""
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, time.time_ns(), None)
+
+    def clear(self):
+        """Remove every cached value"""
+        self.cache.clear()
+
+
+class ResponseCache:
+    """Cache of serialized payloads keyed by object id and version
+
+    Every object has a version counter, invalidating an object
+    increases the counter so its cached payloads are never read again
+    and age out of the backend.
+    """
+
+    def __init__(self, backend, timeout=60):
+        self.backend = backend
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+
+    def _version_key(self, kind, pk):
+        """Return the cache key of an object version counter"""
+        return f'chan:{kind}:{pk}:version'
+
+    def version(self, kind, pk):
+        """Return the current version of an object, a missing counter
+        starts from the clock so it never reuses an older version"""
+        key = self._version_key(kind, pk)
+        version = self.backend.get(key)
+
+        if version is None:
+            version = self.backend.add(key, time.time_ns())
+
+        return version
+
+    def _key(self, kind, pk, version, variant):
+        """Return the cache key of an object payload"""
+        return f'chan:{kind}:{pk}:{version}:{variant}'
+
+    def get(self, kind, pk, variant=''):
+        """Return the current version and the cached payload of an
+        object, the payload is None on a miss"""
+        version = self.version(kind, pk)
+        data = self.backend.get(self._key(kind, pk, version, variant))
+
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return version, data
+
+    def set(self, kind, pk, version, data, variant=''):
+        """Cache the payload of an object read at version"""
+        key = self._key(kind, pk, version, variant)
+        self.backend.set(key, data, self.timeout)
+
+    def invalidate(self, kind, pk):
+        """Invalidate every cached payload of an object"""
+        if pk is not None:
+            self.backend.incr(self._version_key(kind, pk))
+
+    def stats(self):
+        """Return hit/miss counters of the cache"""
+        total = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process wide response cache,
+    None when response caching is disabled"""
+    global _cache
+
+    config = dict(
+        DEFAULT_SETTINGS, **getattr(settings, 'CHAN_RESPONSE_CACHE', {})
+    )
+
+    if not config['ENABLED']:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            backend = import_string(config['BACKEND'])(**config['OPTIONS'])
+            _cache = ResponseCache(backend, timeout=config['TIMEOUT'])
+
+    return _cache
+
+
+class CachedRetrieveMixin:
+    """Serve retrieve action from the response cache, the validators
+    (ETag, Last-Modified) of the response are cached along the payload
+    so conditional requests hitting the cache do not query the db
+
+    Misses are serialized from the primary, a lagging replica would
+    cache a stale payload under the current version.
+    """
+    cache_kind = None
+
+    def get_cache_variant(self):
+        """Return the part of the request the payload depends on"""
+        return self.request.get_host()
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the cached payload, serialize it on a miss"""
+        cache = get_response_cache()
+        pk = str(kwargs[self.lookup_url_kwarg or self.lookup_field])
+
+        if cache is None or not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+
+        pk = int(pk)
+        variant = self.get_cache_variant()
+        version, entry = cache.get(self.cache_kind, pk, variant)
+
+        if entry is None:
+            with primary_reads():
+                response = super().retrieve(request, *args, **kwargs)
+
+            if response.status_code == 200:
+                etag, last_modified = getattr(
+                    response, 'validators', (None, None)
+                )
+                entry = {
+                    'data': dict(response.data),
+                    'etag': etag,
+                    'last_modified': last_modified,
+                }
+                cache.set(self.cache_kind, pk, version, entry, variant)
+
+            return response
+
+        if entry['etag'] is None:
+            return Response(entry['data'])
+
+        response = not_modified(
+            request, entry['etag'], entry['last_modified']
+        )
+
+        if response is not None:
+            return response
+
+        return Response(
+            entry['data'],
+            headers=validator_headers(entry['etag'], entry['last_modified'])
+        )
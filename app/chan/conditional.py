@@ -0,0 +1,201 @@
+import hashlib
+
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def validator_headers(etag, last_modified):
+    """Return the response headers of validators"""
+    headers = {'ETag': etag}
+
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+
+    return headers
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 response when the request validators match,
+    None otherwise"""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+
+    if response is not None and response.status_code == 304:
+        return response
+
+    return None
+
+
+class NotModifiedPage(Exception):
+    """Raised by pagination to answer a list with its 304 response"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def row_value(row, name):
+    """Return a field of a model instance or a values() row"""
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+class ConditionalGetMixin:
+    """Answer list and retrieve with 304 Not Modified when the
+    ``If-None-Match`` / ``If-Modified-Since`` validators of the request
+    still match, without serializing the body
+
+    Retrieve validators are computed with one aggregate query over the
+    object, list validators from the rows of the requested page once
+    it is fetched, so they cost nothing more than the page query.
+    """
+    modified_field = 'date_modified'
+
+    def get_validator_aggregates(self):
+        """Return the aggregates the representation depends on"""
+        return {
+            'last_modified': Max(self.modified_field),
+            'count': Count('pk', distinct=True),
+        }
+
+    def get_validators(self, queryset):
+        """Return the etag and last modified timestamp of queryset,
+        None when queryset is empty"""
+        stats = queryset.order_by().aggregate(
+            **self.get_validator_aggregates()
+        )
+
+        if not stats['count']:
+            return None
+
+        last_modified = stats['last_modified']
+        key = '|'.join([
+            self.request.get_host(),
+            self.request.get_full_path(),
+            *(str(stats[name]) for name in sorted(stats))
+        ])
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+        if last_modified is not None:
+            last_modified = timegm(last_modified.utctimetuple())
+
+        return etag, last_modified
+
+    def _conditional(self, queryset, handler, *args, **kwargs):
+        """Return 304 when validators match, call handler otherwise"""
+        validators = self.get_validators(queryset)
+
+        if validators is None:
+            return handler(self.request, *args, **kwargs)
+
+        response = not_modified(self.request, *validators)
+
+        if response is not None:
+            return response
+
+        response = handler(self.request, *args, **kwargs)
+
+        if response.status_code == 200:
+            response.validators = validators
+
+            for header, value in validator_headers(*validators).items():
+                response[header] = value
+
+        return response
+
+    def get_row_validator(self, row):
+        """Return the values of a listed row its representation
+        depends on, scores the page is sorted by are not always
+        updated along the modification date"""
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+
+        if isinstance(ordering, str):
+            ordering = (ordering, )
+
+        return (
+            row_value(row, self.queryset.model._meta.pk.attname),
+            row_value(row, self.modified_field),
+            *(row_value(row, field.lstrip('-')) for field in ordering)
+        )
+
+    def get_page_validators(self, rows):
+        """Return the etag and last modified timestamp of a page,
+        None when the page is empty"""
+        if not rows:
+            return None
+
+        paginator = self.paginator
+        key = '|'.join([
+            self.request.get_host(),
+            self.request.get_full_path(),
+            str(paginator.get_next_link()),
+            str(paginator.get_previous_link()),
+            *(str(self.get_row_validator(row)) for row in rows)
+        ])
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        last_modified = max(
+            row_value(row, self.modified_field) for row in rows
+        )
+
+        return etag, timegm(last_modified.utctimetuple())
+
+    def get_extra_columns(self, queryset):
+        """Columns of values() rows the validators are computed from"""
+        return [*super().get_extra_columns(queryset), self.modified_field]
+
+    def paginate_queryset(self, queryset):
+        """Answer 304 once the page is known, before serializing it"""
+        page = super().paginate_queryset(queryset)
+
+        if page is None or self.action != 'list':
+            return page
+
+        validators = self.get_page_validators(page)
+
+        if validators is not None:
+            response = not_modified(self.request, *validators)
+
+            if response is not None:
+                raise NotModifiedPage(response)
+
+        self.page_validators = validators
+
+        return page
+
+    def list(self, request, *args, **kwargs):
+        """List objects unless the client copy is still fresh"""
+        self.page_validators = None
+
+        try:
+            response = super().list(request, *args, **kwargs)
+        except NotModifiedPage as e:
+            return e.response
+
+        if response.status_code == 200 and self.page_validators:
+            response.validators = self.page_validators
+
+            for header, value in validator_headers(
+                *self.page_validators
+            ).items():
+                response[header] = value
+
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve an object unless the client copy is still fresh"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+
+        try:
+            queryset = queryset.filter(
+                **{self.lookup_field: int(kwargs[lookup_url_kwarg])}
+            )
+        except (TypeError, ValueError):
+            return super().retrieve(request, *args, **kwargs)
+
+        return self._conditional(
+            queryset, super().retrieve, *args, **kwargs
+        )
@@ -0,0 +1,255 @@
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework import generics, serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from chan.serializers import ThumbnailsField, media_url
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+}
+
+# Fields whose representation is the value read from the database
+PLAIN_FIELDS = (
+    serializers.IntegerField, serializers.CharField,
+    serializers.BooleanField, serializers.ChoiceField,
+)
+
+
+def get_fast_path_settings():
+    """Return fast path settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'CHAN_FAST_PATH', {}))
+
+
+def file_url(name, request):
+    return media_url(name, request) if name else None
+
+
+def file_name(name, request):
+    return name or None
+
+
+def thumbnail_urls(thumbnails, request):
+    return {
+        size: media_url(name, request) for size, name in thumbnails.items()
+    }
+
+
+def compile_field(model, field):
+    """Return the column and converter of a serializer field, the
+    converter is None when the column value is the representation"""
+    if isinstance(field, ThumbnailsField):
+        return field.source, thumbnail_urls
+
+    if isinstance(field, serializers.FileField):
+        use_url = getattr(
+            field, 'use_url', api_settings.UPLOADED_FILES_USE_URL
+        )
+
+        return field.source, file_url if use_url else file_name
+
+    if isinstance(field, serializers.DateTimeField):
+        to_representation = field.to_representation
+
+        return field.source, lambda value, request: to_representation(value)
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is None:
+            return model._meta.get_field(field.source).attname, None
+
+    elif isinstance(field, PLAIN_FIELDS):
+        return field.source, None
+
+    raise ImproperlyConfigured(
+        f'{type(field).__name__} {field.field_name} has no fast path'
+    )
+
+
+class FastRepresentation:
+    """Representation of a model serializer built from ``values()``
+    rows with precompiled field accessors, without instantiating
+    models or serializer fields per row
+
+    Fields whose source is not a column are computed by the database
+    from ``expressions``.
+    """
+
+    def __init__(self, serializer_class, expressions=None):
+        serializer = serializer_class()
+        model = serializer.Meta.model
+        expressions = expressions or {}
+        self.columns = []
+        self.expressions = {}
+        self.accessors = []
+
+        for key, field in serializer.fields.items():
+            if field.source in expressions:
+                column, convert = field.source, None
+                self.expressions[column] = expressions[column]
+            else:
+                column, convert = compile_field(model, field)
+                self.columns.append(column)
+
+            self.accessors.append((key, column, convert))
+
+    def values(self, queryset, extra=()):
+        """Return queryset as dicts of the columns of the representation
+        and the extra columns"""
+        columns = self.columns + [
+            column for column in extra if column not in self.columns
+        ]
+
+        return queryset.values(*columns, **self.expressions)
+
+    def to_representation(self, row, request=None):
+        return self.to_representations([row], request)[0]
+
+    def to_representations(self, rows, request=None):
+        accessors = self.accessors
+
+        return [
+            {
+                key: row[column] if convert is None
+                else convert(row[column], request)
+                for key, column, convert in accessors
+            }
+            for row in rows
+        ]
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer encoding with orjson when it is installed, the
+    output is the same as ``JSONRenderer`` for compact UTF-8 JSON
+
+    Falls back to ``JSONRenderer`` when indenting or escaping non-ASCII
+    characters, or for data orjson cannot encode. Floats are encoded
+    with the shortest representation, which may differ from ``repr``.
+    """
+    options = 0
+
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=self.options
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping of line and paragraph separators as JSONRenderer
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
+
+
+_representations = {}
+_representations_lock = threading.Lock()
+
+
+def get_representation(serializer_class, expressions=None):
+    """Return the shared fast representation of a serializer class"""
+    key = (serializer_class, tuple(sorted(expressions or {})))
+
+    with _representations_lock:
+        representation = _representations.get(key)
+
+        if representation is None:
+            representation = _representations[key] = (
+                FastRepresentation(serializer_class, expressions)
+            )
+
+    return representation
+
+
+class FastReadMixin:
+    """Serve list and retrieve from ``values()`` rows rendered by a
+    ``FastRepresentation`` of the view serializer, the payload is the
+    same as the serializer's
+
+    Views declare the expressions of fields that are not columns in
+    ``fast_path_expressions``. Object permissions are checked against
+    the row, so they must not read the object on safe requests.
+    """
+    fast_path_expressions = None
+    renderer_classes = [
+        FastJSONRenderer, *api_settings.DEFAULT_RENDERER_CLASSES
+    ]
+
+    def get_fast_representation(self):
+        """Return the fast representation of the view serializer,
+        None to serialize model instances instead"""
+        if not get_fast_path_settings()['ENABLED']:
+            return None
+
+        return get_representation(
+            self.get_serializer_class(), self.fast_path_expressions
+        )
+
+    def get_extra_columns(self, queryset):
+        """Return the columns of rows besides the representation,
+        the ones the paginator positions cursors with"""
+        paginator = self.paginator
+
+        if paginator is None or not hasattr(paginator, 'get_ordering'):
+            return []
+
+        ordering = paginator.get_ordering(self.request, queryset, self)
+
+        return [field.lstrip('-') for field in ordering]
+
+    def list(self, request, *args, **kwargs):
+        representation = self.get_fast_representation()
+
+        if representation is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = representation.values(
+            queryset, self.get_extra_columns(queryset)
+        )
+        page = self.paginate_queryset(rows)
+        data = representation.to_representations(
+            rows if page is None else page, request
+        )
+
+        if page is None:
+            return Response(data)
+
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        representation = self.get_fast_representation()
+
+        if representation is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        row = generics.get_object_or_404(
+            representation.values(queryset),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+
+        return Response(representation.to_representation(row, request))
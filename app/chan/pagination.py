@@ -0,0 +1,185 @@
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination
+
+from core.ndjson import DumpEncoder
+
+
+def reverse_ordering(ordering):
+    """Return ordering with every direction flipped"""
+    return tuple(
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+    )
+
+
+class ChanCursorPagination(CursorPagination):
+    """Keyset pagination for chan listings, the cost of a page
+    does not depend on how deep the client scrolls
+
+    Cursors hold the values of every ordering field, which must be
+    non-null and end with a unique one, and pages start after the
+    cursor row in the order of all of them, so rows sharing the value
+    of the first ordering field are neither repeated nor skipped.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-id', )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = False, None
+
+        if self.cursor is not None:
+            reverse, position = self.cursor.reverse, self.cursor.position
+
+        ordering = reverse_ordering(self.ordering) if reverse else (
+            self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+
+        if position is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(queryset, ordering, position)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = None
+
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = following is not None
+            self.next_position = position
+            self.previous_position = following
+        else:
+            self.has_next = following is not None
+            self.has_previous = position is not None
+            self.next_position = following
+            self.previous_position = position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def decode_position(self, queryset, ordering, position):
+        """Return the ordering field values of a cursor position"""
+        try:
+            values = json.loads(position)
+
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError(position)
+
+            for index, order in enumerate(ordering):
+                try:
+                    field = queryset.model._meta.get_field(order.lstrip('-'))
+                except FieldDoesNotExist:
+                    continue
+
+                values[index] = field.to_python(values[index])
+        except (ValueError, TypeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values
+
+    def keyset_filter(self, queryset, ordering, position):
+        """Return the condition of rows after position in ordering, the
+        row value comparison (a, b) < (x, y) expanded for the mixed
+        directions of the ordering"""
+        values = self.decode_position(queryset, ordering, position)
+        lookups = [
+            (order.lstrip('-'), 'lt' if order.startswith('-') else 'gt')
+            for order in ordering
+        ]
+        condition = None
+        equal = Q()
+
+        for (name, lookup), value in zip(lookups, values):
+            after = equal & Q(**{f'{name}__{lookup}': value})
+            condition = after if condition is None else condition | after
+            equal &= Q(**{name: value})
+
+        # Bound on the first field alone so its index range is used
+        name, lookup = lookups[0]
+
+        return Q(**{f'{name}__{lookup}e': values[0]}) & condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = [
+            instance[name] if isinstance(instance, dict)
+            else getattr(instance, name)
+            for name in (order.lstrip('-') for order in ordering)
+        ]
+
+        return json.dumps(values, cls=DumpEncoder)
+
+
+class BoardCursorPagination(ChanCursorPagination):
+    """Cursor pagination for boards ordered by creation"""
+    ordering = ('id', )
+
+
+class ThreadCursorPagination(ChanCursorPagination):
+    """Cursor pagination for threads ordered by bump order, or by the
+    order requested with ``?sort=``, each backed by an index"""
+    ordering = ('-last_bumped_at', '-id')
+    sort_query_param = 'sort'
+    sort_orderings = {
+        'bumped': ('-last_bumped_at', '-id'),
+        'new': ('-id', ),
+        'hot': ('-hot_score', '-id'),
+        'top': ('-top_score', '-id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        """Return the ordering of the requested sort"""
+        sort = request.query_params.get(self.sort_query_param)
+
+        if sort is None:
+            return self.ordering
+
+        if sort not in self.sort_orderings:
+            msg = _('Sort must be one of: %s') % ', '.join(
+                self.sort_orderings
+            )
+            raise ValidationError({self.sort_query_param: msg})
+
+        return self.sort_orderings[sort]
+
+
+class ReplyCursorPagination(ChanCursorPagination):
+    """Cursor pagination for replies ordered by posting time"""
+    ordering = ('date_created', 'id')
+
+
+class SearchCursorPagination(ChanCursorPagination):
+    """Cursor pagination for search results ordered by relevance"""
+    page_size = 20
+    ordering = ('-rank', '-id')
+
+
+class ArchiveCursorPagination(ChanCursorPagination):
+    """Cursor pagination for archived threads, latest archived first"""
+    ordering = ('-date_archived', '-id')
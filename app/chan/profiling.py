@@ -0,0 +1,329 @@
+import threading
+import time
+
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.serializers import BaseSerializer
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'TIME_BUCKETS': [
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+    ],
+    'QUERY_BUCKETS': [1, 2, 3, 5, 10, 20, 50, 100],
+}
+
+# Histogram name, help text and settings key of its bucket bounds
+METRICS = [
+    ('queries', 'SQL queries per request', 'QUERY_BUCKETS'),
+    ('sql_seconds', 'SQL time per request', 'TIME_BUCKETS'),
+    ('serializer_seconds', 'Serializer time per request', 'TIME_BUCKETS'),
+    ('duration_seconds', 'Total time per request', 'TIME_BUCKETS'),
+]
+
+_profile = ContextVar('profile', default=None)
+
+# ``BaseSerializer.data`` as defined by DRF while serializers are timed
+_serializer_data = None
+
+
+def get_profiling_settings():
+    """Return profiling settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'CHAN_PROFILING', {}))
+
+
+class RequestProfile:
+    """Measurements of a single request"""
+
+    def __init__(self):
+        self.view = None
+        self.action = None
+        self.budget = None
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+        self.duration_seconds = 0.0
+
+    @property
+    def endpoint(self):
+        return f'{self.view}.{self.action}'
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute wrapper counting and timing queries"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - start
+
+
+class Histogram:
+    """Cumulative histogram over fixed bucket bounds"""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        """Return cumulative bucket counts keyed by upper bound"""
+        buckets = {}
+        total = 0
+
+        for bound, count in zip(self.bounds + ['+Inf'], self.counts):
+            total += count
+            buckets[str(bound)] = total
+
+        return {'buckets': buckets, 'sum': self.sum, 'count': self.count}
+
+
+class ProfileRegistry:
+    """Process wide histograms of request profiles per endpoint"""
+
+    def __init__(self, config):
+        self.config = config
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def record(self, profile):
+        """Add the measurements of a finished request"""
+        with self.lock:
+            endpoint = self.endpoints.get(profile.endpoint)
+
+            if endpoint is None:
+                endpoint = self.endpoints[profile.endpoint] = {
+                    'view': profile.view,
+                    'action': profile.action,
+                    'over_budget': 0,
+                    **{
+                        name: Histogram(self.config[bounds])
+                        for name, _, bounds in METRICS
+                    },
+                }
+
+            for name, _, _ in METRICS:
+                endpoint[name].observe(getattr(profile, name))
+
+            budget = profile.budget
+
+            if budget is not None and profile.queries > budget:
+                endpoint['over_budget'] += 1
+
+    def snapshot(self):
+        """Return the histograms of every endpoint"""
+        with self.lock:
+            return {
+                key: {
+                    name: value.snapshot() if isinstance(value, Histogram)
+                    else value
+                    for name, value in endpoint.items()
+                }
+                for key, endpoint in sorted(self.endpoints.items())
+            }
+
+    def clear(self):
+        with self.lock:
+            self.endpoints.clear()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_profile_registry():
+    """Return the process wide profile registry,
+    None when profiling is disabled"""
+    global _registry
+
+    config = get_profiling_settings()
+
+    if not config['ENABLED']:
+        return None
+
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProfileRegistry(config)
+            instrument_serializers()
+
+    return _registry
+
+
+@receiver(setting_changed)
+def reset_profiling(setting, **kwargs):
+    """Drop the registry and stop timing serializers when the profiling
+    settings change, they are set up again once enabled"""
+    global _registry
+
+    if setting != 'CHAN_PROFILING':
+        return
+
+    with _registry_lock:
+        _registry = None
+        restore_serializers()
+
+
+def instrument_serializers():
+    """Time the outermost ``.data`` access of serializers, nested
+    serializers are rendered within it, only done while profiling is
+    enabled"""
+    global _serializer_data
+
+    if _serializer_data is not None:
+        return
+
+    _serializer_data = BaseSerializer.data
+    data = _serializer_data.fget
+
+    def profiled_data(serializer):
+        profile = _profile.get()
+
+        if profile is None:
+            return data(serializer)
+
+        profile.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data(serializer)
+        finally:
+            profile.serializer_depth -= 1
+
+            if not profile.serializer_depth:
+                profile.serializer_seconds += time.perf_counter() - start
+
+    BaseSerializer.data = property(profiled_data)
+
+
+def restore_serializers():
+    """Put back the ``.data`` property of serializers"""
+    global _serializer_data
+
+    if _serializer_data is not None:
+        BaseSerializer.data = _serializer_data
+        _serializer_data = None
+
+
+def resolve_view(request, view_func):
+    """Return the view class name and action of a resolved view"""
+    view = getattr(view_func, 'cls', None)
+
+    if view is None:
+        return view_func.__name__, request.method.lower()
+
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+
+    return view.__name__, action
+
+
+class ProfilingMiddleware:
+    """Record query count, SQL time, serializer time and total time of
+    every request per view and action when profiling is enabled
+
+    The profile of a request is attached to its response as
+    ``response.profile``, views declare the maximum number of queries
+    of their actions in ``query_budgets``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registry = get_profile_registry()
+
+        if registry is None:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        start = time.perf_counter()
+
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+
+                response = self.get_response(request)
+        finally:
+            profile.duration_seconds = time.perf_counter() - start
+            _profile.reset(token)
+
+        if profile.view is not None:
+            registry.record(profile)
+
+        response.profile = profile
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _profile.get()
+
+        if profile is None:
+            return
+
+        profile.view, profile.action = resolve_view(request, view_func)
+        view = getattr(view_func, 'cls', None)
+        budgets = getattr(view, 'query_budgets', None) or {}
+        profile.budget = budgets.get(profile.action)
+
+
+def endpoint_labels(endpoint):
+    """Return the Prometheus labels of an endpoint"""
+    return f'view="{endpoint["view"]}",action="{endpoint["action"]}"'
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Render profile histograms in the Prometheus text format"""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        lines = []
+
+        for name, help_text, _ in METRICS:
+            metric = f'chan_request_{name}'
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} histogram')
+
+            for endpoint in data.get('endpoints', {}).values():
+                labels = endpoint_labels(endpoint)
+                histogram = endpoint[name]
+
+                for bound, count in histogram['buckets'].items():
+                    lines.append(
+                        f'{metric}_bucket{{{labels},le="{bound}"}} {count}'
+                    )
+
+                lines.append(f'{metric}_sum{{{labels}}} {histogram["sum"]}')
+                lines.append(
+                    f'{metric}_count{{{labels}}} {histogram["count"]}'
+                )
+
+        metric = 'chan_request_over_budget_total'
+        lines.append(f'# HELP {metric} Requests over their query budget')
+        lines.append(f'# TYPE {metric} counter')
+
+        for endpoint in data.get('endpoints', {}).values():
+            lines.append(
+                f'{metric}{{{endpoint_labels(endpoint)}}} '
+                f'{endpoint["over_budget"]}'
+            )
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,167 @@
+import asyncio
+import json
+
+from urllib.parse import parse_qs
+
+from chan.broker import get_broker, get_realtime_settings
+
+
+def parse_channels(query_string, max_channels):
+    """Return the channels requested with ``?thread=1,2&board=3``"""
+    params = parse_qs(query_string.decode())
+    channels = []
+
+    for kind in ['thread', 'board']:
+        for value in params.get(kind, []):
+            channels.extend(
+                f'{kind}:{pk}' for pk in value.split(',') if pk.isdigit()
+            )
+
+    return list(dict.fromkeys(channels))[:max_channels]
+
+
+async def _wait_disconnect(receive, disconnect_types):
+    """Consume client messages until it disconnects"""
+    while True:
+        message = await receive()
+
+        if message['type'] in disconnect_types:
+            return
+
+
+async def _stream(subscription, send_event, send_keepalive, keepalive):
+    """Forward subscription events until the task is cancelled"""
+    while True:
+        try:
+            event = await asyncio.wait_for(subscription.get(), keepalive)
+        except asyncio.TimeoutError:
+            await send_keepalive()
+        else:
+            await send_event(event)
+
+
+async def _serve(subscription, receive, disconnect_types, *stream_args):
+    """Stream events until the client disconnects"""
+    stream = asyncio.ensure_future(_stream(subscription, *stream_args))
+    disconnect = asyncio.ensure_future(
+        _wait_disconnect(receive, disconnect_types)
+    )
+
+    try:
+        await asyncio.wait(
+            [stream, disconnect], return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        stream.cancel()
+        disconnect.cancel()
+        subscription.close()
+
+    if stream.done() and not stream.cancelled() and stream.exception():
+        raise stream.exception()
+
+
+async def sse_stream(scope, receive, send, broker, config):
+    """Stream events as server-sent events"""
+    channels = parse_channels(scope['query_string'], config['MAX_CHANNELS'])
+
+    if not channels:
+        await send({
+            'type': 'http.response.start',
+            'status': 400,
+            'headers': [(b'content-type', b'text/plain')],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'No thread or board to subscribe to',
+        })
+        return
+
+    subscription = broker.subscribe(channels)
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+
+    async def send_event(event):
+        data = json.dumps(event)
+        await send({
+            'type': 'http.response.body',
+            'body': f'event: {event["type"]}\ndata: {data}\n\n'.encode(),
+            'more_body': True,
+        })
+
+    async def send_keepalive():
+        await send({
+            'type': 'http.response.body',
+            'body': b': keepalive\n\n',
+            'more_body': True,
+        })
+
+    await _serve(
+        subscription, receive, {'http.disconnect'},
+        send_event, send_keepalive, config['KEEPALIVE']
+    )
+
+
+async def websocket_stream(scope, receive, send, broker, config):
+    """Stream events as WebSocket text frames"""
+    message = await receive()
+
+    if message['type'] != 'websocket.connect':
+        return
+
+    channels = parse_channels(scope['query_string'], config['MAX_CHANNELS'])
+
+    if not channels:
+        await send({'type': 'websocket.close', 'code': 4400})
+        return
+
+    subscription = broker.subscribe(channels)
+    await send({'type': 'websocket.accept'})
+
+    async def send_event(event):
+        await send({'type': 'websocket.send', 'text': json.dumps(event)})
+
+    async def send_keepalive():
+        await send_event({'type': 'keepalive'})
+
+    await _serve(
+        subscription, receive, {'websocket.disconnect'},
+        send_event, send_keepalive, config['KEEPALIVE']
+    )
+
+
+class StreamRouter:
+    """ASGI application routing the stream path to the event
+    stream and everything else to Django"""
+
+    def __init__(self, application, path='/api/6chan/stream/'):
+        self.application = application
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        broker = get_broker()
+        is_stream = scope['type'] in ('http', 'websocket') and (
+            scope['path'] == self.path
+        )
+
+        if is_stream and broker is not None:
+            config = get_realtime_settings()
+
+            if scope['type'] == 'http':
+                return await sse_stream(scope, receive, send, broker, config)
+
+            return await websocket_stream(
+                scope, receive, send, broker, config
+            )
+
+        if scope['type'] == 'websocket':
+            await receive()
+            return await send({'type': 'websocket.close', 'code': 4404})
+
+        return await self.application(scope, receive, send)
@@ -1,34 +1,133 @@
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
 from rest_framework import serializers
 
+from core.archive import decode_document
+from core.images import sniff_image
 from core.models import (
-    Board, Thread, Upvote, Downvote, Reply
+    Board, Thread, Upvote, Downvote, Reply, SearchDocument, ArchivedThread,
+    MAX_REPLY_DEPTH
 )
 
 
+def media_url(name, request=None):
+    """Return the URL of a stored file, absolute when a request is given"""
+    url = default_storage.url(name)
+
+    return request.build_absolute_uri(url) if request else url
+
+
+class ThumbnailsField(serializers.Field):
+    """Read-only field rendering stored thumbnails as URLs"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+
+        return {
+            size: media_url(name, request) for size, name in value.items()
+        }
+
+
+class ImageUploadField(serializers.FileField):
+    """File field accepting files starting like an image, they are
+    decoded and verified by the image workers rather than the request"""
+    default_error_messages = {
+        'invalid_image': _(
+            'Upload a valid image. The file you uploaded was either not '
+            'an image or a corrupted image.'
+        ),
+    }
+
+    def to_internal_value(self, data):
+        file = super().to_internal_value(data)
+
+        if sniff_image(file) is None:
+            self.fail('invalid_image')
+
+        return file
+
+
+class ImageUploadMixin:
+    """Serialize the image fields of a model with ``ImageUploadField``"""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: ImageUploadField,
+    }
+
+
 class BoardSerializer(serializers.ModelSerializer):
     """Serializer for board model"""
 
     class Meta:
         model = Board
-        fields = ['id', 'name', 'code', 'thread']
+        fields = [
+            'id', 'name', 'code', 'thread', 'max_threads', 'max_age_days'
+        ]
         read_only_fields = ['id', ]
 
 
-class ThreadSerializer(serializers.ModelSerializer):
-    """Serializer for thread model"""
+class ThreadSerializer(ImageUploadMixin, serializers.ModelSerializer):
+    """Serializer for thread model
+
+    Vote and reply totals are read from the denormalized counters,
+    the id lists of related objects are only included when requested
+    with the ``expand`` query parameter (e.g. ``?expand=upvote_thread``)
+    """
     board = serializers.PrimaryKeyRelatedField(
         queryset=Board.objects.all()
     )
+    upvotes = serializers.IntegerField(source='upvote_count', read_only=True)
+    downvotes = serializers.IntegerField(
+        source='downvote_count', read_only=True
+    )
+    score = serializers.IntegerField(read_only=True)
+    image_thumbnails = ThumbnailsField()
+
+    expandable_fields = [
+        'reply_to_thread', 'upvote_thread', 'downvote_thread'
+    ]
 
     class Meta:
         model = Thread
         fields = [
             'id', 'title', 'content', 'image',
+            'image_status', 'image_thumbnails',
             'date_created', 'reply_to_thread', 'board',
             'upvote_thread', 'downvote_thread',
-            'is_edited'
+            'is_edited', 'reply_count',
+            'upvotes', 'downvotes', 'score'
+        ]
+        read_only_fields = [
+            'id', 'is_edited', 'reply_to_thread',
+            'upvote_thread', 'downvote_thread', 'reply_count'
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.get_expand(self.context.get('request'))
+
+        for field in self.expandable_fields:
+            if field not in expand:
+                self.fields.pop(field)
+
+    @classmethod
+    def get_expand(cls, request):
+        """Return the expandable fields requested by the client"""
+        if request is None:
+            return []
+
+        expand = request.query_params.get('expand', '')
+
+        return [
+            field for field in expand.split(',')
+            if field in cls.expandable_fields
         ]
-        read_only_fields = ['id', 'is_edited', 'reply_to_thread']
 
     def update(self, instance, validated_data):
         """Updating is_edited thread fields"""
@@ -41,7 +140,7 @@ class ThreadSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ReplySerializer(serializers.ModelSerializer):
+class ReplySerializer(ImageUploadMixin, serializers.ModelSerializer):
     """Serializer for reply"""
     reply = serializers.PrimaryKeyRelatedField(
         queryset=Reply.objects.all(), required=False
@@ -49,15 +148,63 @@ class ReplySerializer(serializers.ModelSerializer):
     thread = serializers.PrimaryKeyRelatedField(
         queryset=Thread.objects.all(), required=False
     )
+    image_thumbnails = ThumbnailsField()
 
     class Meta:
         model = Reply
         fields = [
-            'id', 'text', 'image', 'date_created',
+            'id', 'text', 'image', 'image_status', 'image_thumbnails',
+            'date_created',
             'thread', 'reply', 'is_edited'
         ]
         read_only_fields = ['id', 'is_edited']
 
+    def validate_reply(self, value):
+        """Validating the reply is not nested deeper than its path holds"""
+        if value is not None and value.depth >= MAX_REPLY_DEPTH:
+            msg = _('Replies cannot be nested deeper')
+            raise serializers.ValidationError(msg)
+
+        return value
+
+    def validate(self, attrs):
+        """Validating an edited reply is not moved in the reply tree"""
+        if self.instance is not None:
+            for name in ['thread', 'reply']:
+                if name in attrs and getattr(
+                    attrs[name], 'pk', None
+                ) != getattr(self.instance, f'{name}_id'):
+                    msg = _('A reply cannot be moved')
+                    raise serializers.ValidationError({name: msg})
+
+        return attrs
+
+
+class CatalogThreadSerializer(ThreadSerializer):
+    """Serializer for a catalog thread with its latest replies"""
+    latest_replies = ReplySerializer(
+        many=True, read_only=True, source='catalog_replies'
+    )
+
+    class Meta(ThreadSerializer.Meta):
+        fields = ThreadSerializer.Meta.fields + ['latest_replies']
+
+
+class CatalogSerializer(serializers.ModelSerializer):
+    """Serializer for a catalog board with its top threads"""
+    thread_count = serializers.IntegerField(read_only=True)
+    last_activity = serializers.DateTimeField(read_only=True)
+    threads = CatalogThreadSerializer(
+        many=True, read_only=True, source='catalog_threads'
+    )
+
+    class Meta:
+        model = Board
+        fields = [
+            'id', 'name', 'code', 'thread_count', 'last_activity',
+            'threads'
+        ]
+
 
 class UpvoteSerializer(serializers.ModelSerializer):
     """Serializer for upvote to thread"""
@@ -81,3 +228,66 @@ class DownvoteSerializer(serializers.ModelSerializer):
         model = Downvote
         fields = ['id', 'thread']
         read_only_fields = ['id', ]
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    """Serializer for a thread or reply matching a search"""
+    type = serializers.SerializerMethodField()
+    id = serializers.SerializerMethodField()
+    title = serializers.CharField(source='thread.title')
+    text = serializers.SerializerMethodField()
+    rank = serializers.FloatField()
+
+    class Meta:
+        model = SearchDocument
+        fields = [
+            'type', 'id', 'thread', 'board', 'title', 'text',
+            'date_created', 'rank'
+        ]
+
+    def get_type(self, obj):
+        return 'reply' if obj.reply_id else 'thread'
+
+    def get_id(self, obj):
+        return obj.reply_id or obj.thread_id
+
+    def get_text(self, obj):
+        return obj.reply.text if obj.reply_id else obj.thread.content
+
+
+class ArchivedThreadSerializer(serializers.ModelSerializer):
+    """Serializer for an archived thread listing entry"""
+
+    class Meta:
+        model = ArchivedThread
+        fields = [
+            'id', 'board', 'title', 'reply_count', 'score',
+            'date_created', 'last_bumped_at', 'date_archived'
+        ]
+        read_only_fields = fields
+
+
+class ArchivedThreadDetailSerializer(ArchivedThreadSerializer):
+    """Serializer for an archived thread with its content and replies,
+    replies are listed in tree order with their depth"""
+    thread = serializers.SerializerMethodField()
+
+    class Meta(ArchivedThreadSerializer.Meta):
+        fields = ArchivedThreadSerializer.Meta.fields + ['thread']
+        read_only_fields = fields
+
+    def get_thread(self, obj):
+        request = self.context.get('request')
+        document = decode_document(obj.data)
+
+        for post in [document, *document['replies']]:
+            post['image'] = (
+                media_url(post['image'], request) if post['image'] else None
+            )
+            post['image_thumbnails'] = {
+                size: media_url(name, request)
+                for size, name in post['image_thumbnails'].items()
+            }
+            post.pop('path', None)
+
+        return document
@@ -0,0 +1,188 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import Board, Thread, Reply, Upvote, Downvote
+from core.signals import records_imported, thread_counters_refreshed
+
+from chan.broker import get_broker
+from chan.cache import get_response_cache
+from chan.serializers import ThreadSerializer, ReplySerializer
+
+
+def invalidate(kind, *pks):
+    """Invalidate cached payloads now and once the current
+    transaction is committed, so a payload read from uncommitted
+    state is not served afterwards"""
+    cache = get_response_cache()
+
+    if cache is None:
+        return
+
+    def invalidate_all():
+        for pk in set(pks):
+            cache.invalidate(kind, pk)
+
+    invalidate_all()
+    transaction.on_commit(invalidate_all)
+
+
+@receiver(post_save, sender=Board)
+@receiver(post_delete, sender=Board)
+def invalidate_board(sender, instance, **kwargs):
+    """Invalidate cached payloads of a changed board"""
+    invalidate('board', instance.pk)
+
+
+@receiver(post_save, sender=Thread)
+@receiver(post_delete, sender=Thread)
+def invalidate_thread(sender, instance, **kwargs):
+    """Invalidate cached payloads of a changed thread and its board"""
+    invalidate('thread', instance.pk)
+    invalidate('board', instance.board_id)
+
+
+@receiver(post_save, sender=Reply)
+@receiver(post_delete, sender=Reply)
+def invalidate_replied_thread(sender, instance, **kwargs):
+    """Invalidate cached payloads of the thread of a changed reply"""
+    invalidate('thread', instance.root_thread_id, instance.thread_id)
+
+
+@receiver(post_save, sender=Upvote)
+@receiver(post_delete, sender=Upvote)
+@receiver(post_save, sender=Downvote)
+@receiver(post_delete, sender=Downvote)
+def invalidate_voted_thread(sender, instance, **kwargs):
+    """Invalidate cached payloads of a voted thread"""
+    invalidate('thread', instance.thread_id)
+
+
+@receiver(thread_counters_refreshed)
+def invalidate_refreshed_threads(sender, thread_ids, **kwargs):
+    """Invalidate cached payloads of threads with refreshed counters"""
+    invalidate('thread', *thread_ids)
+
+
+@receiver(records_imported)
+def invalidate_imported(sender, board_ids, thread_ids, **kwargs):
+    """Invalidate cached payloads of boards and threads imported into"""
+    invalidate('board', *board_ids)
+    invalidate('thread', *thread_ids)
+
+
+def publish(channels, event):
+    """Publish a realtime event to channels once the current
+    transaction is committed, event may be a callable building
+    the event at that time"""
+    broker = get_broker()
+
+    if broker is None:
+        return
+
+    def publish_all():
+        payload = event() if callable(event) else event
+
+        for channel in channels:
+            broker.publish(channel, payload)
+
+    transaction.on_commit(publish_all)
+
+
+def vote_counts(thread_id):
+    """Return a callable building the vote event of a thread"""
+    def event():
+        counts = Thread.objects.filter(pk=thread_id).values(
+            'upvote_count', 'downvote_count'
+        ).first() or {}
+
+        return {
+            'type': 'thread.votes',
+            'thread': thread_id,
+            'upvotes': counts.get('upvote_count', 0),
+            'downvotes': counts.get('downvote_count', 0),
+        }
+
+    return event
+
+
+@receiver(post_save, sender=Thread)
+def publish_thread(sender, instance, created, **kwargs):
+    """Publish new and edited threads"""
+    if get_broker() is None:
+        return
+
+    event = {
+        'type': 'thread.created' if created else 'thread.updated',
+        'thread': dict(ThreadSerializer(instance).data),
+    }
+    channels = [f'board:{instance.board_id}']
+
+    if not created:
+        channels.append(f'thread:{instance.pk}')
+
+    publish(channels, event)
+
+
+@receiver(post_delete, sender=Thread)
+def publish_thread_delete(sender, instance, **kwargs):
+    """Publish deleted threads"""
+    publish(
+        [f'board:{instance.board_id}', f'thread:{instance.pk}'],
+        {'type': 'thread.deleted', 'thread': instance.pk}
+    )
+
+
+@receiver(post_save, sender=Reply)
+def publish_reply(sender, instance, created, **kwargs):
+    """Publish new and edited replies to the thread
+    and new replies to its board"""
+    if get_broker() is None or not instance.root_thread_id:
+        return
+
+    event = {
+        'type': 'reply.created' if created else 'reply.updated',
+        'thread': instance.root_thread_id,
+        'reply': dict(ReplySerializer(instance).data),
+    }
+    channels = [f'thread:{instance.root_thread_id}']
+
+    if created:
+        board_id = Thread.objects.filter(
+            pk=instance.root_thread_id
+        ).values_list('board_id', flat=True).first()
+        channels.append(f'board:{board_id}')
+
+    publish(channels, event)
+
+
+@receiver(post_delete, sender=Reply)
+def publish_reply_delete(sender, instance, **kwargs):
+    """Publish deleted replies"""
+    if instance.root_thread_id:
+        publish(
+            [f'thread:{instance.root_thread_id}'],
+            {
+                'type': 'reply.deleted',
+                'thread': instance.root_thread_id,
+                'reply': instance.pk,
+            }
+        )
+
+
+@receiver(post_save, sender=Upvote)
+@receiver(post_delete, sender=Upvote)
+@receiver(post_save, sender=Downvote)
+@receiver(post_delete, sender=Downvote)
+def publish_votes(sender, instance, **kwargs):
+    """Publish vote counters of a voted thread"""
+    publish(
+        [f'thread:{instance.thread_id}'], vote_counts(instance.thread_id)
+    )
+
+
+@receiver(thread_counters_refreshed)
+def publish_refreshed_votes(sender, thread_ids, **kwargs):
+    """Publish vote counters of threads refreshed in bulk"""
+    for thread_id in thread_ids:
+        publish([f'thread:{thread_id}'], vote_counts(thread_id))
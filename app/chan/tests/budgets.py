@@ -0,0 +1,19 @@
+class QueryBudgetMixin:
+    """TestCase mixin failing requests that run more queries than the
+    budget their view declares in ``query_budgets``, the requests must
+    go through ``ProfilingMiddleware`` with profiling enabled"""
+
+    def assertWithinQueryBudget(self, response):
+        profile = getattr(response, 'profile', None)
+
+        if profile is None:
+            self.fail('Response was not profiled, is CHAN_PROFILING enabled?')
+
+        if profile.budget is None:
+            self.fail(f'No query budget declared for {profile.endpoint}')
+
+        if profile.queries > profile.budget:
+            self.fail(
+                f'{profile.endpoint} ran {profile.queries} queries, '
+                f'over its budget of {profile.budget}'
+            )
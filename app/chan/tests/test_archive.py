@@ -0,0 +1,208 @@
+import shutil
+import tempfile
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db.models.signals import post_delete
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.archive import archive_batch, archive_threads, get_archive_settings
+from core.models import Thread, Reply, Upvote, ArchivedThread, MediaBlob
+from core.tests.test_models import create_user, create_board
+
+from chan.serializers import ReplySerializer
+
+
+ARCHIVE_URL = reverse('6chan:archivedthread-list')
+
+
+def archive_detail_url(thread_id):
+    return reverse('6chan:archivedthread-detail', args=[thread_id])
+
+
+class ThreadArchiveTests(TestCase):
+    """Test moving threads off their board into the archive"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+        self.client = APIClient()
+        self.user = create_user()
+        self.board = create_board(user=self.user, max_threads=2)
+        self.threads = [
+            Thread.objects.create(
+                user=self.user, board=self.board,
+                title=f'thread {i}', content='content'
+            )
+            for i in range(4)
+        ]
+
+    def test_archive_over_cap(self):
+        """Test that threads past the cap in bump order are archived
+        with their replies"""
+        oldest = self.threads[0]
+        reply = Reply.objects.create(
+            user=self.user, thread=oldest, text='bump'
+        )
+        Reply.objects.create(user=self.user, reply=reply, text='nested')
+
+        out = StringIO()
+        call_command('archive_threads', stdout=out)
+
+        self.assertIn('2 thread(s) archived', out.getvalue())
+        self.assertEqual(
+            set(Thread.objects.values_list('id', flat=True)),
+            {oldest.id, self.threads[3].id}
+        )
+        self.assertEqual(
+            set(ArchivedThread.objects.values_list('id', flat=True)),
+            {self.threads[1].id, self.threads[2].id}
+        )
+
+    def test_archive_by_age(self):
+        """Test that threads not bumped within the age limit are
+        archived in batches"""
+        self.board.max_threads = None
+        self.board.max_age_days = 1
+        self.board.save()
+        Thread.objects.filter(pk__in=[t.pk for t in self.threads[:3]]).update(
+            last_bumped_at=timezone.now() - timedelta(days=2)
+        )
+
+        archived = archive_threads(config={
+            'MAX_THREADS': None, 'MAX_AGE_DAYS': None,
+            'BATCH_SIZE': 2, 'COMPRESSION_LEVEL': 6,
+        })
+
+        self.assertEqual(archived, 3)
+        self.assertEqual(Thread.objects.get(), self.threads[3])
+
+    def test_archived_media_kept(self):
+        """Test that files of archived threads stay referenced until
+        the archive is deleted"""
+        thread = self.threads[0]
+        thread.image.save('upload.jpg', ContentFile(b'image'), save=False)
+        thread.save()
+        name = thread.image.name
+
+        archive_threads()
+        call_command('collect_media', recount=True, grace=0,
+                     stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+
+        ArchivedThread.objects.get(pk=thread.pk).delete()
+
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 0)
+
+    def test_replies_deleted_in_bulk(self):
+        """Test that replies and votes of archived threads are deleted
+        without per row signals and their files released at once"""
+        thread = self.threads[0]
+        names = []
+
+        for i in range(3):
+            reply = Reply(user=self.user, thread=thread, text='reply')
+            reply.image.save(
+                f'{i}.jpg', ContentFile(f'image {i}'.encode()), save=False
+            )
+            reply.save()
+            names.append(reply.image.name)
+
+        Upvote.objects.create(user=self.user, thread=thread)
+        Thread.objects.filter(pk=thread.pk).update(
+            last_bumped_at=thread.date_created
+        )
+        deleted = []
+
+        def receiver(sender, **kwargs):
+            deleted.append(sender)
+
+        post_delete.connect(receiver)
+        self.addCleanup(post_delete.disconnect, receiver)
+
+        archive_threads()
+
+        self.assertNotIn(Reply, deleted)
+        self.assertNotIn(Upvote, deleted)
+        self.assertIn(Thread, deleted)
+        self.assertFalse(Reply.objects.exists())
+        self.assertFalse(Upvote.objects.exists())
+        self.assertEqual(
+            list(MediaBlob.objects.filter(name__in=names).values_list(
+                'ref_count', flat=True
+            )),
+            [1, 1, 1]
+        )
+
+    def test_reply_to_thread_archived_meanwhile(self):
+        """Test that a reply to a thread archived while it is posted
+        is rejected"""
+        thread = self.threads[0]
+        validate = ReplySerializer.validate
+
+        def archive_meanwhile(serializer, attrs):
+            archive_batch([thread.id], get_archive_settings())
+            return validate(serializer, attrs)
+
+        self.client.force_authenticate(user=self.user)
+
+        with patch.object(ReplySerializer, 'validate', archive_meanwhile):
+            res = self.client.post(
+                reverse('6chan:reply-list'),
+                {'text': 'late reply', 'thread': thread.id}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Reply.objects.exists())
+
+    def test_archive_endpoints(self):
+        """Test listing and reading archived threads"""
+        thread = self.threads[0]
+        Reply.objects.create(user=self.user, thread=thread, text='kept')
+        Thread.objects.filter(pk=thread.pk).update(
+            last_bumped_at=timezone.now() - timedelta(days=1)
+        )
+        archive_threads()
+
+        res = self.client.get(ARCHIVE_URL, {'board': self.board.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertNotIn('thread', res.data['results'][0])
+
+        res = self.client.get(archive_detail_url(thread.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['reply_count'], 1)
+        document = res.data['thread']
+        self.assertEqual(document['title'], thread.title)
+        self.assertEqual(document['user'], self.user.username)
+        self.assertEqual(
+            [reply['text'] for reply in document['replies']], ['kept']
+        )
+
+    def test_archive_read_only(self):
+        """Test that archived threads cannot be modified"""
+        archive_threads()
+        archived = ArchivedThread.objects.first()
+        self.client.force_authenticate(user=self.user)
+
+        res = self.client.delete(archive_detail_url(archived.id))
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
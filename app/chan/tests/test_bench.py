@@ -0,0 +1,109 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from chan.bench.data import generate
+from chan.bench.rendering import run_rendering
+from chan.bench.runner import compare, percentile, run_scenario
+from chan.bench.scenarios import BenchContext
+from core.models import Board, Thread, Reply
+
+
+SIZES = {'USERS': 10, 'BOARDS': 2, 'THREADS': 20, 'MAX_REPLIES': 30}
+
+
+class BenchmarkTests(TestCase):
+    """Test the synthetic data set and the benchmark runner"""
+
+    def test_generate_data_set(self):
+        """Test the data set is reproducible with consistent trees"""
+        counts = generate(seed=1, sizes=SIZES)
+
+        self.assertEqual(counts['user'], 10)
+        self.assertEqual(counts['board'], Board.objects.count())
+        self.assertEqual(counts['thread'], 20)
+        self.assertEqual(counts['reply'], Reply.objects.count())
+        self.assertTrue(
+            get_user_model().objects.get(username='bench0').check_password(
+                'benchpass'
+            )
+        )
+
+        for thread in Thread.objects.all():
+            self.assertEqual(
+                thread.reply_count,
+                Reply.objects.filter(root_thread=thread).count()
+            )
+
+        for reply in Reply.objects.exclude(reply=None).select_related(
+            'reply'
+        ):
+            self.assertEqual(reply.root_thread_id, reply.reply.root_thread_id)
+            self.assertEqual(reply.depth, reply.reply.depth + 1)
+            self.assertTrue(reply.path.startswith(reply.reply.path))
+
+        replies = list(Reply.objects.values_list(
+            'root_thread', 'text'
+        ).order_by('id'))
+        Board.objects.all().delete()
+        get_user_model().objects.all().delete()
+        generate(seed=1, sizes=SIZES)
+
+        self.assertEqual(list(Reply.objects.values_list(
+            'root_thread', 'text'
+        ).order_by('id')), replies)
+
+    def test_run_scenarios(self):
+        """Test scenarios run without errors and report their metrics"""
+        generate(seed=2, sizes=SIZES)
+        ctx = BenchContext(random.Random(2))
+
+        for name in ['catalog', 'thread', 'post', 'vote_storm', 'signup']:
+            result = run_scenario(name, ctx, iterations=6, warmup=2)
+
+            self.assertEqual(result['requests'], 6)
+            self.assertEqual(result['errors'], 0, name)
+            self.assertGreater(result['queries']['mean'], 0)
+            self.assertLessEqual(
+                result['latency_ms']['p50'], result['latency_ms']['max']
+            )
+
+    def test_run_rendering(self):
+        """Test the per row cost is measured for threads and replies"""
+        generate(seed=3, sizes=SIZES)
+
+        results = run_rendering(rows=10, repeat=1)
+
+        self.assertEqual(set(results), {'thread', 'reply'})
+        self.assertEqual(results['thread']['rows'], 10)
+        self.assertGreater(results['reply']['fast_path_us'], 0)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile([], 95), 0)
+
+    def test_compare_flags_regressions(self):
+        """Test slower or lower throughput results are regressions"""
+        def result(throughput, p50, queries):
+            return {'scenarios': {'thread': {
+                'throughput': throughput,
+                'latency_ms': {'p50': p50, 'p95': p50, 'p99': p50},
+                'queries': {'mean': queries},
+            }}}
+
+        rows = {
+            row['metric']: row for row in compare(
+                result(100, 10, 3), result(80, 10.5, 3), threshold=10
+            )
+        }
+
+        self.assertTrue(rows['throughput']['regression'])
+        self.assertEqual(rows['throughput']['change'], -20.0)
+        self.assertFalse(rows['latency_ms.p50']['regression'])
+        self.assertFalse(rows['queries.mean']['regression'])
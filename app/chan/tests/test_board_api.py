@@ -70,9 +70,9 @@ class PublicBoardApiTests(TestCase):
         res = self.client.get(BOARD_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        boards = Board.objects.all()
+        boards = Board.objects.all().order_by('id')
         serializer = BoardSerializer(boards, many=True)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
 
 class PrivateBoardApiTests(TestCase):
@@ -112,9 +112,9 @@ class PrivateBoardApiTests(TestCase):
         res = self.client.get(BOARD_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        boards = Board.objects.all()
+        boards = Board.objects.all().order_by('id')
         serializer = BoardSerializer(boards, many=True)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
 
 class BoardAdminApiTests(TestCase):
@@ -155,9 +155,9 @@ class BoardAdminApiTests(TestCase):
         res = self.client.get(BOARD_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        boards = Board.objects.all()
+        boards = Board.objects.all().order_by('id')
         serializer = BoardSerializer(boards, many=True)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_delete_board(self):
         """Test deleting a board successful"""
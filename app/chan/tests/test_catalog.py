@@ -0,0 +1,87 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Board, Thread, Reply
+from core.tests.test_models import create_user, create_board
+
+
+CATALOG_URL = reverse('6chan:catalog')
+
+
+class CatalogApiTests(TestCase):
+    """Test the board catalog endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.board = create_board(user=self.user)
+
+    def create_thread(self, board, replies=0):
+        thread = Thread.objects.create(
+            user=self.user, board=board,
+            title='catalog thread', content='catalog content'
+        )
+
+        for i in range(replies):
+            Reply.objects.create(
+                user=self.user, text=f'reply {i}', thread=thread
+            )
+
+        return thread
+
+    def test_catalog(self):
+        """Test that boards come with their counts and previews"""
+        self.create_thread(self.board)
+        busy = self.create_thread(self.board, replies=5)
+        Board.objects.create(user=self.user, name='Empty', code='e')
+
+        res = self.client.get(CATALOG_URL, {'threads': 1, 'replies': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        board, empty = res.data['boards']
+        self.assertEqual(board['thread_count'], 2)
+        self.assertIsNotNone(board['last_activity'])
+        self.assertEqual([t['id'] for t in board['threads']], [busy.id])
+        self.assertEqual(
+            [r['text'] for r in board['threads'][0]['latest_replies']],
+            ['reply 3', 'reply 4']
+        )
+        self.assertEqual(empty['thread_count'], 0)
+        self.assertEqual(empty['threads'], [])
+
+    def test_catalog_queries_bounded(self):
+        """Test that the catalog is built with a fixed number
+        of queries whatever the number of boards"""
+        for i in range(5):
+            board = Board.objects.create(
+                user=self.user, name=f'board {i}', code=f'b{i}'
+            )
+            self.create_thread(board, replies=2)
+            self.create_thread(board, replies=4)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(CATALOG_URL)
+
+        self.assertEqual(len(res.data['boards']), 6)
+
+    def test_catalog_without_threads(self):
+        """Test the catalog of boards without threads"""
+        res = self.client.get(CATALOG_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['boards'][0]['threads'], [])
+
+    def test_catalog_sort(self):
+        """Test that catalog threads follow the requested sort"""
+        first = self.create_thread(self.board)
+        self.create_thread(self.board)
+        Reply.objects.create(user=self.user, text='bump', thread=first)
+
+        res = self.client.get(CATALOG_URL, {'sort': 'new', 'threads': 1})
+
+        self.assertNotEqual(
+            res.data['boards'][0]['threads'][0]['id'], first.id
+        )
@@ -0,0 +1,134 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Thread, Reply
+from core.tests.test_models import create_user, create_board
+
+from chan.cache import get_response_cache
+
+
+THREAD_URL = reverse('6chan:thread-list')
+BOARD_URL = reverse('6chan:board-list')
+REPLY_URL = reverse('6chan:reply-list')
+
+
+def detail_url(pk):
+
+    return reverse('6chan:thread-detail', args=[pk])
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag / Last-Modified support of chan endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.board = create_board(user=self.user)
+        self.thread = Thread.objects.create(
+            user=self.user, board=self.board,
+            title='polled thread', content='polled content'
+        )
+        get_response_cache().backend.clear()
+
+    def test_thread_not_modified(self):
+        """Test that polling an unchanged thread returns 304"""
+        url = detail_url(self.thread.id)
+        res = self.client.get(url)
+
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cached_thread_not_modified_without_queries(self):
+        """Test that a cached thread validator is checked
+        without querying the db"""
+        url = detail_url(self.thread.id)
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_thread_modified_after_reply(self):
+        """Test that a reply changes the thread validators"""
+        url = detail_url(self.thread.id)
+        etag = self.client.get(url)['ETag']
+
+        Reply.objects.create(user=self.user, text='new', thread=self.thread)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_thread_list_not_modified(self):
+        """Test that polling an unchanged catalog returns 304"""
+        params = {'board': self.board.id}
+        etag = self.client.get(THREAD_URL, params)['ETag']
+
+        res = self.client.get(THREAD_URL, params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_thread_list_modified_after_new_thread(self):
+        """Test that a new thread changes the catalog validators"""
+        etag = self.client.get(THREAD_URL)['ETag']
+
+        Thread.objects.create(
+            user=self.user, board=self.board,
+            title='new thread', content='new content'
+        )
+        res = self.client.get(THREAD_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_validators_from_page(self):
+        """Test that list validators only depend on the requested page
+        and are computed from the page query"""
+        for text in ['first', 'second']:
+            Reply.objects.create(user=self.user, text=text, thread=self.thread)
+
+        params = {'page_size': 1}
+        etag = self.client.get(REPLY_URL, params)['ETag']
+        Reply.objects.create(user=self.user, text='third', thread=self.thread)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(REPLY_URL, params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        reply = Reply.objects.get(text='first')
+        reply.text = 'edited'
+        reply.save()
+        res = self.client.get(REPLY_URL, params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since is honoured"""
+        Reply.objects.create(user=self.user, text='new', thread=self.thread)
+        last_modified = self.client.get(REPLY_URL)['Last-Modified']
+
+        res = self.client.get(
+            REPLY_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_board_list_modified_after_new_thread(self):
+        """Test that board list validators depend on board threads"""
+        etag = self.client.get(BOARD_URL)['ETag']
+
+        Thread.objects.create(
+            user=self.user, board=self.board,
+            title='new thread', content='new content'
+        )
+        res = self.client.get(BOARD_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,143 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Thread, Reply
+from core.tests.test_models import create_user, create_board
+
+from chan.fastpath import FastJSONRenderer, get_representation
+from chan.serializers import ThreadSerializer, ReplySerializer
+
+
+THREAD_URL = reverse('6chan:thread-list')
+REPLY_URL = reverse('6chan:reply-list')
+
+SERIALIZERS = override_settings(CHAN_FAST_PATH={'ENABLED': False})
+
+
+@override_settings(CHAN_RESPONSE_CACHE={'ENABLED': False})
+class FastPathTests(TestCase):
+    """Test list and retrieve rendered from values() rows"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.board = create_board(self.user)
+        self.threads = [
+            Thread.objects.create(
+                user=self.user, board=self.board, title=f'thread {i}',
+                content='café \u2028 "quoted" \U0001f600',
+                upvote_count=i, downvote_count=1
+            )
+            for i in range(5)
+        ]
+        Thread.objects.filter(pk=self.threads[0].pk).update(
+            image='thread_images/a.png', image_status='ready',
+            image_thumbnails={'small': 'thumbnails/a_small.jpg'}
+        )
+        root = Reply.objects.create(
+            user=self.user, text='root', thread=self.threads[0]
+        )
+        Reply.objects.create(user=self.user, text='nested', reply=root)
+
+    def assertSameContent(self, url, params=None):
+        """Test the fast path renders the bytes of the serializers"""
+        fast = self.client.get(url, params)
+
+        with SERIALIZERS:
+            slow = self.client.get(url, params)
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+
+        return fast
+
+    def test_thread_list_same_content(self):
+        """Test thread pages are the same in every sort"""
+        for sort in ['bumped', 'new', 'hot', 'top']:
+            res = self.assertSameContent(
+                THREAD_URL, {'sort': sort, 'page_size': 2}
+            )
+            self.assertIsNotNone(res.data['next'])
+            self.assertSameContent(res.data['next'])
+
+        self.assertSameContent(THREAD_URL, {'board': self.board.id})
+
+    def test_thread_retrieve_same_content(self):
+        """Test thread details are the same, with media urls"""
+        url = reverse('6chan:thread-detail', args=[self.threads[0].id])
+
+        res = self.assertSameContent(url)
+
+        self.assertEqual(res.data['score'], -1)
+        self.assertTrue(res.data['image'].startswith('http://testserver/'))
+        self.assertIn('\\u2028', res.content.decode())
+
+    def test_expanded_threads_use_serializers(self):
+        """Test expanded id lists are still rendered"""
+        res = self.assertSameContent(
+            THREAD_URL, {'expand': 'reply_to_thread'}
+        )
+
+        self.assertIn('reply_to_thread', res.data['results'][0])
+
+    def test_reply_list_and_retrieve_same_content(self):
+        """Test reply pages and details are the same"""
+        self.assertSameContent(REPLY_URL)
+        self.assertSameContent(REPLY_URL, {'page_size': 1})
+
+        for reply in Reply.objects.all():
+            self.assertSameContent(
+                reverse('6chan:reply-detail', args=[reply.id])
+            )
+
+    def test_no_model_serialization(self):
+        """Test the fast path does not run the serializers"""
+        with patch.object(
+            ThreadSerializer, 'to_representation', side_effect=AssertionError
+        ):
+            res = self.client.get(THREAD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_retrieve_missing_not_found(self):
+        """Test unknown and malformed ids are not found"""
+        for pk in [999, 'abc']:
+            res = self.client.get(f'{REPLY_URL}{pk}/')
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_representation_matches_serializer(self):
+        """Test rows render like serialized instances"""
+        representation = get_representation(ReplySerializer)
+        replies = Reply.objects.order_by('id')
+
+        self.assertEqual(
+            representation.to_representations(
+                representation.values(replies)
+            ),
+            ReplySerializer(replies, many=True).data
+        )
+
+    def test_renderer_matches_json_renderer(self):
+        """Test the fast renderer encodes like the JSON renderer"""
+        thread = Thread.objects.get(pk=self.threads[0].pk)
+        data = {
+            'thread': ThreadSerializer(thread).data,
+            1: [None, True, 'line\u2029break'],
+            'date': thread.date_created,
+        }
+
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
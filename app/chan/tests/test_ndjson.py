@@ -0,0 +1,189 @@
+import json
+import os
+import tempfile
+
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Board, Thread, Reply, Upvote, Downvote
+from core.ndjson import export_records, import_records
+from core.search import search
+from core.tests.test_models import create_user, create_board
+
+from chan.cache import get_response_cache
+
+
+EXPORT_URL = reverse('6chan:export')
+IMPORT_URL = reverse('6chan:import')
+
+
+class NdjsonDumpTests(TestCase):
+    """Test NDJSON export and import of boards, threads and replies"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.admin = create_user(is_admin=True)
+        self.board = create_board(user=self.user)
+        self.thread = Thread.objects.create(
+            user=self.user, board=self.board,
+            title='Dumped thread', content='Exported content'
+        )
+        self.reply = Reply.objects.create(
+            user=self.user, thread=self.thread, text='first reply'
+        )
+        self.child = Reply.objects.create(
+            user=self.admin, reply=self.reply, text='nested reply'
+        )
+        Upvote.objects.create(user=self.admin, thread=self.thread)
+        Downvote.objects.create(user=self.user, thread=self.thread)
+
+    def dump(self):
+        out = StringIO()
+        call_command('export_ndjson', stdout=out, stderr=StringIO())
+
+        return out.getvalue()
+
+    def test_export(self):
+        """Test that every row is exported with users as usernames"""
+        records = [json.loads(line) for line in self.dump().splitlines()]
+
+        self.assertEqual(
+            [record['model'] for record in records],
+            ['board', 'thread', 'reply', 'reply', 'upvote', 'downvote']
+        )
+        self.assertEqual(records[1]['user'], self.user.username)
+        self.assertEqual(records[3]['reply'], self.reply.id)
+        self.assertEqual(records[3]['root_thread'], self.thread.id)
+
+    def test_export_by_board(self):
+        """Test that a dump can be restricted to some boards"""
+        other = Board.objects.create(user=self.user, name='Other', code='o')
+
+        lines = list(export_records(boards=[other.id]))
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['id'], other.id)
+
+    def test_import_round_trip(self):
+        """Test that an exported dump is imported with the same ids"""
+        dump = self.dump()
+        Board.objects.all().delete()
+        path = os.path.join(tempfile.mkdtemp(), 'dump.ndjson')
+
+        with open(path, 'w') as f:
+            f.write(dump)
+
+        out = StringIO()
+        call_command('import_ndjson', path, batch_size=1, stdout=out)
+
+        self.assertIn('6 row(s) imported', out.getvalue())
+        child = Reply.objects.get(pk=self.child.pk)
+        self.assertEqual(child.reply_id, self.reply.id)
+        self.assertEqual(child.root_thread_id, self.thread.id)
+        self.assertEqual(child.path, self.child.path)
+        thread = Thread.objects.get()
+        self.assertEqual(thread.upvote_count, 1)
+        self.assertEqual(thread.date_created, self.thread.date_created)
+        self.assertEqual(
+            {doc.reply_id for doc in search('reply')},
+            {self.reply.id, self.child.id}
+        )
+
+    def test_import_skips_existing_and_unresolved(self):
+        """Test that existing rows and rows referencing unknown users
+        are skipped"""
+        lines = self.dump().splitlines()
+        Thread.objects.all().delete()
+        self.admin.delete()
+
+        stats = import_records(lines)
+
+        self.assertEqual(stats['board'], {'imported': 0, 'skipped': 1})
+        self.assertEqual(stats['thread'], {'imported': 1, 'skipped': 0})
+        self.assertEqual(stats['reply'], {'imported': 1, 'skipped': 1})
+        self.assertEqual(stats['upvote'], {'imported': 0, 'skipped': 1})
+
+    def test_import_drops_replies_of_dropped_parents(self):
+        """Test that a reply to a reply skipped in the same batch is
+        skipped rather than inserted with a dangling parent"""
+        records = [json.loads(line) for line in self.dump().splitlines()]
+        Thread.objects.all().delete()
+        records[2]['root_thread'] = self.thread.id + 100
+
+        stats = import_records(json.dumps(record) for record in records)
+
+        self.assertEqual(stats['reply'], {'imported': 0, 'skipped': 2})
+        self.assertFalse(Reply.objects.exists())
+
+    def test_import_recomputes_counters(self):
+        """Test that thread counters are counted from imported rows"""
+        records = [json.loads(line) for line in self.dump().splitlines()]
+        Board.objects.all().delete()
+        records[1].update(reply_count=99, upvote_count=7, top_score=7)
+
+        import_records(json.dumps(record) for record in records)
+
+        thread = Thread.objects.get()
+        self.assertEqual(thread.reply_count, 2)
+        self.assertEqual(
+            (thread.upvote_count, thread.downvote_count), (1, 1)
+        )
+        self.assertEqual(thread.top_score, 0)
+
+    def test_import_invalidates_cached_payloads(self):
+        """Test that threads imported into are not served stale"""
+        url = reverse('6chan:thread-detail', args=[self.thread.id])
+        lines = self.dump().splitlines()
+        Reply.objects.all().delete()
+        get_response_cache().backend.clear()
+        self.assertEqual(self.client.get(url).data['reply_count'], 0)
+
+        import_records(lines)
+
+        self.assertEqual(self.client.get(url).data['reply_count'], 2)
+
+    def test_endpoints_admin_only(self):
+        """Test that dumps are only available to admins"""
+        self.client.force_authenticate(user=self.user)
+
+        self.assertEqual(
+            self.client.get(EXPORT_URL).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+
+    def test_export_import_endpoints(self):
+        """Test streaming a dump and uploading it back"""
+        self.client.force_authenticate(user=self.admin)
+
+        res = self.client.get(EXPORT_URL, {'board': self.board.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        dump = b''.join(res.streaming_content)
+        Board.objects.all().delete()
+
+        res = self.client.post(IMPORT_URL, {
+            'file': SimpleUploadedFile('dump.ndjson', dump)
+        }, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['reply']['imported'], 2)
+        self.assertEqual(Reply.objects.count(), 2)
+
+    def test_import_invalid_dump(self):
+        """Test that a malformed dump is rejected"""
+        self.client.force_authenticate(user=self.admin)
+
+        res = self.client.post(IMPORT_URL, {
+            'file': SimpleUploadedFile('dump.ndjson', b'{"model": "user"}')
+        }, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,74 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Thread, Reply
+from core.tests.test_models import create_user, create_board
+
+
+def replies_url(pk):
+
+    return reverse('6chan:thread-new-replies', args=[pk])
+
+
+class NewRepliesApiTests(TestCase):
+    """Test incremental polling of thread replies"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.board = create_board(user=self.user)
+        self.thread = Thread.objects.create(
+            user=self.user, board=self.board,
+            title='live thread', content='live content'
+        )
+
+    def create_reply(self, **params):
+
+        return Reply.objects.create(user=self.user, text='live', **params)
+
+    def test_replies_after_cursor(self):
+        """Test that only replies newer than the cursor are returned"""
+        first = self.create_reply(thread=self.thread)
+        second = self.create_reply(thread=self.thread)
+        nested = self.create_reply(reply=first)
+
+        res = self.client.get(
+            replies_url(self.thread.id), {'after': first.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [reply['id'] for reply in res.data['results']]
+        self.assertEqual(ids, [second.id, nested.id])
+        self.assertEqual(res.data['high_water_mark'], nested.id)
+        self.assertFalse(res.data['has_more'])
+
+    def test_no_new_replies(self):
+        """Test that the cursor is kept when nothing is new"""
+        reply = self.create_reply(thread=self.thread)
+
+        res = self.client.get(
+            replies_url(self.thread.id), {'after': reply.id}
+        )
+
+        self.assertEqual(res.data['results'], [])
+        self.assertEqual(res.data['high_water_mark'], reply.id)
+
+    def test_replies_limit(self):
+        """Test that the delta is limited and flagged"""
+        first = self.create_reply(thread=self.thread)
+        self.create_reply(thread=self.thread)
+
+        res = self.client.get(replies_url(self.thread.id), {'limit': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['high_water_mark'], first.id)
+        self.assertTrue(res.data['has_more'])
+
+    def test_replies_missing_thread(self):
+        """Test polling a missing thread returns 404"""
+        res = self.client.get(replies_url(self.thread.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,155 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient
+
+from chan.profiling import get_profile_registry
+from chan.tests.budgets import QueryBudgetMixin
+from core.models import Board, Thread, Reply
+from core.tests.test_models import create_user, create_board
+
+
+BOARDS_URL = reverse('6chan:board-list')
+THREAD_URL = reverse('6chan:thread-list')
+REPLY_URL = reverse('6chan:reply-list')
+PROFILING_URL = reverse('6chan:profiling')
+
+
+def thread_url(thread_id, action=''):
+    return reverse('6chan:thread-detail', args=[thread_id]) + action
+
+
+class ProfilingSetupTests(TestCase):
+    """Test serializers are only instrumented while profiling"""
+
+    def test_serializers_restored_when_disabled(self):
+        """Test the serializer timing is removed with the setting"""
+        data = BaseSerializer.data
+
+        with override_settings(CHAN_PROFILING={'ENABLED': True}):
+            get_profile_registry()
+
+            self.assertIsNot(BaseSerializer.data, data)
+
+        self.assertIs(BaseSerializer.data, data)
+        self.assertIsNone(get_profile_registry())
+
+
+@override_settings(CHAN_PROFILING={'ENABLED': True})
+class ProfilingTests(QueryBudgetMixin, TestCase):
+    """Test request profiling and per-endpoint query budgets"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.admin = create_user(is_admin=True)
+        self.board = create_board(user=self.user)
+
+        for i in range(3):
+            Board.objects.create(user=self.user, name=f'b{i}', code=f'c{i}')
+
+        self.threads = [
+            Thread.objects.create(
+                user=self.user, board=self.board,
+                title=f'thread {i}', content='content'
+            )
+            for i in range(5)
+        ]
+
+        for thread in self.threads:
+            reply = Reply.objects.create(
+                user=self.user, thread=thread, text='reply'
+            )
+            Reply.objects.create(user=self.user, reply=reply, text='nested')
+
+        get_profile_registry().clear()
+
+    def test_read_endpoints_within_budget(self):
+        """Test that listings and details stay within their budgets
+        whatever the number of rows"""
+        thread = self.threads[0]
+        reply = Reply.objects.first()
+
+        for url in [
+            BOARDS_URL, THREAD_URL, thread_url(thread.id),
+            thread_url(thread.id, 'tree/'), thread_url(thread.id, 'replies/'),
+            REPLY_URL, reverse('6chan:reply-detail', args=[reply.id]),
+        ]:
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertWithinQueryBudget(res)
+
+    def test_write_endpoints_within_budget(self):
+        """Test that posting and voting stay within their budgets"""
+        thread = self.threads[0]
+        self.client.force_authenticate(user=self.user)
+
+        responses = [
+            self.client.post(THREAD_URL, {
+                'title': 'new', 'content': 'content', 'board': self.board.id
+            }),
+            self.client.post(REPLY_URL, {'text': 'new', 'thread': thread.id}),
+            self.client.post(
+                thread_url(thread.id, 'upvote-thread/'), {'thread': thread.id}
+            ),
+            self.client.post(
+                thread_url(thread.id, 'downvote-thread/'),
+                {'thread': thread.id}
+            ),
+            self.client.patch(thread_url(thread.id), {'title': 'edited'}),
+        ]
+
+        for res in responses:
+            self.assertLess(res.status_code, 400)
+            self.assertWithinQueryBudget(res)
+
+    def test_budget_exceeded(self):
+        """Test that the helper fails requests over their budget"""
+        res = self.client.get(BOARDS_URL)
+        res.profile.budget = res.profile.queries - 1
+
+        with self.assertRaises(AssertionError):
+            self.assertWithinQueryBudget(res)
+
+    def test_profiling_stats(self):
+        """Test that histograms are kept per view and action"""
+        self.client.get(BOARDS_URL)
+        self.client.get(BOARDS_URL)
+        self.client.force_authenticate(user=self.admin)
+
+        res = self.client.get(PROFILING_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        endpoint = res.data['endpoints']['BoardViewSet.list']
+        self.assertEqual(endpoint['queries']['count'], 2)
+        self.assertEqual(endpoint['queries']['buckets']['+Inf'], 2)
+        self.assertEqual(endpoint['over_budget'], 0)
+        self.assertGreater(endpoint['duration_seconds']['sum'], 0)
+        self.assertGreater(endpoint['serializer_seconds']['sum'], 0)
+
+    def test_profiling_stats_prometheus(self):
+        """Test exposing histograms in the Prometheus text format"""
+        self.client.get(BOARDS_URL)
+        self.client.force_authenticate(user=self.admin)
+
+        res = self.client.get(PROFILING_URL, {'format': 'prometheus'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        text = res.content.decode()
+        self.assertIn('# TYPE chan_request_queries histogram', text)
+        self.assertIn(
+            'chan_request_queries_count'
+            '{view="BoardViewSet",action="list"} 1', text
+        )
+
+    def test_profiling_stats_admin_only(self):
+        """Test that profiles are only available to admins"""
+        self.client.force_authenticate(user=self.user)
+
+        res = self.client.get(PROFILING_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,248 @@
+import asyncio
+import json
+
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+from chan.broker import Broker, LocalBackend, RedisBackend
+from chan.realtime import StreamRouter, parse_channels
+
+
+def run(coroutine):
+
+    return asyncio.run(coroutine)
+
+
+class FakeClient:
+    """ASGI client feeding messages to the application and
+    recording what it sends back"""
+
+    def __init__(self, messages):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.on_send = None
+
+        for message in messages:
+            self.incoming.put_nowait(message)
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        self.sent.append(message)
+
+        if self.on_send is not None:
+            self.on_send(message)
+
+
+class FakePubSub:
+    """Redis pub/sub failing to subscribe or yielding messages"""
+
+    def __init__(self, failure=None, messages=()):
+        self.failure = failure
+        self.messages = messages
+
+    def psubscribe(self, pattern):
+        if self.failure is not None:
+            raise self.failure
+
+    def listen(self):
+        return iter(self.messages)
+
+    def close(self):
+        pass
+
+
+class StopListening(Exception):
+    pass
+
+
+class BrokerTests(SimpleTestCase):
+    """Test in-process event broker"""
+
+    def test_fan_out(self):
+        """Test that events reach every subscriber of a channel"""
+        async def scenario():
+            broker = Broker(LocalBackend())
+            first = broker.subscribe(['thread:1'])
+            second = broker.subscribe(['thread:1', 'board:1'])
+            other = broker.subscribe(['thread:2'])
+
+            broker.publish('thread:1', {'type': 'reply.created'})
+            await asyncio.sleep(0)
+
+            return first.queue.qsize(), second.queue.qsize(), \
+                other.queue.qsize()
+
+        self.assertEqual(run(scenario()), (1, 1, 0))
+
+    def test_slow_subscriber_overflow(self):
+        """Test that a full queue drops the oldest events and
+        reports the overflow"""
+        async def scenario():
+            broker = Broker(LocalBackend(), max_queue_size=2)
+            subscription = broker.subscribe(['thread:1'])
+
+            for i in range(3):
+                broker.publish('thread:1', {'type': 'reply.created', 'n': i})
+            await asyncio.sleep(0)
+
+            return [await subscription.get() for _ in range(3)]
+
+        events = run(scenario())
+
+        self.assertEqual(events[0], {'type': 'overflow', 'dropped': 1})
+        self.assertEqual([event['n'] for event in events[1:]], [1, 2])
+
+    def test_interrupt_reported(self):
+        """Test that subscribers are told when events were lost"""
+        async def scenario():
+            broker = Broker(LocalBackend())
+            subscription = broker.subscribe(['thread:1'])
+
+            broker._interrupt()
+            await asyncio.sleep(0)
+
+            return await subscription.get()
+
+        self.assertEqual(run(scenario()), {
+            'type': 'overflow', 'dropped': 0, 'interrupted': True
+        })
+
+    @patch('chan.broker.time.sleep', side_effect=[None, None, StopListening])
+    def test_redis_reconnect(self, mock_sleep):
+        """Test that a lost Redis connection is logged and opened
+        again with a growing delay"""
+        client = Mock()
+        client.pubsub.side_effect = [
+            FakePubSub(failure=ConnectionError('refused')),
+            FakePubSub(failure=ConnectionError('refused')),
+            FakePubSub(messages=[{
+                'channel': b'6chan:thread:1',
+                'data': json.dumps({'type': 'reply.created'}),
+            }]),
+        ]
+        redis = SimpleNamespace(
+            Redis=SimpleNamespace(from_url=lambda url: client)
+        )
+        deliver, interrupt = Mock(), Mock()
+
+        with patch.dict('sys.modules', {'redis': redis}):
+            backend = RedisBackend()
+
+        with self.assertLogs('chan.broker', 'ERROR'):
+            with self.assertRaises(StopListening):
+                backend.listen(deliver, interrupt)
+
+        deliver.assert_called_once_with(
+            'thread:1', {'type': 'reply.created'}
+        )
+        self.assertEqual(interrupt.call_count, 3)
+        self.assertEqual(
+            [call.args[0] for call in mock_sleep.call_args_list], [1, 2, 1]
+        )
+
+    def test_unsubscribe(self):
+        """Test that closed subscriptions are removed"""
+        async def scenario():
+            broker = Broker(LocalBackend())
+            subscription = broker.subscribe(['thread:1'])
+            subscription.close()
+
+            return broker.stats()
+
+        self.assertEqual(run(scenario()), {})
+
+    def test_parse_channels(self):
+        """Test parsing subscribed channels from the query string"""
+        channels = parse_channels(b'thread=1,2,x&board=3&thread=1', 10)
+
+        self.assertEqual(channels, ['thread:1', 'thread:2', 'board:3'])
+
+
+class StreamRouterTests(SimpleTestCase):
+    """Test ASGI event stream"""
+
+    def setUp(self):
+        self.django_app = None
+        self.broker = None
+
+        async def django_app(scope, receive, send):
+            self.django_app = scope['path']
+
+        self.router = StreamRouter(django_app)
+
+    def stream(self, scope_type, query_string, messages):
+        """Run the router, publish one event once the stream is open
+        and disconnect after it is sent"""
+        async def scenario():
+            self.broker = Broker(LocalBackend())
+            client = FakeClient(messages)
+            disconnect = {
+                'http': 'http.disconnect',
+                'websocket': 'websocket.disconnect',
+            }[scope_type]
+
+            def on_send(message):
+                if message['type'] in (
+                    'http.response.start', 'websocket.accept'
+                ):
+                    self.broker.publish(
+                        'thread:1', {'type': 'reply.created', 'reply': 1}
+                    )
+                elif message.get('more_body') or (
+                    message['type'] == 'websocket.send'
+                ):
+                    client.incoming.put_nowait({'type': disconnect})
+
+            client.on_send = on_send
+            scope = {
+                'type': scope_type,
+                'path': '/api/6chan/stream/',
+                'query_string': query_string,
+            }
+
+            with patch('chan.realtime.get_broker', return_value=self.broker):
+                await asyncio.wait_for(
+                    self.router(scope, client.receive, client.send), 5
+                )
+
+            return client.sent
+
+        return run(scenario())
+
+    def test_sse_stream(self):
+        """Test streaming events as server-sent events"""
+        sent = self.stream('http', b'thread=1', [])
+
+        self.assertEqual(sent[0]['status'], 200)
+        body = sent[1]['body'].decode()
+        self.assertTrue(body.startswith('event: reply.created\n'))
+        data = json.loads(body.split('data: ')[1])
+        self.assertEqual(data['channel'], 'thread:1')
+        self.assertEqual(self.broker.stats(), {})
+
+    def test_sse_stream_without_channels(self):
+        """Test that a stream without channels is rejected"""
+        sent = self.stream('http', b'', [])
+
+        self.assertEqual(sent[0]['status'], 400)
+
+    def test_websocket_stream(self):
+        """Test streaming events over a WebSocket"""
+        sent = self.stream(
+            'websocket', b'thread=1', [{'type': 'websocket.connect'}]
+        )
+
+        self.assertEqual(sent[0]['type'], 'websocket.accept')
+        self.assertEqual(json.loads(sent[1]['text'])['reply'], 1)
+
+    def test_other_paths_served_by_django(self):
+        """Test that other requests are handled by Django"""
+        scope = {'type': 'http', 'path': '/api/6chan/thread/'}
+
+        run(self.router(scope, None, None))
+
+        self.assertEqual(self.django_app, '/api/6chan/thread/')
@@ -210,6 +210,29 @@ class PrivateReplyApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(reply.text, payload['text'])
 
+    def test_update_reply_cannot_move(self):
+        """Test that an edited reply keeps its place in the tree"""
+        reply = create_reply(user=self.user, thread=self.thread)
+        other = Thread.objects.create(
+            user=self.user, board=self.thread.board,
+            title='other thread', content='other content'
+        )
+
+        res = self.client.patch(
+            detail_reply_url(reply.id), {'thread': other.id}
+        )
+        reply.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(reply.thread_id, self.thread.id)
+
+        res = self.client.patch(
+            detail_reply_url(reply.id),
+            {'thread': self.thread.id, 'text': 'same place'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_update_other_user_reply(self):
         """Test that updating an other user reply is
         forbidden"""
@@ -0,0 +1,133 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Thread, Reply, MAX_REPLY_DEPTH
+from core.tests.test_models import create_user, create_board
+
+from chan.views import ManageThreadViewSet
+
+
+def tree_url(pk):
+
+    return reverse('6chan:thread-reply-tree', args=[pk])
+
+
+def create_reply(user, **params):
+
+    return Reply.objects.create(user=user, text='tree reply', **params)
+
+
+class ReplyTreeApiTests(TestCase):
+    """Test nested reply tree API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.board = create_board(user=self.user)
+        self.thread = Thread.objects.create(
+            user=self.user, board=self.board,
+            title='tree thread', content='tree content'
+        )
+
+    def test_reply_tree(self):
+        """Test retrieving nested replies of a thread"""
+        first = create_reply(self.user, thread=self.thread)
+        child = create_reply(self.user, reply=first)
+        grandchild = create_reply(self.user, reply=child)
+        second = create_reply(self.user, thread=self.thread)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(tree_url(self.thread.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tree = res.data['replies']
+        self.assertEqual([node['id'] for node in tree], [first.id, second.id])
+        self.assertEqual(tree[0]['replies'][0]['id'], child.id)
+        self.assertEqual(
+            tree[0]['replies'][0]['replies'][0]['id'], grandchild.id
+        )
+        self.assertEqual(tree[1]['replies'], [])
+        self.assertIsNone(res.data['next_after'])
+
+    def test_reply_tree_depth_limit(self):
+        """Test that replies deeper than depth are not returned"""
+        first = create_reply(self.user, thread=self.thread)
+        child = create_reply(self.user, reply=first)
+        create_reply(self.user, reply=child)
+
+        res = self.client.get(tree_url(self.thread.id), {'depth': 1})
+
+        child_node = res.data['replies'][0]['replies'][0]
+        self.assertEqual(child_node['id'], child.id)
+        self.assertEqual(child_node['replies'], [])
+
+    def test_reply_tree_pagination(self):
+        """Test paginating top level replies of the tree"""
+        first = create_reply(self.user, thread=self.thread)
+        child = create_reply(self.user, reply=first)
+        second = create_reply(self.user, thread=self.thread)
+        url = tree_url(self.thread.id)
+
+        res = self.client.get(url, {'page_size': 1})
+
+        self.assertEqual(res.data['next_after'], child.id)
+        self.assertEqual(res.data['replies'][0]['replies'][0]['id'], child.id)
+        self.assertEqual(len(res.data['replies']), 1)
+
+        res = self.client.get(url, {'page_size': 1, 'after': child.id})
+
+        self.assertEqual(res.data['replies'][0]['id'], second.id)
+        self.assertIsNone(res.data['next_after'])
+
+    def test_reply_tree_resumes_truncated_subtree(self):
+        """Test that a page cut by the node limit resumes inside
+        the subtree it was cut in"""
+        first = create_reply(self.user, thread=self.thread)
+        children = [create_reply(self.user, reply=first) for _ in range(3)]
+        second = create_reply(self.user, thread=self.thread)
+        url = tree_url(self.thread.id)
+        ids = []
+        params = {}
+
+        with patch.object(ManageThreadViewSet, 'tree_max_nodes', 2):
+            while True:
+                res = self.client.get(url, params)
+                nodes = list(res.data['replies'])
+
+                while nodes:
+                    node = nodes.pop(0)
+                    ids.append(node['id'])
+                    nodes[:0] = node['replies']
+
+                if res.data['next_after'] is None:
+                    break
+
+                params = {'after': res.data['next_after']}
+
+        self.assertEqual(
+            ids, [first.id, *(child.id for child in children), second.id]
+        )
+
+    def test_reply_nesting_limited(self):
+        """Test that a reply deeper than its path holds is rejected"""
+        parent = create_reply(self.user, thread=self.thread)
+        Reply.objects.filter(pk=parent.pk).update(depth=MAX_REPLY_DEPTH)
+        self.client.force_authenticate(user=self.user)
+
+        res = self.client.post(
+            reverse('6chan:reply-list'), {'text': 'deep', 'reply': parent.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('reply', res.data)
+
+    def test_reply_tree_invalid_param(self):
+        """Test that a non integer param is rejected"""
+        res = self.client.get(tree_url(self.thread.id), {'depth': 'deep'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
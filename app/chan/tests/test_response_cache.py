@@ -0,0 +1,152 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Thread, Reply, Upvote
+from core.tests.test_models import create_user, create_board
+
+from chan.cache import (
+    DjangoCacheBackend, LocMemLRUBackend, ResponseCache, get_response_cache
+)
+
+
+def detail_url(pk):
+
+    return reverse('6chan:thread-detail', args=[pk])
+
+
+class LocMemLRUBackendTests(TestCase):
+    """Test process local LRU cache backend"""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        backend = LocMemLRUBackend(max_entries=2)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+
+        backend.set('c', 3)
+
+        self.assertEqual(backend.get('a'), 1)
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('c'), 3)
+
+    @patch('chan.cache.time.monotonic')
+    def test_ttl_expiry(self, mock_monotonic):
+        """Test that an entry expires after its timeout"""
+        backend = LocMemLRUBackend()
+        mock_monotonic.return_value = 100
+        backend.set('a', 1, timeout=10)
+
+        mock_monotonic.return_value = 111
+
+        self.assertIsNone(backend.get('a'))
+
+    def test_invalidate_changes_version(self):
+        """Test that invalidating an object hides its payloads"""
+        cache = ResponseCache(LocMemLRUBackend())
+        version, _ = cache.get('thread', 1)
+        cache.set('thread', 1, version, {'id': 1})
+
+        cache.invalidate('thread', 1)
+        _, data = cache.get('thread', 1)
+
+        self.assertIsNone(data)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_shared_backend_invalidation(self):
+        """Test that an invalidation through one worker's cache hides
+        the payload from another worker sharing the backend"""
+        worker, other_worker = (
+            ResponseCache(DjangoCacheBackend()) for _ in range(2)
+        )
+        version, _ = worker.get('thread', 1)
+        worker.set('thread', 1, version, {'id': 1})
+
+        self.assertEqual(other_worker.get('thread', 1)[1], {'id': 1})
+
+        worker.invalidate('thread', 1)
+
+        self.assertIsNone(other_worker.get('thread', 1)[1])
+
+    def test_default_backend_shared(self):
+        """Test that the response cache uses a CACHES alias"""
+        self.assertIsInstance(
+            get_response_cache().backend, DjangoCacheBackend
+        )
+
+
+class ResponseCacheApiTests(TestCase):
+    """Test caching of thread payloads"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.admin = create_user(is_admin=True)
+        self.board = create_board(user=self.admin)
+        self.thread = Thread.objects.create(
+            user=self.user, board=self.board,
+            title='cached thread', content='cached content'
+        )
+        get_response_cache().backend.clear()
+
+    def test_retrieve_served_from_cache(self):
+        """Test that a cached thread is served without queries"""
+        url = detail_url(self.thread.id)
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], self.thread.title)
+
+    def test_reply_invalidates_thread(self):
+        """Test that replying to a thread invalidates its payload"""
+        url = detail_url(self.thread.id)
+        self.client.get(url)
+
+        Reply.objects.create(user=self.user, text='hi', thread=self.thread)
+        res = self.client.get(url)
+
+        self.assertEqual(res.data['reply_count'], 1)
+
+    def test_vote_invalidates_thread(self):
+        """Test that voting a thread invalidates its payload"""
+        url = detail_url(self.thread.id)
+        self.client.get(url)
+
+        Upvote.objects.create(user=self.user, thread=self.thread)
+        res = self.client.get(url)
+
+        self.assertEqual(res.data['upvotes'], 1)
+
+    def test_expand_cached_separately(self):
+        """Test that expanded payloads are cached apart"""
+        url = detail_url(self.thread.id)
+        self.client.get(url)
+
+        res = self.client.get(url, {'expand': 'upvote_thread'})
+
+        self.assertEqual(res.data['upvote_thread'], [])
+
+    def test_missing_thread_not_cached(self):
+        """Test that retrieving a missing thread returns 404"""
+        res = self.client.get(detail_url(self.thread.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_stats(self):
+        """Test retrieving response cache counters as admin"""
+        self.client.get(detail_url(self.thread.id))
+        self.client.force_authenticate(user=self.admin)
+
+        res = self.client.get(reverse('6chan:response-cache'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['enabled'])
+        self.assertIn('hit_ratio', res.data)
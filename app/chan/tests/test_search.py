@@ -0,0 +1,139 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Board, Thread, Reply, SearchDocument
+from core.tests.test_models import create_user, create_board
+
+
+SEARCH_URL = reverse('6chan:search')
+
+
+class SearchApiTests(TestCase):
+    """Test full-text search over threads and replies"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.board = create_board(user=self.user)
+        self.other_board = Board.objects.create(
+            user=self.user, name='Other board', code='o'
+        )
+        self.thread = Thread.objects.create(
+            user=self.user, board=self.board,
+            title='Vintage synthesizers', content='Analog sound thread'
+        )
+        self.other_thread = Thread.objects.create(
+            user=self.user, board=self.other_board,
+            title='Cooking', content='Which synthesizers do chefs use?'
+        )
+        self.reply = Reply.objects.create(
+            user=self.user, thread=self.thread,
+            text='My first synthesizers were analog too'
+        )
+
+    def search(self, **params):
+
+        return self.client.get(SEARCH_URL, params)
+
+    def test_search_ranked(self):
+        """Test that title matches are ranked first"""
+        res = self.search(q='synthesizers')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['type'], 'thread')
+        self.assertEqual(results[0]['id'], self.thread.id)
+        ranks = [result['rank'] for result in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_search_all_terms(self):
+        """Test that every query term must match"""
+        res = self.search(q='analog synthesizers')
+
+        ids = {(r['type'], r['id']) for r in res.data['results']}
+        self.assertEqual(
+            ids, {('thread', self.thread.id), ('reply', self.reply.id)}
+        )
+
+    def test_search_by_board_and_type(self):
+        """Test filtering results by board and type"""
+        res = self.search(q='synthesizers', board=self.other_board.id)
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [self.other_thread.id]
+        )
+
+        res = self.search(q='synthesizers', type='reply')
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['thread'], self.thread.id)
+
+    def test_search_paginated(self):
+        """Test that results are cursor paginated"""
+        res = self.search(q='synthesizers', page_size=2)
+
+        self.assertEqual(len(res.data['results']), 2)
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIsNone(res.data['next'])
+
+    def test_search_tied_ranks_paginated(self):
+        """Test that results sharing a rank are each listed once"""
+        for i in range(7):
+            Thread.objects.create(
+                user=self.user, board=self.board,
+                title='Drum machines', content='drum machines'
+            )
+
+        ids = []
+        url = f'{SEARCH_URL}?q=drum&page_size=2'
+
+        while url:
+            res = self.client.get(url)
+            ids.extend(result['id'] for result in res.data['results'])
+            url = res.data['next']
+
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(len(set(ids)), 7)
+
+        res = self.client.get(res.data['previous'])
+
+        self.assertEqual(
+            [result['id'] for result in res.data['results']], ids[4:6]
+        )
+
+    def test_search_index_updated(self):
+        """Test that edited and deleted posts are reindexed"""
+        self.reply.text = 'Now about drum machines'
+        self.reply.save()
+        self.other_thread.delete()
+
+        res = self.search(q='synthesizers')
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [self.thread.id]
+        )
+        self.assertEqual(len(self.search(q='drum').data['results']), 1)
+
+    def test_search_requires_query(self):
+        """Test that a query is required"""
+        res = self.search(q=' ')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_search_index(self):
+        """Test rebuilding the index of existing rows"""
+        SearchDocument.objects.all().delete()
+
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(SearchDocument.objects.count(), 3)
+        self.assertEqual(len(self.search(q='analog').data['results']), 2)
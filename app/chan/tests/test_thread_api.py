@@ -1,11 +1,10 @@
+import hashlib
 import os
 import shutil
 import tempfile
 
 from PIL import Image
 
-from unittest.mock import patch
-
 from django.test import TestCase
 from django.urls import reverse
 from django.conf import settings
@@ -13,7 +12,7 @@ from django.conf import settings
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Thread, Upvote, Downvote
+from core.models import Thread, Upvote, Downvote, Reply
 from core.tests.test_models import (
     create_user, create_board
 )
@@ -83,10 +82,90 @@ class PublicThreadApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         threads = Thread.objects.all().order_by(
-            '-reply_to_thread__date_created'
+            '-last_bumped_at', '-id'
         )
         serializer = ThreadSerializer(threads, many=True)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_thread_list_ordered_by_bump(self):
+        """Test that threads list is ordered by the latest reply
+        without duplicate threads"""
+        user = create_user()
+        admin = create_user(is_admin=True)
+        board = create_board(user=admin)
+        thread1 = create_thread(user=user, board=board)
+        thread2 = create_thread(user=user, board=board)
+        Reply.objects.create(user=user, text='bump', thread=thread1)
+        Reply.objects.create(user=user, text='bump', thread=thread1)
+
+        res = self.client.get(THREAD_URL)
+
+        ids = [thread['id'] for thread in res.data['results']]
+        self.assertEqual(ids, [thread1.id, thread2.id])
+
+    def test_thread_list_cursor_pagination(self):
+        """Test that threads list is paginated with a cursor
+        keeping the board filter"""
+        user = create_user()
+        admin = create_user(is_admin=True)
+        board = create_board(user=admin)
+        other_board = create_board(user=admin, name='other', code='ot')
+        threads = [
+            create_thread(user=user, board=board) for _ in range(3)
+        ]
+        create_thread(user=user, board=other_board)
+
+        res = self.client.get(
+            THREAD_URL, {'board': board.id, 'page_size': 2}
+        )
+        first_page = [thread['id'] for thread in res.data['results']]
+        res = self.client.get(res.data['next'])
+        second_page = [thread['id'] for thread in res.data['results']]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            first_page + second_page,
+            [thread.id for thread in reversed(threads)]
+        )
+        self.assertIsNone(res.data['next'])
+
+    def test_thread_list_vote_counts(self):
+        """Test that threads list returns vote and reply counts
+        without related id lists"""
+        user = create_user()
+        admin = create_user(is_admin=True)
+        board = create_board(user=admin)
+        thread = create_thread(user=user, board=board)
+        Upvote.objects.create(user=user, thread=thread)
+        Upvote.objects.create(user=admin, thread=thread)
+        Downvote.objects.create(user=user, thread=thread)
+        Reply.objects.create(user=user, text='reply', thread=thread)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(THREAD_URL)
+
+        data = res.data['results'][0]
+        self.assertEqual(data['upvotes'], 2)
+        self.assertEqual(data['downvotes'], 1)
+        self.assertEqual(data['score'], 1)
+        self.assertEqual(data['reply_count'], 1)
+        self.assertNotIn('upvote_thread', data)
+        self.assertNotIn('reply_to_thread', data)
+
+    def test_thread_list_expand_ids(self):
+        """Test that related id lists are returned when
+        requested with expand"""
+        user = create_user()
+        admin = create_user(is_admin=True)
+        board = create_board(user=admin)
+        thread = create_thread(user=user, board=board)
+        vote = Upvote.objects.create(user=user, thread=thread)
+
+        res = self.client.get(THREAD_URL, {'expand': 'upvote_thread'})
+
+        data = res.data['results'][0]
+        self.assertEqual(data['upvote_thread'], [vote.id])
+        self.assertNotIn('downvote_thread', data)
 
     def test_create_thread_not_allowed(self):
         """Test create a new thread with anonymous user
@@ -114,7 +193,7 @@ class PrivateThreadApiTests(TestCase):
         self.board = create_board(user=self.admin)
 
     def tearDown(self):
-        directory = 'uploads/thread/'
+        directory = 'uploads/blobs/'
         path = os.path.join(settings.MEDIA_ROOT, directory)
 
         shutil.rmtree(path, ignore_errors=True)
@@ -134,23 +213,20 @@ class PrivateThreadApiTests(TestCase):
         ).exists()
         self.assertTrue(is_exists)
 
-    @patch('uuid.uuid4')
-    def test_create_thread_with_image(self, mock_uuid):
+    def test_create_thread_with_image(self):
         """Test creating a new thread with image"""
         with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
-            uuid = 'test_uuid'
-            mock_uuid.return_value = uuid
-
             image = Image.new('RGB', (100, 100))
             image.save(ntf, format='JPEG')
             ntf.seek(0)
+            digest = hashlib.sha256(ntf.read()).hexdigest()
+            ntf.seek(0)
 
             payload = create_payload(image=ntf, board=self.board.id)
 
             res = self.client.post(THREAD_URL, payload)
-            file_path = os.path.join(
-                '/app/' + settings.MEDIA_ROOT,
-                f'uploads/thread/{uuid}.jpg'
+            filename = os.path.join(
+                'uploads/blobs', digest[:2], digest[2:4], f'{digest}.jpg'
             )
 
             self.assertEqual(res.status_code, status.HTTP_201_CREATED)
@@ -159,7 +235,7 @@ class PrivateThreadApiTests(TestCase):
                 title=payload['title'],
                 content=payload['content']
             )
-            self.assertEqual(thread.image.path, file_path)
+            self.assertEqual(thread.image.name, filename)
 
     def test_retrieve_thread(self):
         """Test retrieving a thread"""
@@ -351,3 +427,24 @@ class PrivateThreadApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(thread.upvote_thread.count(), 0)
         self.assertEqual(thread.downvote_thread.count(), 1)
+
+    def test_vote_queries_independent_of_popularity(self):
+        """Test that voting does not load the other votes
+        of the thread"""
+        thread = create_thread(
+            user=self.user, board=self.board
+        )
+        for i in range(5):
+            voter = create_user(
+                username=f'voter{i}', email=f'voter{i}@gmail.com'
+            )
+            Upvote.objects.create(user=voter, thread=thread)
+        url = vote_url('upvote', thread.id)
+        payload = {'thread': thread.id}
+
+        with self.assertNumQueries(10):
+            res = self.client.post(url, payload)
+        thread.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(thread.upvote_count, 6)
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Thread, Reply, Upvote, Downvote
+from core.ranking import hot_score, recompute_recent_scores
+from core.tests.test_models import create_user, create_board
+
+
+THREAD_URL = reverse('6chan:thread-list')
+
+
+class ThreadRankingTests(TestCase):
+    """Test hot/top sorting of the thread listing"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.other_user = create_user(
+            email='other@gmail.com', username='other'
+        )
+        self.board = create_board(user=self.user)
+        self.quiet, self.voted, self.busy = [
+            Thread.objects.create(
+                user=self.user, board=self.board,
+                title=f'thread {i}', content='content'
+            )
+            for i in range(3)
+        ]
+        Upvote.objects.create(user=self.user, thread=self.voted)
+        Upvote.objects.create(user=self.other_user, thread=self.voted)
+        Downvote.objects.create(user=self.user, thread=self.busy)
+
+        for _ in range(30):
+            Reply.objects.create(
+                user=self.user, text='reply', thread=self.busy
+            )
+
+    def sorted_ids(self, sort):
+        res = self.client.get(THREAD_URL, {'sort': sort})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [thread['id'] for thread in res.data['results']]
+
+    def test_sort_top(self):
+        """Test sorting threads by vote score"""
+        call_command('recompute_thread_scores', stdout=StringIO())
+
+        self.assertEqual(
+            self.sorted_ids('top'),
+            [self.voted.id, self.quiet.id, self.busy.id]
+        )
+
+    def test_rescored_page_modified(self):
+        """Test that recomputed scores change the validators of the
+        sorted listing, even if the order stays the same"""
+        call_command('recompute_thread_scores', stdout=StringIO())
+
+        for score, sort in enumerate(['top', 'hot'], 10 ** 6):
+            params = {'sort': sort, 'page_size': 2}
+            etag = self.client.get(THREAD_URL, params)['ETag']
+            Thread.objects.filter(pk=self.voted.pk).update(
+                top_score=score, hot_score=score
+            )
+            res = self.client.get(
+                THREAD_URL, params, HTTP_IF_NONE_MATCH=etag
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_sort_hot(self):
+        """Test that reply velocity counts towards the hot score"""
+        call_command('recompute_thread_scores', stdout=StringIO())
+
+        with self.assertNumQueries(1):
+            ids = self.sorted_ids('hot')
+
+        self.assertEqual(ids, [self.busy.id, self.voted.id, self.quiet.id])
+
+    def test_sort_new_and_bumped(self):
+        """Test sorting threads by creation and bump order"""
+        self.assertEqual(
+            self.sorted_ids('new'),
+            [self.busy.id, self.voted.id, self.quiet.id]
+        )
+        self.assertEqual(self.sorted_ids('bumped')[0], self.busy.id)
+
+    def test_tied_scores_paginated(self):
+        """Test that threads sharing a score are each listed once"""
+        Thread.objects.bulk_create([
+            Thread(
+                user=self.user, board=self.board,
+                title=f'tied {i}', content='content'
+            )
+            for i in range(120)
+        ])
+        expected = set(Thread.objects.values_list('id', flat=True))
+
+        for sort in ['top', 'hot']:
+            ids = []
+            pages = []
+            url = THREAD_URL + f'?sort={sort}&page_size=50'
+
+            while url:
+                res = self.client.get(url)
+                page = [thread['id'] for thread in res.data['results']]
+                ids.extend(page)
+                pages.append(page)
+                url = res.data['next']
+
+            self.assertEqual(len(ids), len(expected))
+            self.assertEqual(set(ids), expected)
+            self.assertEqual(len(pages), 3)
+
+            res = self.client.get(res.data['previous'])
+
+            self.assertEqual(
+                [thread['id'] for thread in res.data['results']], pages[1]
+            )
+
+    def test_invalid_sort(self):
+        """Test that an unknown sort is rejected"""
+        res = self.client.get(THREAD_URL, {'sort': 'random'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recompute_only_recent_threads(self):
+        """Test that idle threads are left out of the recompute"""
+        long_ago = timezone.now() - timedelta(days=7)
+        Thread.objects.filter(pk=self.quiet.pk).update(
+            last_bumped_at=long_ago, date_modified=long_ago
+        )
+
+        self.assertEqual(recompute_recent_scores(), 2)
+
+    def test_hot_score(self):
+        """Test that newer threads need more activity to be outranked"""
+        now = timezone.now()
+
+        self.assertGreater(hot_score(5, 0, now), hot_score(0, 0, now))
+        self.assertGreater(
+            hot_score(10, 0, now),
+            hot_score(0, 0, now + timedelta(hours=1))
+        )
+        self.assertGreater(hot_score(0, 10, now), hot_score(0, 0, now))
@@ -0,0 +1,232 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Thread, Reply
+from core.tests.test_models import create_user, create_board
+
+from chan.throttling import (
+    SlidingWindowCounter, get_counter, get_throttle_settings, parse_rate
+)
+
+
+THREAD_URL = reverse('6chan:thread-list')
+REPLY_URL = reverse('6chan:reply-list')
+SIGNUP_URL = reverse('user:signup')
+
+
+def vote_url(pk):
+    return reverse('6chan:thread-upvote-thread', args=[pk])
+
+
+# A cache shared between processes, as throttles refuse local ones
+THROTTLE_CACHES = dict(settings.CACHES, throttle={
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'chan-throttle-tests'),
+})
+
+
+def throttles(**actions):
+    return override_settings(CHAN_THROTTLES={
+        'ENABLED': True, 'CACHE': 'throttle', 'KEY_PREFIX': 'test-throttle:',
+        'ACTIONS': actions,
+    })
+
+
+@override_settings(CACHES=THROTTLE_CACHES)
+class SlidingWindowCounterTests(TestCase):
+    """Test sliding window counters over the shared cache"""
+
+    def setUp(self):
+        caches['throttle'].clear()
+        self.counter = SlidingWindowCounter('throttle')
+
+    def test_limit_within_window(self):
+        """Test requests past the limit wait for the window to end"""
+        for _ in range(3):
+            self.assertEqual(self.counter.hit('a', 3, 60, now=600), 0)
+
+        self.assertEqual(self.counter.hit('a', 3, 60, now=615), 45)
+        self.assertEqual(self.counter.hit('b', 3, 60, now=615), 0)
+
+    def test_previous_window_weighted(self):
+        """Test the previous window counts by its overlap"""
+        for _ in range(4):
+            self.counter.hit('a', 4, 60, now=610)
+
+        # Three quarters of the previous window still overlap
+        self.assertEqual(self.counter.hit('a', 4, 60, now=675), 0)
+        self.assertEqual(self.counter.hit('a', 4, 60, now=675), 45)
+        self.assertEqual(self.counter.hit('a', 4, 60, now=735), 0)
+
+    def test_cooldown(self):
+        """Test a started cooldown returns the seconds left"""
+        self.assertEqual(self.counter.check([], cooldown='a', now=100), 0)
+
+        self.counter.start_cooldown('a', 30, now=100)
+
+        self.assertEqual(self.counter.check([], cooldown='a', now=110), 20)
+
+    def test_check_takes_longest_wait(self):
+        """Test a check counts every rate and waits for the longest"""
+        hits = [('a', 1, 60), ('b', 1, 3600)]
+        self.assertEqual(self.counter.check(hits, now=600), 0)
+
+        self.assertEqual(self.counter.check(hits, now=630), 2970)
+
+    @override_settings(CHAN_THROTTLES={'CACHE': 'default'})
+    def test_local_cache_refused(self):
+        """Test counters are not kept in a process local cache"""
+        with self.assertRaises(ImproperlyConfigured):
+            get_counter(get_throttle_settings())
+
+    def test_parse_rate(self):
+        """Test rates are parsed as count and period"""
+        self.assertEqual(parse_rate('10/min'), (10, 60))
+        self.assertEqual(parse_rate('5/hour'), (5, 3600))
+
+        with self.assertRaises(ImproperlyConfigured):
+            parse_rate('often')
+
+
+@override_settings(CACHES=THROTTLE_CACHES)
+class ThrottleApiTests(TestCase):
+    """Test posting, voting and signing up are throttled"""
+
+    def setUp(self):
+        caches['throttle'].clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.board = create_board(self.user)
+        self.client.force_authenticate(self.user)
+
+    def post_thread(self, board=None):
+        return self.client.post(THREAD_URL, {
+            'title': 'flood', 'content': 'flood',
+            'board': (board or self.board).id,
+        })
+
+    @throttles(thread={'COOLDOWN': 30})
+    def test_thread_cooldown(self):
+        """Test a user waits between two threads"""
+        self.assertEqual(
+            self.post_thread().status_code, status.HTTP_201_CREATED
+        )
+
+        res = self.post_thread()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        self.assertEqual(Thread.objects.count(), 1)
+
+    @throttles(thread={'COOLDOWN': 30})
+    def test_invalid_post_no_cooldown(self):
+        """Test a rejected thread does not start the cooldown"""
+        res = self.client.post(THREAD_URL, {'board': self.board.id})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(
+            self.post_thread().status_code, status.HTTP_201_CREATED
+        )
+
+    @throttles(thread={'BOARD': '2/min'})
+    def test_board_rate_shared_by_users(self):
+        """Test the board rate holds across users"""
+        other_board = create_board(self.user, name='other', code='ot')
+
+        for number in range(2):
+            self.client.force_authenticate(create_user(
+                email=f'user{number}@gmail.com', username=f'user{number}'
+            ))
+            self.assertEqual(
+                self.post_thread().status_code, status.HTTP_201_CREATED
+            )
+
+        res = self.post_thread()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            self.post_thread(other_board).status_code,
+            status.HTTP_201_CREATED
+        )
+
+    @throttles(reply={'USER': '2/min', 'BOARD': '10/min'})
+    def test_reply_user_rate(self):
+        """Test replies past the user rate are rejected"""
+        thread = Thread.objects.create(
+            user=self.user, board=self.board, title='t', content='c'
+        )
+
+        for _ in range(2):
+            res = self.client.post(REPLY_URL, {
+                'text': 'flood', 'thread': thread.id
+            })
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(REPLY_URL, {
+            'text': 'flood', 'reply': Reply.objects.first().id
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(Reply.objects.count(), 2)
+
+    @throttles(vote={'IP': '1/min'})
+    def test_vote_ip_rate(self):
+        """Test votes from the same IP are limited across users"""
+        thread = Thread.objects.create(
+            user=self.user, board=self.board, title='t', content='c'
+        )
+
+        res = self.client.post(vote_url(thread.id), {'thread': thread.id})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(create_user(
+            email='other@gmail.com', username='other'
+        ))
+        res = self.client.post(vote_url(thread.id), {'thread': thread.id})
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @throttles(signup={'IP': '1/hour'})
+    def test_signup_ip_rate(self):
+        """Test sign ups from the same IP are limited"""
+        self.client.force_authenticate(None)
+
+        for number, expected in enumerate([
+            status.HTTP_201_CREATED, status.HTTP_429_TOO_MANY_REQUESTS
+        ]):
+            res = self.client.post(SIGNUP_URL, {
+                'email': f'new{number}@gmail.com',
+                'username': f'new{number}', 'password': 'testpass123',
+            })
+
+            self.assertEqual(res.status_code, expected)
+
+    @throttles(thread={'COOLDOWN': 30})
+    def test_staff_and_reads_not_throttled(self):
+        """Test staff members and listings are not throttled"""
+        self.client.force_authenticate(create_user(is_admin=True))
+
+        for _ in range(2):
+            self.assertEqual(
+                self.post_thread().status_code, status.HTTP_201_CREATED
+            )
+
+        for _ in range(2):
+            res = self.client.get(THREAD_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_disabled_by_default(self):
+        """Test nothing is throttled unless enabled"""
+        for _ in range(3):
+            self.assertEqual(
+                self.post_thread().status_code, status.HTTP_201_CREATED
+            )
@@ -0,0 +1,214 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Thread, Upvote, Downvote
+from core.tests.test_models import create_user, create_board
+
+from chan.vote_buffer import VoteBuffer
+
+
+VOTE_BUFFER_URL = reverse('6chan:vote-buffer')
+
+
+def create_thread(user, board):
+
+    return Thread.objects.create(
+        user=user, board=board,
+        title='buffered thread', content='buffered content'
+    )
+
+
+class VoteBufferTests(TestCase):
+    """Test write-behind vote buffer"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.admin = create_user(is_admin=True)
+        self.board = create_board(user=self.admin)
+        self.thread = create_thread(user=self.user, board=self.board)
+        self.buffer = VoteBuffer(flush_interval=0)
+
+    def test_votes_written_on_flush(self):
+        """Test that votes are only written when flushed"""
+        cast = self.buffer.toggle(self.user, self.thread, Upvote)
+        self.buffer.toggle(self.admin, self.thread, Downvote)
+
+        self.assertTrue(cast)
+        self.assertFalse(Upvote.objects.exists())
+
+        flushed = self.buffer.flush()
+        self.thread.refresh_from_db()
+
+        self.assertEqual(flushed, 2)
+        self.assertEqual(self.thread.upvote_count, 1)
+        self.assertEqual(self.thread.downvote_count, 1)
+
+    def test_toggles_coalesced(self):
+        """Test that toggling twice before flush writes nothing"""
+        self.buffer.toggle(self.user, self.thread, Upvote)
+        cast = self.buffer.toggle(self.user, self.thread, Upvote)
+
+        self.buffer.flush()
+
+        self.assertFalse(cast)
+        self.assertFalse(Upvote.objects.exists())
+
+    def test_switch_stored_vote(self):
+        """Test that switching an existing upvote to a downvote
+        replaces it on flush"""
+        Upvote.objects.create(user=self.user, thread=self.thread)
+
+        self.buffer.toggle(self.user, self.thread, Downvote)
+        self.buffer.flush()
+        self.thread.refresh_from_db()
+
+        self.assertFalse(Upvote.objects.exists())
+        self.assertTrue(Downvote.objects.filter(user=self.user).exists())
+        self.assertEqual(self.thread.upvote_count, 0)
+        self.assertEqual(self.thread.downvote_count, 1)
+
+    def test_withdraw_stored_vote(self):
+        """Test that toggling an existing vote deletes it on flush"""
+        Upvote.objects.create(user=self.user, thread=self.thread)
+
+        cast = self.buffer.toggle(self.user, self.thread, Upvote)
+        self.buffer.flush()
+        self.thread.refresh_from_db()
+
+        self.assertFalse(cast)
+        self.assertFalse(Upvote.objects.exists())
+        self.assertEqual(self.thread.upvote_count, 0)
+
+    def test_flush_when_batch_full(self):
+        """Test that the buffer flushes once max batch size
+        is reached"""
+        vote_buffer = VoteBuffer(flush_interval=0, max_batch_size=2)
+
+        vote_buffer.toggle(self.user, self.thread, Upvote)
+        vote_buffer.toggle(self.admin, self.thread, Upvote)
+
+        self.assertEqual(Upvote.objects.count(), 2)
+        self.assertEqual(vote_buffer.stats()['last_batch_size'], 2)
+
+    def test_close_drains_buffer(self):
+        """Test that closing the buffer writes pending votes"""
+        self.buffer.toggle(self.user, self.thread, Upvote)
+
+        self.buffer.close()
+
+        self.assertEqual(Upvote.objects.count(), 1)
+        self.assertEqual(self.buffer.stats()['pending'], 0)
+
+    def test_votes_on_deleted_thread_dropped(self):
+        """Test votes of a deleted thread do not block the others"""
+        other = create_thread(user=self.user, board=self.board)
+        self.buffer.toggle(self.user, self.thread, Upvote)
+        self.buffer.toggle(self.admin, other, Upvote)
+        self.thread.delete()
+
+        self.buffer.flush()
+
+        self.assertEqual(
+            list(Upvote.objects.values_list('thread', flat=True)),
+            [other.id]
+        )
+        stats = self.buffer.stats()
+        self.assertEqual(stats['pending'], 0)
+        self.assertEqual(stats['votes_dropped'], 1)
+
+    def test_toggle_during_flush(self):
+        """Test a toggle during a flush sees the batch being flushed"""
+        self.buffer.toggle(self.user, self.thread, Upvote)
+        apply = self.buffer._apply
+        cast = []
+
+        def apply_with_toggle(batch):
+            cast.append(self.buffer.toggle(self.user, self.thread, Upvote))
+            return apply(batch)
+
+        with patch.object(self.buffer, '_apply', apply_with_toggle):
+            self.buffer.flush()
+
+        self.buffer.flush()
+
+        self.assertEqual(cast, [False])
+        self.assertFalse(Upvote.objects.exists())
+
+    def test_stored_vote_read_without_lock(self):
+        """Test that the stored vote is not read under the buffer lock"""
+        stored_vote = self.buffer._stored_vote
+        locked = []
+
+        def read_stored_vote(*key):
+            locked.append(self.buffer._lock.locked())
+            return stored_vote(*key)
+
+        with patch.object(self.buffer, '_stored_vote', read_stored_vote):
+            self.buffer.toggle(self.user, self.thread, Upvote)
+
+        self.assertEqual(locked, [False])
+
+    def test_counters_changed_by_deltas(self):
+        """Test that flushing changes the counters by the flushed votes
+        rather than recounting the votes of the thread"""
+        Upvote.objects.create(user=self.admin, thread=self.thread)
+        Thread.objects.filter(pk=self.thread.pk).update(upvote_count=5)
+
+        self.buffer.toggle(self.user, self.thread, Upvote)
+        self.buffer.toggle(self.admin, self.thread, Downvote)
+        self.buffer.flush()
+        self.thread.refresh_from_db()
+
+        self.assertEqual(self.thread.upvote_count, 5)
+        self.assertEqual(self.thread.downvote_count, 1)
+
+
+class VoteBufferApiTests(TestCase):
+    """Test voting API with buffered votes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.admin = create_user(is_admin=True)
+        self.board = create_board(user=self.admin)
+        self.thread = create_thread(user=self.user, board=self.board)
+        self.buffer = VoteBuffer(flush_interval=0)
+        patcher = patch(
+            'chan.views.get_vote_buffer', return_value=self.buffer
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_buffered_upvote(self):
+        """Test upvoting a thread through the buffer"""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('6chan:thread-upvote-thread', args=[self.thread.id])
+
+        res = self.client.post(url, {'thread': self.thread.id})
+        self.buffer.flush()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Upvote.objects.count(), 1)
+
+    def test_vote_buffer_stats_admin_only(self):
+        """Test that vote buffer metrics require an admin user"""
+        self.client.force_authenticate(user=self.user)
+
+        res = self.client.get(VOTE_BUFFER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_vote_buffer_stats(self):
+        """Test retrieving vote buffer metrics"""
+        self.client.force_authenticate(user=self.admin)
+        self.buffer.toggle(self.user, self.thread, Upvote)
+
+        res = self.client.get(VOTE_BUFFER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['pending'], 1)
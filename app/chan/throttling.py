@@ -0,0 +1,299 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.throttling import BaseThrottle
+
+from chan.cache import LocMemLRUBackend
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'CACHE': 'default',
+    'KEY_PREFIX': 'throttle:',
+    'EXEMPT_STAFF': True,
+    'ACTIONS': {},
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Counters of every scope of an action, keyed by the client identity
+SCOPES = ['USER', 'IP', 'BOARD']
+
+
+def get_throttle_settings():
+    """Return throttle settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'CHAN_THROTTLES', {}))
+
+
+def parse_rate(rate):
+    """Return the number of requests and the period in seconds
+    of a rate like ``10/min``"""
+    try:
+        num, period = rate.split('/')
+
+        return int(num), PERIODS[period[0]]
+    except (ValueError, KeyError, IndexError):
+        raise ImproperlyConfigured(f'Invalid throttle rate {rate!r}')
+
+
+class SlidingWindowCounter:
+    """Sliding window rate limiter over a shared cache
+
+    Requests are counted in fixed windows with ``incr``, the rate is the
+    count of the current window plus the count of the previous window
+    weighted by how much of it still overlaps the sliding window.
+    Previous windows are closed, so their counts are kept in process.
+    The counts of every scope and the running cooldown of a request are
+    read in one pipeline on django-redis caches.
+    """
+
+    def __init__(self, alias='default', prefix='throttle:',
+                 max_entries=10000):
+        self.alias = alias
+        self.prefix = prefix
+        self.closed = LocMemLRUBackend(max_entries=max_entries)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def check(self, hits, cooldown=None, now=None):
+        """Count a request against every ``(key, limit, period)`` of hits
+        and read the cooldown running under the cooldown key, return the
+        seconds to wait before the next request is allowed, 0 when this
+        one is"""
+        now = time.time() if now is None else now
+        windows = []
+        counts = []
+        reads = [] if cooldown is None else [self.cooldown_key(cooldown)]
+
+        for key, limit, period in hits:
+            window, elapsed = divmod(now, period)
+            previous = f'{self.prefix}{key}:{int(window) - 1}'
+            windows.append((previous, limit, period, elapsed))
+            counts.append((f'{self.prefix}{key}:{int(window)}', 2 * period))
+
+            if self.closed.get(previous) is None:
+                reads.append(previous)
+
+        counts, values = self.incr_many(counts, reads)
+        waits = [] if cooldown is None else [max(
+            (values.get(self.cooldown_key(cooldown)) or now) - now, 0
+        )]
+
+        for (previous, limit, period, elapsed), count in zip(
+            windows, counts
+        ):
+            if previous in values:
+                self.closed.set(previous, values[previous] or 0, period)
+
+            rate = self.closed.get(previous) * (1 - elapsed / period) + count
+            waits.append(0 if rate <= limit else period - elapsed)
+
+        return max(waits, default=0)
+
+    def hit(self, key, limit, period, now=None):
+        """Count a request against a single rate"""
+        return self.check([(key, limit, period)], now=now)
+
+    def incr_many(self, counts, reads=()):
+        """Increase the counts of ``(key, timeout)`` pairs and read the
+        integers under reads, return the new counts and a dict of the
+        values read, in one round trip on django-redis caches"""
+        client = self.redis_client()
+
+        if client is None:
+            values = self.cache.get_many(reads) if reads else {}
+
+            return (
+                [self.increment(key, timeout) for key, timeout in counts],
+                {key: values.get(key) for key in reads},
+            )
+
+        pipe = client.pipeline(transaction=False)
+
+        for key, timeout in counts:
+            pipe.incr(self.cache.make_key(key))
+            pipe.expire(self.cache.make_key(key), timeout)
+
+        for key in reads:
+            pipe.get(self.cache.make_key(key))
+
+        results = pipe.execute()
+        values = results[2 * len(counts):]
+
+        return results[:2 * len(counts):2], {
+            key: None if value is None else int(value)
+            for key, value in zip(reads, values)
+        }
+
+    def redis_client(self):
+        """Return the client of a django-redis cache, None for other
+        backends which count one key per round trip"""
+        get_client = getattr(
+            getattr(self.cache, 'client', None), 'get_client', None
+        )
+
+        return get_client(write=True) if get_client else None
+
+    def increment(self, key, timeout):
+        """Increase the count of a window, return the new count"""
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, timeout):
+                return 1
+
+            return self.cache.incr(key)
+
+    def cooldown_key(self, key):
+        return f'{self.prefix}cooldown:{key}'
+
+    def start_cooldown(self, key, seconds, now=None):
+        """Start a cooldown of seconds under key"""
+        now = time.time() if now is None else now
+        self.cache.set(
+            self.cooldown_key(key), math.ceil(now + seconds), seconds
+        )
+
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+# Cache backends only seen by the process, limits kept there would be
+# multiplied by the number of workers
+LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def get_counter(config):
+    """Return the process wide counter of the configured cache, which
+    must be shared by every worker"""
+    if isinstance(caches[config['CACHE']], LOCAL_CACHES):
+        raise ImproperlyConfigured(
+            f'Throttle cache {config["CACHE"]!r} is local to the process, '
+            'set CACHE to an alias shared by every worker'
+        )
+
+    options = (config['CACHE'], config['KEY_PREFIX'])
+
+    with _counters_lock:
+        counter = _counters.get(options)
+
+        if counter is None:
+            counter = _counters[options] = SlidingWindowCounter(
+                config['CACHE'], prefix=config['KEY_PREFIX']
+            )
+
+    return counter
+
+
+_boards = LocMemLRUBackend(max_entries=10000)
+
+
+def cached_board(key, lookup, timeout=300):
+    """Return the board id of key from lookup, kept in process so the
+    board of a thread or reply is not queried on every check"""
+    board = _boards.get(key)
+
+    if board is None:
+        board = lookup()
+
+        if board is not None:
+            _boards.set(key, board, timeout)
+
+    return board
+
+
+class ChanThrottle(BaseThrottle):
+    """Limit posting, voting and signing up per user, IP and board
+
+    Views map their actions (or request methods) to throttled actions
+    in ``throttle_actions``, each action has a cooldown between two
+    requests of a client and sliding window rates per scope, the board
+    of a request is given by ``get_throttle_board`` of the view. The
+    cooldown is only checked here, ``ThrottledMixin`` starts it once
+    the request succeeded.
+    """
+
+    def __init__(self):
+        self.seconds = None
+
+    def allow_request(self, request, view):
+        config = get_throttle_settings()
+
+        if not config['ENABLED']:
+            return True
+
+        name = getattr(view, 'action', None) or request.method.lower()
+        action = getattr(view, 'throttle_actions', {}).get(name)
+        limits = config['ACTIONS'].get(action)
+
+        if not limits:
+            return True
+
+        user = request.user
+
+        if config['EXEMPT_STAFF'] and user and user.is_staff:
+            return True
+
+        counter = get_counter(config)
+        ip = self.get_ident(request)
+        client = f'user:{user.pk}' if user and user.is_authenticated else (
+            f'ip:{ip}'
+        )
+        cooldown = f'{action}:{client}' if limits.get('COOLDOWN') else None
+        idents = {
+            'USER': user.pk if user and user.is_authenticated else None,
+            'IP': ip,
+        }
+
+        if limits.get('BOARD') and hasattr(view, 'get_throttle_board'):
+            idents['BOARD'] = view.get_throttle_board()
+
+        hits = [
+            (f'{action}:{scope.lower()}:{idents[scope]}',
+             *parse_rate(limits[scope]))
+            for scope in SCOPES
+            if limits.get(scope) and idents.get(scope) is not None
+        ]
+        self.seconds = counter.check(hits, cooldown=cooldown)
+
+        if self.seconds:
+            return False
+
+        if cooldown is not None:
+            request.throttle_cooldown = (
+                counter, cooldown, limits['COOLDOWN']
+            )
+
+        return True
+
+    def wait(self):
+        return self.seconds
+
+
+class ThrottledMixin:
+    """Throttle the actions of a view with ``ChanThrottle``, the cooldown
+    of an action starts once it succeeded so rejected requests do not
+    hold the client back"""
+    throttle_classes = [ChanThrottle, ]
+    throttle_actions = {}
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        cooldown = getattr(request, 'throttle_cooldown', None)
+
+        if cooldown is not None and response.status_code < 400:
+            counter, key, seconds = cooldown
+            counter.start_cooldown(key, seconds)
+
+        return response
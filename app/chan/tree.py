@@ -0,0 +1,18 @@
+def build_reply_tree(replies):
+    """Assemble serialized replies ordered by path into nested
+    nodes in a single pass, a reply whose parent is not part of
+    ``replies`` is returned as a root node"""
+    roots = []
+    nodes = {}
+
+    for reply in replies:
+        node = dict(reply, replies=[])
+        nodes[node['id']] = node
+        parent = nodes.get(node['reply'])
+
+        if parent is None:
+            roots.append(node)
+        else:
+            parent['replies'].append(node)
+
+    return roots
@@ -3,7 +3,10 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from chan.views import (
-    BoardViewSet, ManageThreadViewSet, ManageReplyViewSet
+    BoardViewSet, ManageThreadViewSet, ManageReplyViewSet,
+    CatalogView, SearchView, VoteBufferStatsView, ResponseCacheStatsView,
+    ExportView, ImportView, ArchiveViewSet, DatabaseStatsView,
+    ProfilingStatsView
 )
 
 
@@ -11,9 +14,24 @@ router = DefaultRouter()
 router.register('boards', BoardViewSet)
 router.register('thread', ManageThreadViewSet)
 router.register('reply', ManageReplyViewSet)
+router.register('archive', ArchiveViewSet)
 
 
 app_name = '6chan'
 urlpatterns = [
     path('', include(router.urls)),
+    path('catalog/', CatalogView.as_view(), name='catalog'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('export/', ExportView.as_view(), name='export'),
+    path('import/', ImportView.as_view(), name='import'),
+    path(
+        'vote-buffer/', VoteBufferStatsView.as_view(),
+        name='vote-buffer'
+    ),
+    path(
+        'response-cache/', ResponseCacheStatsView.as_view(),
+        name='response-cache'
+    ),
+    path('database/', DatabaseStatsView.as_view(), name='database'),
+    path('profiling/', ProfilingStatsView.as_view(), name='profiling'),
 ]
@@ -1,18 +1,49 @@
+import time
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.db.models import Count, F, Max, Prefetch, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from django.http import StreamingHttpResponse
 from django.utils.translation import ugettext_lazy as _
 
-from rest_framework import (
-    viewsets, permissions, authentication, status
-)
+from rest_framework import generics, viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from chan.cache import CachedRetrieveMixin, get_response_cache
+from chan.conditional import ConditionalGetMixin
+from chan.fastpath import FastReadMixin
+from chan.profiling import PrometheusRenderer, get_profile_registry
+from chan.pagination import (
+    BoardCursorPagination, ThreadCursorPagination,
+    ReplyCursorPagination, SearchCursorPagination, ArchiveCursorPagination
+)
 from chan.serializers import (
     BoardSerializer, ThreadSerializer,
     UpvoteSerializer, DownvoteSerializer,
-    ReplySerializer
+    ReplySerializer, CatalogSerializer,
+    SearchResultSerializer, ArchivedThreadSerializer,
+    ArchivedThreadDetailSerializer
+)
+from chan.throttling import ThrottledMixin, cached_board
+from chan.tree import build_reply_tree
+from chan.votes import toggle_vote
+from chan.vote_buffer import get_vote_buffer
+
+from core.db.pool import get_pools
+from core.models import (
+    Board, Thread, Reply, Upvote, Downvote, ArchivedThread, reply_tree_path
 )
+from core.ndjson import DumpError, export_records, import_records
+from core.search import search
 
-from core.models import Board, Thread, Reply
+from user.authentication import CachedTokenAuthentication
 
 
 class ObjectPermissions(permissions.BasePermission):
@@ -26,12 +57,88 @@ class ObjectPermissions(permissions.BasePermission):
         return obj.user == request.user
 
 
-class BoardViewSet(viewsets.ModelViewSet):
+def int_or_none(value):
+    """Return value as an integer, None when it is not one"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def top_per_group(queryset, group, ordering, limit):
+    """Return the ids of the first ``limit`` rows of queryset in every
+    group, numbered by a window function in a single pass rather than
+    a limited subquery per row, to filter with ``id__in``"""
+    ranked = queryset.order_by().annotate(
+        position=Window(
+            RowNumber(), partition_by=[F(group)],
+            order_by=[
+                F(field[1:]).desc() if field.startswith('-')
+                else F(field).asc()
+                for field in ordering
+            ]
+        )
+    ).values('id', 'position')
+
+    try:
+        sql, params = ranked.query.sql_with_params()
+    except EmptyResultSet:
+        return []
+
+    return RawSQL(
+        f'SELECT id FROM ({sql}) ranked WHERE position <= %s',
+        (*params, limit)
+    )
+
+
+def thread_board(thread_id):
+    """Return the board id of a thread, None when missing"""
+    return cached_board(f'thread:{thread_id}', lambda: Thread.objects.filter(
+        pk=thread_id
+    ).values_list('board_id', flat=True).first())
+
+
+class IntegerParamMixin:
+    """Parse bounded integer query parameters"""
+
+    def _param_to_int(self, name, default, maximum=None):
+        """Convert a single query param to a bounded integer"""
+        value = self.request.query_params.get(name)
+
+        if value is None:
+            return default
+
+        try:
+            value = int(value)
+        except ValueError:
+            msg = _('Query parameter must be an integer')
+            raise ValidationError({name: msg})
+
+        if value < 0:
+            msg = _('Query parameter must not be negative')
+            raise ValidationError({name: msg})
+
+        return min(value, maximum) if maximum is not None else value
+
+
+class BoardViewSet(
+    CachedRetrieveMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     """Viewset for manage board in API"""
+    cache_kind = 'board'
     serializer_class = BoardSerializer
-    authentication_classes = [authentication.TokenAuthentication, ]
+    replica_reads = True
+    query_budgets = {'list': 2, 'retrieve': 3, 'create': 4}
+    authentication_classes = [CachedTokenAuthentication, ]
+    pagination_class = BoardCursorPagination
     queryset = Board.objects.all()
 
+    def get_queryset(self):
+        """Fetch the thread ids of every board in one query"""
+        return self.queryset.prefetch_related(Prefetch(
+            'thread', queryset=Thread.objects.only('id', 'board_id')
+        ))
+
     def get_permissions(self):
         """Return permission for viewset based on action"""
 
@@ -42,16 +149,52 @@ class BoardViewSet(viewsets.ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
+    def get_row_validator(self, row):
+        """Listed boards also depend on the ids of their threads"""
+        return (
+            *super().get_row_validator(row),
+            *(thread.id for thread in row.thread.all())
+        )
+
+    def get_validator_aggregates(self):
+        """Boards also depend on the ids of their threads"""
+        return dict(
+            super().get_validator_aggregates(),
+            thread_count=Count('thread', distinct=True),
+            last_thread=Max('thread__id')
+        )
+
     def perform_create(self, serializer):
         """Create and save board"""
         serializer.save(user=self.request.user)
 
 
-class ManageThreadViewSet(viewsets.ModelViewSet):
+class ManageThreadViewSet(
+    IntegerParamMixin, ThrottledMixin, CachedRetrieveMixin,
+    ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet
+):
     """Viewset for manage thread in API"""
+    cache_kind = 'thread'
     serializer_class = ThreadSerializer
-    authentication_classes = [authentication.TokenAuthentication, ]
+    replica_reads = True
+    query_budgets = {
+        'list': 1, 'retrieve': 2, 'reply_tree': 3, 'new_replies': 2,
+        'create': 12, 'update': 12, 'partial_update': 12,
+        'upvote_thread': 12, 'downvote_thread': 12,
+    }
+    authentication_classes = [CachedTokenAuthentication, ]
+    pagination_class = ThreadCursorPagination
     queryset = Thread.objects.all()
+    fast_path_expressions = {'score': F('upvote_count') - F('downvote_count')}
+    throttle_actions = {
+        'create': 'thread', 'upvote_thread': 'vote', 'downvote_thread': 'vote'
+    }
+
+    tree_page_size = 50
+    tree_max_depth = 32
+    tree_max_nodes = 1000
+    replies_page_size = 100
+    replies_max_page_size = 500
 
     def _params_to_int(self, qs):
         """Convert params string to integer"""
@@ -61,6 +204,26 @@ class ManageThreadViewSet(viewsets.ModelViewSet):
         """Create and save thread"""
         serializer.save(user=self.request.user)
 
+    def get_cache_variant(self):
+        """Return the part of the request the payload depends on"""
+        expand = self.serializer_class.get_expand(self.request)
+
+        return f'{super().get_cache_variant()}:{",".join(sorted(expand))}'
+
+    def get_throttle_board(self):
+        """Return the board a new thread or a vote is counted against"""
+        if self.action == 'create':
+            return int_or_none(self.request.data.get('board'))
+
+        return thread_board(int_or_none(self.kwargs.get('pk')))
+
+    def get_fast_representation(self):
+        """Expanded id lists are serialized from prefetched threads"""
+        if self.serializer_class.get_expand(self.request):
+            return None
+
+        return super().get_fast_representation()
+
     def get_queryset(self):
         """Return appropriate queryset"""
         board = self.request.query_params.get('board')
@@ -70,14 +233,19 @@ class ManageThreadViewSet(viewsets.ModelViewSet):
             board_id = self._params_to_int(board)
             queryset = queryset.filter(board__id__in=board_id)
 
-        return queryset.order_by('-reply_to_thread__date_created')
+        expand = self.serializer_class.get_expand(self.request)
+
+        if expand:
+            queryset = queryset.prefetch_related(*expand)
+
+        return queryset.order_by('-last_bumped_at', '-id')
 
     def get_permissions(self):
         """Return permission based on action"""
         action = [
             'list', 'retrieve',
             'upvote_thread', 'downvote_thread',
-            'reply_to_thread'
+            'reply_to_thread', 'reply_tree', 'new_replies'
         ]
 
         if self.action in action:
@@ -89,96 +257,175 @@ class ManageThreadViewSet(viewsets.ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
-    @action(methods=['post'], detail=True, url_path='upvote-thread')
-    def upvote_thread(self, request, pk=None):
-        """Upvoting the thread"""
+    def _vote(self, request, vote_model, serializer_class, msg):
+        """Toggle the vote of request user on the thread"""
         thread = self.get_object()
-        upvote_user_id = [
-            vote.user.id for vote in thread.upvote_thread.all()
-        ]
-        downvote_user_id = [
-            vote.user.id for vote in thread.downvote_thread.all()
-        ]
-        serializer = UpvoteSerializer(data=request.data)
-        msg = _('You\'ve done upvoting the thread!')
+        serializer = serializer_class(data=request.data)
 
-        if serializer.is_valid():
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            if request.user.id in upvote_user_id:
-                thread.upvote_thread.filter(
-                    user=request.user
-                ).delete()
-                return Response(
-                    status=status.HTTP_204_NO_CONTENT
-                )
+        vote_buffer = get_vote_buffer()
+        toggle = vote_buffer.toggle if vote_buffer else toggle_vote
 
-            if request.user.id in downvote_user_id:
-                thread.downvote_thread.filter(
-                    user=request.user
-                ).delete()
+        if not toggle(request.user, thread, vote_model):
+            return Response(status=status.HTTP_204_NO_CONTENT)
 
-                serializer.save(user=request.user)
-                return Response({'message': msg})
+        return Response({'message': msg})
 
-            serializer.save(user=request.user)
-            return Response({'message': msg})
+    @action(methods=['post'], detail=True, url_path='upvote-thread')
+    def upvote_thread(self, request, pk=None):
+        """Upvoting the thread"""
+        msg = _('You\'ve done upvoting the thread!')
 
-        else:
-            return Response(
-                serializer.errors,
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return self._vote(request, Upvote, UpvoteSerializer, msg)
 
     @action(methods=['post'], detail=True, url_path='downvote-thread')
     def downvote_thread(self, request, pk=None):
-        """Upvoting the thread"""
-        thread = self.get_object()
-        upvote_user_id = [
-            vote.user.id for vote in thread.upvote_thread.all()
-        ]
-        downvote_user_id = [
-            vote.user.id for vote in thread.downvote_thread.all()
-        ]
-        serializer = DownvoteSerializer(data=request.data)
+        """Downvoting the thread"""
         msg = _('You\'ve done downvoting the thread!')
 
-        if serializer.is_valid():
+        return self._vote(request, Downvote, DownvoteSerializer, msg)
 
-            if request.user.id in downvote_user_id:
-                thread.downvote_thread.filter(
-                    user=request.user
-                ).delete()
-                return Response(
-                    status=status.HTTP_204_NO_CONTENT
-                )
+    @action(methods=['get'], detail=True, url_path='tree')
+    def reply_tree(self, request, pk=None):
+        """Return a page of the nested reply tree of the thread, the
+        page resumes after the ``after`` reply in depth-first order"""
+        thread = self.get_object()
+        after = self._param_to_int('after', 0)
+        depth = self._param_to_int(
+            'depth', self.tree_max_depth, self.tree_max_depth
+        )
+        page_size = self._param_to_int(
+            'page_size', self.tree_page_size, self.tree_page_size
+        ) or self.tree_page_size
+
+        start = ''
+
+        if after:
+            # A deleted cursor reply is resumed from as a top level one
+            start = Reply.objects.filter(
+                root_thread=thread, pk=after
+            ).values_list('path', flat=True).first()
+            start = start or reply_tree_path(after)
+
+        end = Reply.objects.filter(
+            root_thread=thread, depth=0, path__gt=start
+        ).order_by('path').values_list('path', flat=True)[
+            page_size:page_size + 1
+        ].first()
+        replies = Reply.objects.filter(
+            root_thread=thread, depth__lte=depth, path__gt=start
+        )
+
+        if end is not None:
+            replies = replies.filter(path__lt=end)
+
+        replies = list(
+            replies.order_by('path')[:self.tree_max_nodes + 1]
+        )
+        truncated = len(replies) > self.tree_max_nodes
+        replies = replies[:self.tree_max_nodes]
+        serializer = ReplySerializer(
+            replies, many=True, context=self.get_serializer_context()
+        )
+        tree = build_reply_tree(serializer.data)
+        next_after = None
+
+        if replies and (truncated or end is not None):
+            next_after = replies[-1].id
+
+        return Response({
+            'thread': thread.id,
+            'replies': tree,
+            'next_after': next_after,
+            'truncated': truncated,
+        })
+
+    @action(methods=['get'], detail=True, url_path='replies')
+    def new_replies(self, request, pk=None):
+        """Return replies of the thread newer than the ``after`` reply
+        id, along with the new high-water mark to poll from"""
+        after = self._param_to_int('after', 0)
+        limit = self._param_to_int(
+            'limit', self.replies_page_size, self.replies_max_page_size
+        ) or self.replies_page_size
+
+        try:
+            thread_id = int(pk)
+        except ValueError:
+            raise NotFound()
+
+        replies = list(
+            Reply.objects.filter(
+                root_thread_id=thread_id, id__gt=after
+            ).order_by('id')[:limit + 1]
+        )
+
+        if not replies and not Thread.objects.filter(pk=thread_id).exists():
+            raise NotFound()
+
+        has_more = len(replies) > limit
+        replies = replies[:limit]
+        serializer = ReplySerializer(
+            replies, many=True, context=self.get_serializer_context()
+        )
+
+        return Response({
+            'results': serializer.data,
+            'high_water_mark': replies[-1].id if replies else after,
+            'has_more': has_more,
+        })
+
+
+class ManageReplyViewSet(
+    ThrottledMixin, ConditionalGetMixin, FastReadMixin,
+    viewsets.ModelViewSet
+):
+    """Viewset for manage Reply in API"""
+    replica_reads = True
+    query_budgets = {
+        'list': 1, 'retrieve': 2, 'create': 16, 'update': 14,
+        'partial_update': 14, 'destroy': 8,
+    }
+    authentication_classes = [CachedTokenAuthentication, ]
+    serializer_class = ReplySerializer
+    pagination_class = ReplyCursorPagination
+    queryset = Reply.objects.all()
+    throttle_actions = {'create': 'reply'}
 
-            if request.user.id in upvote_user_id:
-                thread.upvote_thread.filter(
-                    user=request.user
-                ).delete()
+    def perform_create(self, serializer):
+        """Create and save reply, the thread replied to is locked so it
+        is not archived or deleted before the reply is committed"""
+        parent = serializer.validated_data.get('reply')
+        thread = serializer.validated_data.get('thread')
+        thread_id = parent.root_thread_id if parent else getattr(
+            thread, 'pk', None
+        )
 
-                serializer.save(user=request.user)
-                return Response({'message': msg})
+        with transaction.atomic():
+            if thread_id is not None and not Thread.objects.filter(
+                pk=thread_id
+            ).select_for_update().exists():
+                raise NotFound(_('The thread is no longer on its board'))
 
-            serializer.save(user=request.user)
-            return Response({'message': msg})
+            serializer.save(user=self.request.user)
 
-        else:
-            return Response(
-                serializer.errors,
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    def get_throttle_board(self):
+        """Return the board of the thread replied to"""
+        thread = int_or_none(self.request.data.get('thread'))
 
+        if thread is not None:
+            return thread_board(thread)
 
-class ManageReplyViewSet(viewsets.ModelViewSet):
-    """Viewset for manage Reply in API"""
-    authentication_classes = [authentication.TokenAuthentication, ]
-    serializer_class = ReplySerializer
-    queryset = Reply.objects.all()
+        reply = int_or_none(self.request.data.get('reply'))
 
-    def perform_create(self, serializer):
-        """Create and save reply"""
-        serializer.save(user=self.request.user)
+        return cached_board(f'reply:{reply}', lambda: Reply.objects.filter(
+            pk=reply
+        ).values_list('root_thread__board_id', flat=True).first())
 
     def get_permissions(self):
         """Return permission based on action"""
@@ -192,3 +439,278 @@ class ManageReplyViewSet(viewsets.ModelViewSet):
             ]
 
         return [permission() for permission in permission_classes]
+
+
+class CatalogView(IntegerParamMixin, APIView):
+    """Front page catalog: every board with its thread count, last
+    activity and top threads, each with its latest replies
+
+    Assembled with three queries whatever the number of boards, the
+    number of threads per board (``threads``) and replies per thread
+    (``replies``) are bounded, threads follow ``sort`` like the thread
+    listing
+    """
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [permissions.AllowAny, ]
+
+    threads_per_board = 5
+    max_threads_per_board = 20
+    replies_per_thread = 3
+    max_replies_per_thread = 10
+
+    def get_thread_ordering(self):
+        """Return the ordering of the requested thread sort"""
+        paginator = ThreadCursorPagination()
+
+        return paginator.get_ordering(self.request, None, self)
+
+    def get(self, request):
+        """Return the catalog of every board"""
+        thread_limit = self._param_to_int(
+            'threads', self.threads_per_board, self.max_threads_per_board
+        )
+        reply_limit = self._param_to_int(
+            'replies', self.replies_per_thread, self.max_replies_per_thread
+        )
+        ordering = self.get_thread_ordering()
+
+        boards = list(
+            Board.objects.annotate(
+                thread_count=Count('thread'),
+                last_activity=Max('thread__last_bumped_at')
+            ).order_by('id')
+        )
+
+        threads = list(
+            Thread.objects.filter(id__in=top_per_group(
+                Thread.objects.filter(
+                    board__in=[board.id for board in boards]
+                ),
+                'board', ordering, thread_limit
+            )).order_by(*ordering)
+        )
+        replies = Reply.objects.filter(id__in=top_per_group(
+            Reply.objects.filter(
+                root_thread__in=[thread.id for thread in threads]
+            ),
+            'root_thread', ['-id'], reply_limit
+        )).order_by('id')
+
+        threads_by_id = {}
+
+        for thread in threads:
+            thread.catalog_replies = []
+            threads_by_id[thread.id] = thread
+
+        for reply in replies:
+            threads_by_id[reply.root_thread_id].catalog_replies.append(reply)
+
+        boards_by_id = {}
+
+        for board in boards:
+            board.catalog_threads = []
+            boards_by_id[board.id] = board
+
+        for thread in threads:
+            boards_by_id[thread.board_id].catalog_threads.append(thread)
+
+        serializer = CatalogSerializer(
+            boards, many=True, context={'request': request}
+        )
+
+        return Response({'boards': serializer.data})
+
+
+class SearchView(generics.ListAPIView):
+    """Full-text search over threads and replies, ranked by relevance
+
+    ``q`` is required, results can be restricted with ``board`` (id)
+    and ``type`` (``thread`` or ``reply``)
+    """
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [permissions.AllowAny, ]
+    serializer_class = SearchResultSerializer
+    pagination_class = SearchCursorPagination
+
+    def get_queryset(self):
+        """Return the ranked documents matching the query"""
+        params = self.request.query_params
+        query = params.get('q', '').strip()
+
+        if not query:
+            raise ValidationError({'q': _('Search query is required')})
+
+        board = params.get('board')
+
+        if board is not None and not board.isdigit():
+            msg = _('Query parameter must be an integer')
+            raise ValidationError({'board': msg})
+
+        kind = params.get('type')
+
+        if kind not in (None, 'thread', 'reply'):
+            msg = _('Type must be thread or reply')
+            raise ValidationError({'type': msg})
+
+        return search(query, board=board, kind=kind).select_related(
+            'thread', 'reply'
+        )
+
+
+class ArchiveViewSet(viewsets.ReadOnlyModelViewSet):
+    """Read-only access to archived threads, listings can be
+    restricted to a board with ``board`` (id)"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [permissions.AllowAny, ]
+    pagination_class = ArchiveCursorPagination
+    queryset = ArchivedThread.objects.all()
+
+    def get_serializer_class(self):
+        """Return the detail serializer for a single archived thread"""
+        if self.action == 'retrieve':
+            return ArchivedThreadDetailSerializer
+
+        return ArchivedThreadSerializer
+
+    def get_queryset(self):
+        """Leave the archive blobs out of listings"""
+        queryset = self.queryset
+
+        if self.action == 'retrieve':
+            return queryset
+
+        board = self.request.query_params.get('board')
+
+        if board is not None:
+            if not board.isdigit():
+                msg = _('Query parameter must be an integer')
+                raise ValidationError({'board': msg})
+
+            queryset = queryset.filter(board_id=board)
+
+        return queryset.defer('data', 'media')
+
+
+class VoteBufferStatsView(APIView):
+    """Expose flush metrics of the write-behind vote buffer"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [permissions.IsAdminUser, ]
+
+    def get(self, request):
+        """Return vote buffer metrics"""
+        vote_buffer = get_vote_buffer()
+
+        if vote_buffer is None:
+            return Response({'enabled': False})
+
+        return Response({'enabled': True, **vote_buffer.stats()})
+
+
+class ResponseCacheStatsView(APIView):
+    """Expose hit/miss counters of the response cache"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [permissions.IsAdminUser, ]
+
+    def get(self, request):
+        """Return response cache counters"""
+        cache = get_response_cache()
+
+        if cache is None:
+            return Response({'enabled': False})
+
+        return Response({'enabled': True, **cache.stats()})
+
+
+class ExportView(APIView):
+    """Stream boards, threads, replies and votes as NDJSON"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [permissions.IsAdminUser, ]
+
+    def get(self, request):
+        """Return the dump of every board or of the given boards"""
+        boards = request.query_params.getlist('board')
+
+        if not all(board.isdigit() for board in boards):
+            raise ValidationError({'board': _('Must be board ids.')})
+
+        response = StreamingHttpResponse(
+            export_records(boards=[int(board) for board in boards]),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="6chan.ndjson"'
+
+        return response
+
+
+class ImportView(APIView):
+    """Import an NDJSON dump uploaded as ``file``"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [permissions.IsAdminUser, ]
+    parser_classes = [MultiPartParser, ]
+
+    def post(self, request):
+        """Import the uploaded dump, return imported rows per model"""
+        upload = request.FILES.get('file')
+
+        if upload is None:
+            raise ValidationError({'file': _('This field is required.')})
+
+        try:
+            stats = import_records(upload)
+        except (DumpError, UnicodeDecodeError) as e:
+            raise ValidationError({'file': str(e)})
+
+        return Response(stats)
+
+
+class ProfilingStatsView(APIView):
+    """Expose request profile histograms per view and action,
+    as JSON or in the Prometheus text format (``?format=prometheus``)"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [permissions.IsAdminUser, ]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [
+        PrometheusRenderer
+    ]
+
+    def get(self, request):
+        """Return request profile histograms"""
+        registry = get_profile_registry()
+
+        if registry is None:
+            return Response({'enabled': False, 'endpoints': {}})
+
+        return Response({'enabled': True, 'endpoints': registry.snapshot()})
+
+
+class DatabaseStatsView(APIView):
+    """Expose connection settings, round trip time and pool
+    statistics of every database"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [permissions.IsAdminUser, ]
+
+    def get(self, request):
+        """Return database connection diagnostics"""
+        pools = get_pools()
+        databases = {}
+
+        for alias in connections:
+            connection = connections[alias]
+            start = time.perf_counter()
+
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+            pool = pools.get(alias)
+            databases[alias] = {
+                'vendor': connection.vendor,
+                'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+                'health_checks': bool(
+                    connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                ),
+                'round_trip_ms': round(
+                    (time.perf_counter() - start) * 1000, 3
+                ),
+                'pool': pool.stats() if pool is not None else None,
+            }
+
+        return Response({'databases': databases})
@@ -0,0 +1,311 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction, close_old_connections
+from django.db.models import F
+from django.db.models.functions import Now
+
+from core.models import Thread, Upvote, Downvote
+from core.signals import suspend_vote_counters, thread_counters_refreshed
+
+
+logger = logging.getLogger(__name__)
+
+NO_VOTE = 0
+
+VOTE_DIRECTION = {
+    Upvote: 1,
+    Downvote: -1,
+}
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'FLUSH_INTERVAL': 1.0,
+    'MAX_BATCH_SIZE': 1000,
+}
+
+
+class VoteBuffer:
+    """Write-behind buffer for thread votes
+
+    Vote intents are coalesced per (user, thread) in memory and written
+    in bulk by ``flush``, either from a background thread every
+    ``flush_interval`` seconds or when ``max_batch_size`` intents are
+    pending. A ``flush_interval`` of 0 disables the background thread.
+    """
+
+    def __init__(self, flush_interval=1.0, max_batch_size=1000):
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self._pending = {}
+        self._flushing = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._worker = None
+        self._stats = {
+            'flushes': 0,
+            'votes_flushed': 0,
+            'failed_flushes': 0,
+            'votes_dropped': 0,
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+            'last_flush_seconds': 0.0,
+            'max_flush_seconds': 0.0,
+            'total_flush_seconds': 0.0,
+        }
+
+    def _stored_vote(self, user_id, thread_id):
+        """Return the vote direction currently stored in db"""
+        for model, direction in VOTE_DIRECTION.items():
+            if model.objects.filter(
+                user_id=user_id, thread_id=thread_id
+            ).exists():
+                return direction
+
+        return NO_VOTE
+
+    def toggle(self, user, thread, vote_model):
+        """Record a vote toggle, return True when the vote is cast
+        and False when it is withdrawn"""
+        key = (user.pk, thread.pk)
+        direction = VOTE_DIRECTION[vote_model]
+        stored, generation = None, None
+
+        # The batch being flushed is newer than the stored votes until
+        # it is committed. The stored vote is read outside of the lock
+        # and only used if no flush completed meanwhile.
+        while True:
+            with self._lock:
+                current = self._pending.get(key, self._flushing.get(key))
+
+                if current is None and generation == self._generation:
+                    current = stored
+
+                if current is not None:
+                    target = NO_VOTE if current == direction else direction
+                    self._pending[key] = target
+                    pending = len(self._pending)
+                    break
+
+                generation = self._generation
+
+            stored = self._stored_vote(*key)
+
+        if pending >= self.max_batch_size:
+            self.flush()
+        else:
+            self._ensure_worker()
+
+        return target != NO_VOTE
+
+    def _ensure_worker(self):
+        """Start the background flush thread if needed"""
+        if self.flush_interval <= 0 or self._worker is not None:
+            return
+
+        with self._lock:
+            if self._worker is not None:
+                return
+
+            self._worker = threading.Thread(
+                target=self._run, name='vote-buffer', daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        """Flush pending votes every flush_interval seconds"""
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing vote buffer failed')
+            finally:
+                close_old_connections()
+
+    def _apply(self, batch):
+        """Write a batch of coalesced votes and refresh the counters
+        of the voted threads in one transaction, return the number of
+        votes dropped because their thread or user is gone"""
+        with transaction.atomic(), suspend_vote_counters():
+            # Threads are locked so they are not deleted or archived
+            # before their votes are inserted
+            thread_ids = set(Thread.objects.select_for_update().filter(
+                pk__in={thread_id for _, thread_id in batch}
+            ).values_list('pk', flat=True))
+            user_ids = set(get_user_model().objects.filter(
+                pk__in={user_id for user_id, _ in batch}
+            ).values_list('pk', flat=True))
+            size = len(batch)
+            batch = {
+                (user_id, thread_id): target
+                for (user_id, thread_id), target in batch.items()
+                if user_id in user_ids and thread_id in thread_ids
+            }
+
+            # Changes of the (upvote, downvote) counters of every thread
+            deltas = {thread_id: [0, 0] for thread_id in thread_ids}
+
+            for index, (model, direction) in enumerate(
+                VOTE_DIRECTION.items()
+            ):
+                rows = model.objects.filter(
+                    user_id__in=user_ids, thread_id__in=thread_ids
+                ).values_list('id', 'user_id', 'thread_id')
+                stale = []
+                existing = set()
+
+                for pk, user_id, thread_id in rows:
+                    target = batch.get((user_id, thread_id))
+
+                    if target is None:
+                        continue
+                    if target == direction:
+                        existing.add((user_id, thread_id))
+                    else:
+                        stale.append(pk)
+                        deltas[thread_id][index] -= 1
+
+                if stale:
+                    model.objects.filter(id__in=stale).delete()
+
+                # The locked threads hold back other writers of their
+                # votes, so every missing vote is inserted
+                created = [
+                    model(user_id=user_id, thread_id=thread_id)
+                    for (user_id, thread_id), target in batch.items()
+                    if target == direction
+                    and (user_id, thread_id) not in existing
+                ]
+                model.objects.bulk_create(created, ignore_conflicts=True)
+
+                for vote in created:
+                    deltas[vote.thread_id][index] += 1
+
+            # One update per distinct pair of counter changes
+            threads_by_delta = {}
+
+            for thread_id, delta in deltas.items():
+                threads_by_delta.setdefault(tuple(delta), []).append(
+                    thread_id
+                )
+
+            for (up, down), ids in threads_by_delta.items():
+                if up or down:
+                    Thread.objects.filter(pk__in=ids).update(
+                        upvote_count=F('upvote_count') + up,
+                        downvote_count=F('downvote_count') + down,
+                        date_modified=Now()
+                    )
+
+        thread_counters_refreshed.send(
+            sender=self.__class__, thread_ids=thread_ids
+        )
+
+        return size - len(batch)
+
+    def flush(self):
+        """Write every pending vote to db, return the number of
+        flushed votes"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._flushing = pending
+
+            if not pending:
+                return 0
+
+            start = time.monotonic()
+            items = list(pending.items())
+            dropped = 0
+
+            try:
+                for i in range(0, len(items), self.max_batch_size):
+                    dropped += self._apply(
+                        dict(items[i:i + self.max_batch_size])
+                    )
+            except Exception:
+                self._requeue(pending)
+
+                with self._lock:
+                    self._stats['failed_flushes'] += 1
+
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+                    self._generation += 1
+
+            self._record(len(pending), dropped, time.monotonic() - start)
+
+            return len(pending)
+
+    def _requeue(self, pending):
+        """Put back votes of a failed flush without overriding
+        intents recorded in the meantime"""
+        with self._lock:
+            for key, target in pending.items():
+                self._pending.setdefault(key, target)
+
+    def _record(self, batch_size, dropped, seconds):
+        """Record flush metrics"""
+        with self._lock:
+            stats = self._stats
+            stats['flushes'] += 1
+            stats['votes_flushed'] += batch_size
+            stats['votes_dropped'] += dropped
+            stats['last_batch_size'] = batch_size
+            stats['max_batch_size'] = max(
+                stats['max_batch_size'], batch_size
+            )
+            stats['last_flush_seconds'] = seconds
+            stats['max_flush_seconds'] = max(
+                stats['max_flush_seconds'], seconds
+            )
+            stats['total_flush_seconds'] += seconds
+
+    def stats(self):
+        """Return flush metrics of the buffer"""
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending))
+
+    def close(self):
+        """Stop the background thread and drain the buffer"""
+        self._stopped.set()
+
+        if self._worker is not None:
+            self._worker.join()
+
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_vote_buffer():
+    """Return the process wide vote buffer,
+    None when buffered voting is disabled"""
+    global _buffer
+
+    config = dict(
+        DEFAULT_SETTINGS, **getattr(settings, 'CHAN_VOTE_BUFFER', {})
+    )
+
+    if not config['ENABLED']:
+        return None
+
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = VoteBuffer(
+                flush_interval=config['FLUSH_INTERVAL'],
+                max_batch_size=config['MAX_BATCH_SIZE']
+            )
+            atexit.register(_buffer.close)
+
+    return _buffer
@@ -0,0 +1,34 @@
+from django.db import transaction, IntegrityError
+
+from core.models import Upvote, Downvote
+
+
+OPPOSITE_VOTE = {
+    Upvote: Downvote,
+    Downvote: Upvote,
+}
+
+
+def toggle_vote(user, thread, vote_model):
+    """Toggle the vote of user on thread in a single transaction,
+    return True when the vote is cast and False when it is withdrawn"""
+    with transaction.atomic():
+        deleted, _ = vote_model.objects.filter(
+            user=user, thread=thread
+        ).delete()
+
+        if deleted:
+            return False
+
+        OPPOSITE_VOTE[vote_model].objects.filter(
+            user=user, thread=thread
+        ).delete()
+
+        try:
+            with transaction.atomic():
+                vote_model.objects.create(user=user, thread=thread)
+        except IntegrityError:
+            # A concurrent request has already cast the same vote
+            pass
+
+        return True
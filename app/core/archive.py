@@ -0,0 +1,200 @@
+import json
+import zlib
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from core.models import (
+    Board, Thread, Reply, Upvote, Downvote, ArchivedThread, SearchDocument
+)
+from core.signals import media_references
+from core.storage import acquire_media, release_media
+
+
+DEFAULT_SETTINGS = {
+    'MAX_THREADS': None,
+    'MAX_AGE_DAYS': None,
+    'BATCH_SIZE': 50,
+    'COMPRESSION_LEVEL': 6,
+}
+
+THREAD_FIELDS = [
+    'id', 'user__username', 'title', 'content', 'image', 'image_thumbnails',
+    'date_created', 'is_edited', 'last_bumped_at', 'reply_count',
+    'upvote_count', 'downvote_count',
+]
+
+REPLY_FIELDS = [
+    'id', 'user__username', 'text', 'image', 'image_thumbnails',
+    'date_created', 'is_edited', 'reply', 'depth', 'path', 'root_thread',
+]
+
+
+def get_archive_settings():
+    """Return archive settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'CHAN_ARCHIVE', {}))
+
+
+def board_limits(board, config):
+    """Return the thread cap and age limit of a board,
+    falling back to the configured defaults"""
+    max_threads = board.max_threads
+    max_age_days = board.max_age_days
+
+    if max_threads is None:
+        max_threads = config['MAX_THREADS']
+
+    if max_age_days is None:
+        max_age_days = config['MAX_AGE_DAYS']
+
+    return max_threads, max_age_days
+
+
+def expired_threads(board, config):
+    """Return ids of at most BATCH_SIZE threads of a board that fell
+    off its thread cap or were not bumped within its age limit"""
+    max_threads, max_age_days = board_limits(board, config)
+    threads = Thread.objects.filter(board=board)
+    size = config['BATCH_SIZE']
+
+    if max_age_days is not None:
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+        ids = list(threads.filter(
+            last_bumped_at__lt=cutoff
+        ).order_by('last_bumped_at', 'id').values_list('id', flat=True)[
+            :size
+        ])
+
+        if ids:
+            return ids
+
+    if max_threads is None:
+        return []
+
+    # Threads past the cap in bump order, read from the bump index
+    return list(threads.order_by('-last_bumped_at', '-id').values_list(
+        'id', flat=True
+    )[max_threads:max_threads + size])
+
+
+def decode_document(data):
+    """Return the thread document of an archive blob"""
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def delete_rows(model, field, values):
+    """Delete the rows of model whose field is one of values with one
+    raw DELETE, without the signals and cascades of ``.delete()``"""
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(values))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE '
+            f'{quote(model._meta.get_field(field).column)} '
+            f'IN ({placeholders})',
+            list(values)
+        )
+
+
+def archive_batch(ids, config):
+    """Move the given threads and their replies to the archive,
+    return the number of threads archived"""
+    with transaction.atomic():
+        # Locking the threads holds back replies to them meanwhile
+        threads = list(Thread.objects.select_for_update(
+            of=('self', )
+        ).filter(pk__in=ids).values(
+            'board_id', *THREAD_FIELDS
+        ).order_by('id'))
+
+        if not threads:
+            return 0
+
+        replies = {thread['id']: [] for thread in threads}
+        rows = Reply.objects.filter(
+            root_thread__in=list(replies)
+        ).values(*REPLY_FIELDS).order_by('root_thread', 'path')
+
+        for reply in rows.iterator():
+            replies[reply.pop('root_thread')].append(reply)
+
+        archives = []
+        reply_media = Counter()
+
+        for thread in threads:
+            board = thread.pop('board_id')
+            thread['user'] = thread.pop('user__username')
+            thread['replies'] = replies[thread['id']]
+            media = set(media_references(
+                Thread, thread['image'], thread['image_thumbnails']
+            ))
+
+            for reply in thread['replies']:
+                reply['user'] = reply.pop('user__username')
+                references = media_references(
+                    Reply, reply['image'], reply['image_thumbnails']
+                )
+                reply_media.update(references)
+                media |= references
+
+            archives.append(ArchivedThread(
+                id=thread['id'], board_id=board, title=thread['title'],
+                reply_count=thread['reply_count'],
+                score=thread['upvote_count'] - thread['downvote_count'],
+                date_created=thread['date_created'],
+                last_bumped_at=thread['last_bumped_at'],
+                media=sorted(media),
+                data=zlib.compress(
+                    json.dumps(thread, cls=DjangoJSONEncoder).encode(),
+                    config['COMPRESSION_LEVEL']
+                )
+            ))
+
+        ArchivedThread.objects.bulk_create(archives)
+
+        # Archives take their own reference before the deleted rows
+        # release theirs, so the files are never collected
+        acquire_media(Counter(
+            name for archive in archives for name in archive.media
+        ))
+
+        # Replies and votes go without their per row signals, the
+        # threads deleted below invalidate caches and notify clients
+        ids = [archive.id for archive in archives]
+        SearchDocument.objects.filter(thread__in=ids).delete()
+
+        delete_rows(Upvote, 'thread', ids)
+        delete_rows(Downvote, 'thread', ids)
+        delete_rows(Reply, 'root_thread', ids)
+
+        release_media(reply_media)
+        Thread.objects.filter(pk__in=ids).delete()
+
+    return len(archives)
+
+
+def archive_threads(boards=None, config=None):
+    """Archive every expired thread batch by batch,
+    return the number of threads archived"""
+    config = config or get_archive_settings()
+    archived = 0
+    boards = Board.objects.all() if boards is None else boards
+
+    for board in boards.order_by('id').iterator():
+        while True:
+            ids = expired_threads(board, config)
+            batch = archive_batch(ids, config) if ids else 0
+
+            if not batch:
+                break
+
+            archived += batch
+
+    return archived
@@ -0,0 +1,8 @@
+from django.db.backends.postgresql import base
+
+from core.db.pool import ManagedConnectionMixin
+
+
+class DatabaseWrapper(ManagedConnectionMixin, base.DatabaseWrapper):
+    """PostgreSQL backend with connection health checks and an optional
+    in-process connection pool, see ``ManagedConnectionMixin``"""
@@ -0,0 +1,52 @@
+from core.db.routers import (
+    get_replica_settings, start_replica_reads, stop_replica_reads
+)
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaMiddleware:
+    """Serve safe requests to views with ``replica_reads = True`` from
+    the read replicas
+
+    A successful unsafe request sets a cookie for STICKY_SECONDS, during
+    which the client reads from the primary and sees its own writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = request.__dict__.pop('_replica_token', None)
+
+            if token is not None:
+                stop_replica_reads(token)
+
+        config = get_replica_settings()
+
+        if (
+            config['DATABASES'] and request.method not in SAFE_METHODS and
+            response.status_code < 400
+        ):
+            response.set_cookie(
+                config['COOKIE_NAME'], '1',
+                max_age=config['STICKY_SECONDS'], httponly=True,
+                samesite='Lax'
+            )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        config = get_replica_settings()
+        view = getattr(view_func, 'cls', None)
+
+        if (
+            config['DATABASES'] and request.method in SAFE_METHODS and
+            config['COOKIE_NAME'] not in request.COOKIES and
+            getattr(view, 'replica_reads', False)
+        ):
+            request._replica_token = start_replica_reads()
@@ -0,0 +1,278 @@
+import threading
+import time
+
+from collections import Counter
+from contextlib import closing
+from functools import partial
+
+from django.db.utils import OperationalError
+from django.utils.functional import cached_property
+
+
+DEFAULT_SETTINGS = {
+    'MAX_SIZE': 0,
+    'TIMEOUT': 30,
+    'MAX_LIFETIME': 3600,
+    'MAX_IDLE': 300,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    """Raised when no pooled connection became available in time"""
+
+
+def is_connection_usable(conn):
+    """Return whether a DB-API connection still answers queries"""
+    try:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute('SELECT 1')
+    except Exception:
+        return False
+
+    return True
+
+
+def _close_quietly(conn):
+    """Close a connection that may already be broken"""
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """Thread-safe pool of at most MAX_SIZE DB-API connections
+
+    Idle connections are reused last in first out and are checked
+    before reuse when ``check`` is given. Connections older than
+    MAX_LIFETIME or idle for more than MAX_IDLE seconds are replaced.
+    Callers wait up to TIMEOUT seconds when every connection is in use.
+    """
+
+    def __init__(self, max_size, timeout=30, max_lifetime=None,
+                 max_idle=None, check=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check = check
+        self.condition = threading.Condition()
+        self.idle = []
+        self.in_use = {}
+        self.size = 0
+        self.counters = Counter()
+
+    def _expired(self, created, released=None):
+        now = time.monotonic()
+
+        if self.max_lifetime and now - created >= self.max_lifetime:
+            return True
+
+        return bool(
+            released is not None and self.max_idle and
+            now - released >= self.max_idle
+        )
+
+    def _take(self):
+        """Return an idle (connection, created, released) entry, or None
+        after reserving room for a new connection"""
+        deadline = time.monotonic() + self.timeout
+
+        with self.condition:
+            if not self.idle and self.size >= self.max_size:
+                self.counters['waits'] += 1
+
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    self.counters['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'No database connection available within '
+                        f'{self.timeout} seconds'
+                    )
+
+                self.condition.wait(remaining)
+
+            if self.idle:
+                return self.idle.pop()
+
+            self.size += 1
+
+    def _forget(self, conn):
+        """Close a connection and free its room in the pool"""
+        _close_quietly(conn)
+
+        with self.condition:
+            self.size -= 1
+            self.counters['discarded'] += 1
+            self.condition.notify()
+
+    def acquire(self, connect):
+        """Return a pooled connection, opened with connect() when no
+        idle connection can be reused"""
+        while True:
+            entry = self._take()
+
+            if entry is None:
+                try:
+                    conn = connect()
+                except Exception:
+                    with self.condition:
+                        self.size -= 1
+                        self.condition.notify()
+                    raise
+
+                with self.condition:
+                    self.in_use[id(conn)] = time.monotonic()
+                    self.counters['created'] += 1
+
+                return conn
+
+            conn, created, released = entry
+
+            if self._expired(created, released) or (
+                self.check is not None and not self.check(conn)
+            ):
+                self._forget(conn)
+                continue
+
+            with self.condition:
+                self.in_use[id(conn)] = created
+                self.counters['reused'] += 1
+
+            return conn
+
+    def release(self, conn, discard=False):
+        """Give a connection back, its open transaction is rolled back"""
+        with self.condition:
+            created = self.in_use.pop(id(conn), None)
+
+        if created is None:
+            _close_quietly(conn)
+            return
+
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard or self._expired(created):
+            self._forget(conn)
+            return
+
+        with self.condition:
+            self.idle.append((conn, created, time.monotonic()))
+            self.condition.notify()
+
+    def close(self):
+        """Close every idle connection"""
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.size -= len(idle)
+            self.condition.notify_all()
+
+        for conn, created, released in idle:
+            _close_quietly(conn)
+
+    def stats(self):
+        """Return pool occupancy and counters"""
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': len(self.in_use),
+                'created': self.counters['created'],
+                'reused': self.counters['reused'],
+                'discarded': self.counters['discarded'],
+                'waits': self.counters['waits'],
+                'timeouts': self.counters['timeouts'],
+            }
+
+
+def get_pool(alias, settings_dict):
+    """Return the shared pool of a database alias, None when the
+    database has no POOL or a MAX_SIZE of 0"""
+    config = dict(DEFAULT_SETTINGS, **(settings_dict.get('POOL') or {}))
+
+    if not config['MAX_SIZE']:
+        return None
+
+    with _pools_lock:
+        if alias not in _pools:
+            check = None
+
+            if settings_dict.get('CONN_HEALTH_CHECKS'):
+                check = is_connection_usable
+
+            _pools[alias] = ConnectionPool(
+                config['MAX_SIZE'], timeout=config['TIMEOUT'],
+                max_lifetime=config['MAX_LIFETIME'],
+                max_idle=config['MAX_IDLE'], check=check
+            )
+
+        return _pools[alias]
+
+
+def get_pools():
+    """Return the pools created so far by alias"""
+    with _pools_lock:
+        return dict(_pools)
+
+
+class ManagedConnectionMixin:
+    """Database wrapper mixin adding health checks of persistent
+    connections and an optional in-process connection pool
+
+    With ``CONN_HEALTH_CHECKS`` a connection kept from a previous
+    request (``CONN_MAX_AGE``) is checked before its first use in a
+    new request. With a ``POOL`` of MAX_SIZE > 0 closing the wrapper
+    gives the connection back to a pool shared by every thread, which
+    suits threaded and ASGI servers better than one persistent
+    connection per thread.
+    """
+    health_check_done = False
+
+    @cached_property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        connect = partial(super().get_new_connection, conn_params)
+
+        if self.pool is None:
+            return connect()
+
+        return self.pool.acquire(connect)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None and not self.health_check_done and
+            self.settings_dict.get('CONN_HEALTH_CHECKS')
+        ):
+            if not self.is_usable():
+                self.close()
+
+            self.health_check_done = True
+
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+
+        discard = self.errors_occurred and not self.is_usable()
+        self.pool.release(self.connection, discard=discard)
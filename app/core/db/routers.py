@@ -0,0 +1,72 @@
+import random
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+DEFAULT_SETTINGS = {
+    'DATABASES': [],
+    'STICKY_SECONDS': 10,
+    'COOKIE_NAME': 'chan_primary',
+}
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def get_replica_settings():
+    """Return read replica settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'CHAN_REPLICAS', {}))
+
+
+def start_replica_reads():
+    """Route the reads of the current context to the read replicas,
+    return a token for ``stop_replica_reads``"""
+    return _replica_reads.set(True)
+
+
+def stop_replica_reads(token):
+    """Restore the routing in place before ``start_replica_reads``"""
+    _replica_reads.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    """Route the reads made within the block to the read replicas"""
+    token = start_replica_reads()
+    try:
+        yield
+    finally:
+        stop_replica_reads(token)
+
+
+@contextmanager
+def primary_reads():
+    """Route the reads made within the block to the primary, even
+    inside ``replica_reads()``"""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads made within ``replica_reads()`` to a random read
+    replica, every other query goes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        aliases = get_replica_settings()['DATABASES']
+
+        if aliases and _replica_reads.get():
+            return random.choice(aliases)
+
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
@@ -0,0 +1,215 @@
+import io
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction, close_old_connections
+
+from PIL import Image, ImageOps
+
+from core.models import MediaBlob, ImageStatus, thumbnail_file_path
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'EAGER': False,
+    'WORKERS': 2,
+    'MAX_DIMENSION': 8000,
+    'MAX_PIXELS': 40000000,
+    'THUMBNAIL_SIZES': {'small': 150, 'medium': 480},
+    'QUALITY': 85,
+}
+
+
+# Leading bytes of the image formats accepted on upload, the files are
+# only decoded by the workers
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+    (b'BM', 'BMP'),
+    (b'II*\x00', 'TIFF'),
+    (b'MM\x00*', 'TIFF'),
+]
+
+
+class ImageRejected(Exception):
+    """Raised when an uploaded image fails validation"""
+
+
+def get_image_settings():
+    """Return image settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'CHAN_IMAGES', {}))
+
+
+def sniff_image(file):
+    """Return the format of an image file read from its first bytes,
+    None when it is not an accepted image"""
+    position = file.tell()
+    header = file.read(12)
+    file.seek(position)
+
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+
+    for signature, format in SIGNATURES:
+        if header.startswith(signature):
+            return format
+
+    return None
+
+
+def _encode(image, format, quality):
+    """Return image encoded in format, without metadata"""
+    buffer = io.BytesIO()
+
+    if format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    image.save(buffer, format=format, quality=quality)
+
+    return buffer.getvalue()
+
+
+def ingest_image(storage, name, config):
+    """Validate the stored image, re-encode it without its metadata and
+    write its thumbnails, return the new name and the thumbnails"""
+    try:
+        with storage.open(name, 'rb') as file:
+            image = Image.open(file)
+            width, height = image.size
+
+            if max(width, height) > config['MAX_DIMENSION'] or (
+                width * height > config['MAX_PIXELS']
+            ):
+                raise ImageRejected(f'{width}x{height} image is too large')
+
+            image.load()
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise ImageRejected(str(exc))
+
+    # Every upload is written again, EXIF, comments and other chunks
+    # are not saved along
+    format = image.format
+    image = ImageOps.exif_transpose(image)
+    content = _encode(image, format, config['QUALITY'])
+    name = storage.save(name, ContentFile(content))
+
+    thumbnails = {}
+
+    for size, edge in config['THUMBNAIL_SIZES'].items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((edge, edge))
+        thumbnails[size] = storage.save(
+            thumbnail_file_path(name, size),
+            ContentFile(_encode(thumbnail, 'JPEG', config['QUALITY']))
+        )
+
+    return name, thumbnails
+
+
+def process_image(model, pk, field, name, config=None):
+    """Ingest the image stored in field of a model instance and save
+    its processing status, skipped when the image was replaced"""
+    config = config or get_image_settings()
+    status_field = f'{field}_status'
+    thumbnails_field = f'{field}_thumbnails'
+
+    instance = model.objects.filter(pk=pk).first()
+
+    if instance is None or getattr(instance, field).name != name:
+        return
+
+    # The same stored file was already processed for another row
+    processed = MediaBlob.objects.filter(
+        name=name, thumbnails__isnull=False
+    ).values_list('thumbnails', flat=True).first()
+
+    try:
+        if processed is not None:
+            new_name, thumbnails = name, processed
+        else:
+            new_name, thumbnails = ingest_image(
+                getattr(instance, field).storage, name, config
+            )
+        status = ImageStatus.READY
+    except ImageRejected as exc:
+        # The file itself is removed once it is no longer referenced
+        logger.warning('Rejected image %s: %s', name, exc)
+        new_name = model._meta.get_field(field).get_default() or None
+        thumbnails, status = {}, ImageStatus.FAILED
+
+    update_fields = [field, status_field, thumbnails_field]
+
+    if any(f.name == 'date_modified' for f in model._meta.fields):
+        update_fields.append('date_modified')
+
+    with transaction.atomic():
+        instance = model.objects.select_for_update().filter(pk=pk).first()
+
+        if instance is None or getattr(instance, field).name != name:
+            return
+
+        setattr(instance, field, new_name)
+        setattr(instance, status_field, status)
+        setattr(instance, thumbnails_field, thumbnails)
+        instance.save(update_fields=update_fields)
+
+        if status == ImageStatus.READY:
+            MediaBlob.objects.filter(name=new_name).update(
+                thumbnails=thumbnails
+            )
+
+
+class ImagePipeline:
+    """Worker pool processing uploaded images off the request thread"""
+
+    def __init__(self, workers=2):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='chan-images'
+        )
+
+    def _run(self, *args):
+        """Process one image with a fresh db connection"""
+        close_old_connections()
+        try:
+            process_image(*args)
+        except Exception:
+            logger.exception('Processing image %s failed', args[3])
+        finally:
+            close_old_connections()
+
+    def submit(self, model, pk, field, name):
+        """Queue an image for processing"""
+        self.executor.submit(self._run, model, pk, field, name)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_image_pipeline():
+    """Return the process wide image worker pool"""
+    global _pipeline
+
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = ImagePipeline(workers=get_image_settings()['WORKERS'])
+
+    return _pipeline
+
+
+def schedule_image(model, pk, field, name):
+    """Process an uploaded image once the upload is committed,
+    synchronously when EAGER is set"""
+    if get_image_settings()['EAGER']:
+        return process_image(model, pk, field, name)
+
+    transaction.on_commit(
+        lambda: get_image_pipeline().submit(model, pk, field, name)
+    )
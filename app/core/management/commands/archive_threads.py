@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.archive import archive_threads
+from core.models import Board
+
+
+class Command(BaseCommand):
+    """Django command to move threads past the thread cap or age limit
+    of their board to the archive, meant to run periodically"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--board', type=int, action='append', dest='boards',
+            help='Only archive threads of the given board, may be repeated'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Archiving threads...')
+        boards = None
+
+        if options['boards']:
+            boards = Board.objects.filter(id__in=options['boards'])
+
+        archived = archive_threads(boards=boards)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{archived} thread(s) archived!')
+        )
@@ -0,0 +1,35 @@
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.core.management.base import BaseCommand
+
+from core.models import Thread, Reply, Upvote, Downvote
+from core.signals import latest_reply_date, count_per_thread
+
+
+class Command(BaseCommand):
+    """Django command to recompute denormalized thread statistics
+    (bump order, reply and vote counters) from existing rows"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--board', type=int, action='append', dest='boards',
+            help='Only backfill threads of the given board id'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Backfilling thread statistics...')
+        threads = Thread.objects.all()
+
+        if options['boards']:
+            threads = threads.filter(board__id__in=options['boards'])
+
+        updated = threads.update(
+            last_bumped_at=Coalesce(latest_reply_date(), F('date_created')),
+            reply_count=count_per_thread(Reply, 'root_thread'),
+            upvote_count=count_per_thread(Upvote),
+            downvote_count=count_per_thread(Downvote)
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{updated} thread(s) backfilled!')
+        )
@@ -0,0 +1,189 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_databases, teardown_databases
+)
+
+from chan.bench.data import DEFAULT_SIZES, generate
+from chan.bench.rendering import run_rendering
+from chan.bench.runner import compare, run_benchmarks
+from chan.bench.scenarios import SCENARIOS
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the API against a synthetic data set
+
+    The data set is generated in a throwaway test database of the
+    configured database (SQLite or PostgreSQL) and the scenarios are
+    run in process, so results measure the application and the
+    database without any network or server overhead.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            choices=list(SCENARIOS),
+            help='Scenario to run, may be repeated, every one by default'
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=200,
+            help='Number of requests per scenario'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=20,
+            help='Number of unmeasured requests before each scenario'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Number of threads sending requests'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed of the data set and of the scenarios'
+        )
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Multiplier of the number of users, boards and threads'
+        )
+        parser.add_argument(
+            '--rendering', action='store_true',
+            help='Also measure the cost per row of rendering threads and '
+                 'replies with the serializers and with the fast path'
+        )
+        parser.add_argument(
+            '--output', help='File to write the JSON results to'
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the benchmark database between runs'
+        )
+        parser.add_argument(
+            '--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+            help='Compare two result files instead of running'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=10.0,
+            help='Change in percent reported as a regression'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when a regression is found'
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(*options['compare'], options)
+
+        if options['concurrency'] > 1 and connection.vendor == 'sqlite':
+            raise CommandError(
+                'SQLite test databases are not shared between threads, '
+                'use PostgreSQL for concurrent benchmarks'
+            )
+
+        sizes = {
+            key: max(int(value * options['scale']), 1)
+            if key in ('USERS', 'BOARDS', 'THREADS') else value
+            for key, value in DEFAULT_SIZES.items()
+        }
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options['keepdb']
+        )
+
+        try:
+            # Throttled requests would be timed as fast 429 responses
+            with override_settings(
+                DEBUG=False, CHAN_THROTTLES={'ENABLED': False}
+            ):
+                self.stdout.write('Generating data set...')
+                dataset = generate(seed=options['seed'], sizes=sizes)
+                self.stdout.write(
+                    ', '.join(
+                        f'{n} {label}(s)' for label, n in dataset.items()
+                    )
+                )
+                results = run_benchmarks(
+                    options['scenarios'] or list(SCENARIOS),
+                    options['iterations'], warmup=options['warmup'],
+                    concurrency=options['concurrency'],
+                    seed=options['seed'], dataset=dataset
+                )
+
+                if options['rendering']:
+                    results['rendering'] = run_rendering()
+        finally:
+            teardown_databases(
+                old_config, verbosity=0, keepdb=options['keepdb']
+            )
+
+        self.write_results(results)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+            self.stdout.write(
+                self.style.SUCCESS(f'Results written to {options["output"]}')
+            )
+
+    def write_results(self, results):
+        """Print a table of the results"""
+        self.stdout.write(
+            f'{"scenario":<12}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}'
+            f'{"p99 ms":>10}{"queries":>10}{"errors":>8}'
+        )
+
+        for name, result in results['scenarios'].items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{name:<12}{result["throughput"]:>10}{latency["p50"]:>10}'
+                f'{latency["p95"]:>10}{latency["p99"]:>10}'
+                f'{result["queries"]["mean"]:>10}{result["errors"]:>8}'
+            )
+
+        if 'rendering' not in results:
+            return
+
+        self.stdout.write(
+            f'{"rendering":<12}{"rows":>10}{"drf us/row":>12}'
+            f'{"fast us/row":>12}{"speedup":>10}'
+        )
+
+        for name, result in results['rendering'].items():
+            self.stdout.write(
+                f'{name:<12}{result["rows"]:>10}{result["serializer_us"]:>12}'
+                f'{result["fast_path_us"]:>12}{result["speedup"]:>10}'
+            )
+
+    def compare(self, baseline, current, options):
+        """Print the changes between two result files"""
+        try:
+            with open(baseline) as f:
+                baseline_results = json.load(f)
+
+            with open(current) as f:
+                current_results = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        rows = compare(baseline_results, current_results, options['threshold'])
+
+        for row in rows:
+            line = (
+                f'{row["scenario"]:<12}{row["metric"]:<16}'
+                f'{row["baseline"]:>12}{row["current"]:>12}'
+                f'{row["change"]:>+9.1f}%'
+            )
+            self.stdout.write(
+                self.style.ERROR(line) if row['regression'] else line
+            )
+
+        regressions = sum(row['regression'] for row in rows)
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{regressions} regression(s) found')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{regressions} regression(s) found')
+        )
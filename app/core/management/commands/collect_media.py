@@ -0,0 +1,82 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import ArchivedThread, MediaBlob
+from core.signals import IMAGE_FIELDS, media_references
+
+
+class Command(BaseCommand):
+    """Django command to delete stored media files that are no longer
+    referenced by any user, thread or reply"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=60,
+            help='Minutes a file stays unreferenced before it is deleted'
+        )
+        parser.add_argument(
+            '--recount', action='store_true',
+            help='Recompute reference counts from existing rows first'
+        )
+
+    def recount(self):
+        """Recompute every reference count from the image fields
+        and the archived threads"""
+        counts = Counter()
+
+        for model, field in IMAGE_FIELDS.items():
+            rows = model.objects.values_list(field, f'{field}_thumbnails')
+
+            for name, thumbnails in rows.iterator():
+                counts.update(media_references(model, name, thumbnails))
+
+        archives = ArchivedThread.objects.values_list('media', flat=True)
+
+        for media in archives.iterator():
+            counts.update(media)
+
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(name=name) for name in counts],
+            ignore_conflicts=True, batch_size=500
+        )
+        blobs = list(MediaBlob.objects.only('id', 'name'))
+
+        for blob in blobs:
+            blob.ref_count = counts.get(blob.name, 0)
+
+        MediaBlob.objects.bulk_update(blobs, ['ref_count'], batch_size=500)
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            self.stdout.write('Recounting media references...')
+            self.recount()
+
+        self.stdout.write('Collecting unreferenced media...')
+        cutoff = timezone.now() - timedelta(minutes=options['grace'])
+        garbage = MediaBlob.objects.filter(
+            ref_count=0, date_modified__lt=cutoff
+        )
+        deleted = 0
+
+        for name in garbage.values_list('name', flat=True).iterator():
+            with transaction.atomic():
+                # Only delete the file if it was not referenced or
+                # uploaded again meanwhile, uploads of the same content
+                # wait for the lock before reusing the file
+                blob = garbage.select_for_update().filter(name=name).first()
+
+                if blob is None:
+                    continue
+
+                default_storage.delete(name)
+                blob.delete()
+                deleted += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{deleted} file(s) deleted!')
+        )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from core.ndjson import export_records
+
+
+class Command(BaseCommand):
+    """Django command to export boards, threads, replies and votes
+    as NDJSON, one row per line"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='File to write to, standard output by default'
+        )
+        parser.add_argument(
+            '--board', type=int, action='append', dest='boards',
+            help='Only export the given board, may be repeated'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of rows fetched from the database at a time'
+        )
+
+    def handle(self, *args, **options):
+        records = export_records(
+            boards=options['boards'], chunk_size=options['chunk_size']
+        )
+
+        if options['output'] == '-':
+            # Lines already end with a newline
+            self.stdout.ending = ''
+            exported = self.write_records(self.stdout, records)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as out:
+                exported = self.write_records(out, records)
+
+        # Progress goes to stderr so that stdout only holds the dump
+        self.stderr.write(f'{exported} row(s) exported!')
+
+    def write_records(self, out, records):
+        """Write every record to out, return the number written"""
+        exported = 0
+
+        for line in records:
+            out.write(line)
+            exported += 1
+
+        return exported
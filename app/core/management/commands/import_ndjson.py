@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ndjson import DumpError, import_records
+
+
+class Command(BaseCommand):
+    """Django command to import boards, threads, replies and votes
+    from an NDJSON dump, keeping their ids"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', nargs='?', default='-',
+            help='File to read from, standard input by default'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows inserted at a time'
+        )
+
+    def progress(self, label, stats):
+        self.stdout.write(
+            f"{label}: {stats['imported']} imported, "
+            f"{stats['skipped']} skipped"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Importing rows...')
+
+        try:
+            if options['input'] == '-':
+                stats = import_records(
+                    sys.stdin, options['batch_size'], self.progress
+                )
+            else:
+                with open(options['input'], encoding='utf-8') as lines:
+                    stats = import_records(
+                        lines, options['batch_size'], self.progress
+                    )
+        except (OSError, DumpError) as e:
+            raise CommandError(e)
+
+        imported = sum(stat['imported'] for stat in stats.values())
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{imported} row(s) imported!')
+        )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from core.images import process_image
+from core.models import ImageStatus
+from core.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    """Django command to process uploaded images without thumbnails,
+    e.g. images uploaded before the pipeline existed or left pending
+    by a restarted worker"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--failed', action='store_true',
+            help='Also retry images that failed processing'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Processing images...')
+        statuses = [ImageStatus.NONE, ImageStatus.PENDING]
+
+        if options['failed']:
+            statuses.append(ImageStatus.FAILED)
+
+        processed = 0
+
+        for model, field in IMAGE_FIELDS.items():
+            default = model._meta.get_field(field).get_default() or ''
+            rows = model.objects.filter(
+                **{f'{field}_status__in': statuses}
+            ).exclude(
+                **{f'{field}__isnull': True}
+            ).exclude(
+                **{f'{field}__in': {'', default}}
+            ).values_list('pk', field)
+
+            for pk, name in rows.iterator():
+                process_image(model, pk, field, name)
+                processed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{processed} image(s) processed!')
+        )
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models import (
+    CharField, F, OuterRef, Subquery, Value
+)
+from django.db.models.functions import Cast, Concat, LPad
+from django.core.management.base import BaseCommand
+
+from core.models import Reply
+
+
+class Command(BaseCommand):
+    """Django command to rebuild root thread, depth and materialized
+    path of existing replies, one tree level per query"""
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding reply tree...')
+        node = LPad(Cast('id', CharField()), 10, Value('0'))
+
+        with transaction.atomic():
+            updated = Reply.objects.filter(reply__isnull=True).update(
+                root_thread=F('thread'), depth=0, path=node
+            )
+            Reply.objects.filter(reply__isnull=False).update(path='')
+            self.stdout.write(f'Level 0: {updated} reply(s)')
+
+            level = 1
+            while updated:
+                parents = Reply.objects.filter(pk=OuterRef('reply'))
+                updated = Reply.objects.filter(
+                    path='', reply__path__gt=''
+                ).update(
+                    root_thread=Subquery(parents.values('root_thread')[:1]),
+                    depth=Subquery(parents.values('depth')[:1]) + 1,
+                    path=Concat(
+                        Subquery(parents.values('path')[:1]),
+                        Value('.'),
+                        node,
+                        output_field=CharField()
+                    )
+                )
+                if updated:
+                    self.stdout.write(f'Level {level}: {updated} reply(s)')
+                level += 1
+
+        self.stdout.write(self.style.SUCCESS('Reply tree rebuilt!'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the search index of every thread
+    and reply"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of rows indexed per batch'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding search index...')
+
+        with transaction.atomic():
+            indexed = rebuild_index(batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{indexed} document(s) indexed!')
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.ranking import recompute_scores, recompute_recent_scores
+
+
+class Command(BaseCommand):
+    """Django command to recompute hot and top scores of recently
+    active threads, meant to run periodically (e.g. every minute)"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute the scores of every thread'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Recomputing thread scores...')
+
+        if options['all']:
+            updated = recompute_scores()
+        else:
+            updated = recompute_recent_scores()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{updated} thread(s) updated!')
+        )
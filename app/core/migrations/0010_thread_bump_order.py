@@ -0,0 +1,32 @@
+# Generated by Django 3.1.14 on 2026-10-17 00:31
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_remove_reply_is_deleted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='last_bumped_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['board', '-last_bumped_at'], name='thread_board_bump_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-last_bumped_at'], name='thread_bump_idx'),
+        ),
+    ]
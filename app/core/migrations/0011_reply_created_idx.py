@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-17 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_thread_bump_order'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reply',
+            index=models.Index(fields=['date_created', 'id'], name='reply_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.14 on 2026-10-17 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_reply_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='downvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
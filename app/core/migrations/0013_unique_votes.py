@@ -0,0 +1,35 @@
+# Generated by Django 3.1.14 on 2026-10-17 00:34
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_votes(apps, schema_editor):
+    """Keep only the oldest vote of each user per thread"""
+    for model_name in ['Upvote', 'Downvote']:
+        model = apps.get_model('core', model_name)
+        keep = model.objects.values('user', 'thread').annotate(
+            first_id=Min('id')
+        ).values('first_id')
+        model.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_thread_vote_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_votes, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='downvote',
+            constraint=models.UniqueConstraint(fields=('user', 'thread'), name='unique_downvote_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='upvote',
+            constraint=models.UniqueConstraint(fields=('user', 'thread'), name='unique_upvote_per_user'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.14 on 2026-10-17 00:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_unique_votes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reply',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reply',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=1024),
+        ),
+        migrations.AddField(
+            model_name='reply',
+            name='root_thread',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_replies', to='core.thread'),
+        ),
+        migrations.AddIndex(
+            model_name='reply',
+            index=models.Index(fields=['root_thread', 'path'], name='reply_tree_idx'),
+        ),
+    ]
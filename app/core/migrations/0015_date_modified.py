@@ -0,0 +1,33 @@
+# Generated by Django 3.1.14 on 2026-10-17 01:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_reply_tree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='date_modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='reply',
+            name='date_modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='date_modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['board', 'date_modified'], name='thread_board_modified_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-17 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_date_modified'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reply',
+            index=models.Index(fields=['root_thread', 'id'], name='reply_thread_id_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.1.14 on 2026-10-17 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_reply_thread_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reply',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='', editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name='reply',
+            name='image_thumbnails',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='', editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='image_thumbnails',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='', editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_thumbnails',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.1.14 on 2026-10-17 00:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_search_vector(apps, schema_editor):
+    """Add the tsvector column and its GIN index on PostgreSQL"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        'ALTER TABLE core_searchdocument ADD COLUMN vector tsvector'
+    )
+    schema_editor.execute(
+        'CREATE INDEX searchdocument_vector_idx '
+        'ON core_searchdocument USING gin (vector)'
+    )
+
+
+def remove_search_vector(apps, schema_editor):
+    """Drop the tsvector column and its GIN index on PostgreSQL"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        'ALTER TABLE core_searchdocument DROP COLUMN vector'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_media_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_created', models.DateTimeField()),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.board')),
+                ('reply', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.reply')),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.thread')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='core.searchdocument')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'document'], name='searchterm_term_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(condition=models.Q(reply=None), fields=('thread',), name='unique_thread_document'),
+        ),
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
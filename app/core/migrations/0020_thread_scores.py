@@ -0,0 +1,39 @@
+# Generated by Django 3.1.14 on 2026-10-17 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='top_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['board', '-hot_score', '-id'], name='thread_board_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-hot_score', '-id'], name='thread_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['board', '-top_score', '-id'], name='thread_board_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-top_score', '-id'], name='thread_top_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.1.14 on 2026-10-17 01:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_thread_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='max_age_days',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='max_threads',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedThread',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('reply_count', models.PositiveIntegerField(default=0)),
+                ('score', models.IntegerField(default=0)),
+                ('date_created', models.DateTimeField()),
+                ('last_bumped_at', models.DateTimeField()),
+                ('date_archived', models.DateTimeField(auto_now_add=True)),
+                ('media', models.JSONField(default=list)),
+                ('data', models.BinaryField()),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_threads', to='core.board')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedthread',
+            index=models.Index(fields=['board', 'date_archived', 'id'], name='archivedthread_board_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedthread',
+            index=models.Index(fields=['date_archived', 'id'], name='archivedthread_date_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ import os
 import uuid
 
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     PermissionsMixin,
@@ -34,6 +35,36 @@ def reply_img_file_path(instance, filename):
     return os.path.join('uploads/reply/', filename)
 
 
+def thumbnail_file_path(name, size):
+    """Generating the file path of an image thumbnail"""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+
+    return os.path.join(directory, 'thumbs', f'{stem}_{size}.jpg')
+
+
+REPLY_PATH_MAX_LENGTH = 1024
+
+# Deepest reply whose path of 10 digit nodes fits REPLY_PATH_MAX_LENGTH
+MAX_REPLY_DEPTH = (REPLY_PATH_MAX_LENGTH + 1) // 11 - 1
+
+
+def reply_tree_path(reply_id, parent_path=''):
+    """Generating the materialized path of a reply, sorting replies
+    by path gives the reply tree in depth-first order"""
+    node = f'{reply_id:010d}'
+
+    return f'{parent_path}.{node}' if parent_path else node
+
+
+class ImageStatus(models.TextChoices):
+    """Processing state of an uploaded image"""
+    NONE = '', 'No image'
+    PENDING = 'pending', 'Pending'
+    READY = 'ready', 'Ready'
+    FAILED = 'failed', 'Failed'
+
+
 class UserManager(BaseUserManager):
     """Custom user model manager to support custom user model"""
 
@@ -74,6 +105,11 @@ class User(AbstractBaseUser, PermissionsMixin):
         upload_to=avatar_file_path,
         default='uploads/defaults/default.png'
     )
+    avatar_status = models.CharField(
+        max_length=8, choices=ImageStatus.choices,
+        default=ImageStatus.NONE, blank=True, editable=False
+    )
+    avatar_thumbnails = models.JSONField(default=dict, editable=False)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
 
@@ -98,6 +134,9 @@ class Board(models.Model):
     name = models.CharField(max_length=255, unique=True)
     code = models.CharField(max_length=4, unique=True)
     date_created = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+    max_threads = models.PositiveIntegerField(null=True, blank=True)
+    max_age_days = models.PositiveIntegerField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -111,15 +150,64 @@ class Thread(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
     image = models.ImageField(upload_to=thread_img_file_path, null=True)
+    image_status = models.CharField(
+        max_length=8, choices=ImageStatus.choices,
+        default=ImageStatus.NONE, blank=True, editable=False
+    )
+    image_thumbnails = models.JSONField(default=dict, editable=False)
     date_created = models.DateTimeField(auto_now_add=True)
     board = models.ForeignKey(
         'Board', on_delete=models.CASCADE, related_name='thread'
     )
     is_edited = models.BooleanField(default=False)
+    date_modified = models.DateTimeField(auto_now=True)
+    last_bumped_at = models.DateTimeField(default=timezone.now)
+    reply_count = models.PositiveIntegerField(default=0)
+    upvote_count = models.PositiveIntegerField(default=0)
+    downvote_count = models.PositiveIntegerField(default=0)
+    hot_score = models.FloatField(default=0)
+    top_score = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['board', '-last_bumped_at'],
+                name='thread_board_bump_idx'
+            ),
+            models.Index(
+                fields=['-last_bumped_at'],
+                name='thread_bump_idx'
+            ),
+            models.Index(
+                fields=['board', 'date_modified'],
+                name='thread_board_modified_idx'
+            ),
+            models.Index(
+                fields=['board', '-hot_score', '-id'],
+                name='thread_board_hot_idx'
+            ),
+            models.Index(
+                fields=['-hot_score', '-id'],
+                name='thread_hot_idx'
+            ),
+            models.Index(
+                fields=['board', '-top_score', '-id'],
+                name='thread_board_top_idx'
+            ),
+            models.Index(
+                fields=['-top_score', '-id'],
+                name='thread_top_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def score(self):
+        """Return the vote score of the thread"""
+        return self.upvote_count - self.downvote_count
+
 
 class Reply(models.Model):
     """Reply model for thread"""
@@ -129,6 +217,11 @@ class Reply(models.Model):
     )
     text = models.TextField()
     image = models.ImageField(upload_to=reply_img_file_path, null=True)
+    image_status = models.CharField(
+        max_length=8, choices=ImageStatus.choices,
+        default=ImageStatus.NONE, blank=True, editable=False
+    )
+    image_thumbnails = models.JSONField(default=dict, editable=False)
     date_created = models.DateTimeField(auto_now_add=True)
     thread = models.ForeignKey(
         'Thread',
@@ -143,6 +236,35 @@ class Reply(models.Model):
         null=True
     )
     is_edited = models.BooleanField(default=False)
+    date_modified = models.DateTimeField(auto_now=True)
+    root_thread = models.ForeignKey(
+        'Thread',
+        on_delete=models.CASCADE,
+        related_name='thread_replies',
+        null=True,
+        editable=False
+    )
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    path = models.CharField(
+        max_length=REPLY_PATH_MAX_LENGTH, blank=True, default='',
+        editable=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['date_created', 'id'],
+                name='reply_created_idx'
+            ),
+            models.Index(
+                fields=['root_thread', 'path'],
+                name='reply_tree_idx'
+            ),
+            models.Index(
+                fields=['root_thread', 'id'],
+                name='reply_thread_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -160,6 +282,14 @@ class Upvote(models.Model):
         related_name='upvote_thread'
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'thread'],
+                name='unique_upvote_per_user'
+            ),
+        ]
+
 
 class Downvote(models.Model):
     """Upvote model for thread"""
@@ -172,3 +302,113 @@ class Downvote(models.Model):
         on_delete=models.CASCADE,
         related_name='downvote_thread'
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'thread'],
+                name='unique_downvote_per_user'
+            ),
+        ]
+
+
+class ArchivedThread(models.Model):
+    """Thread moved out of the live tables by ``archive_threads``
+
+    The id is the id of the archived thread, the thread, its replies
+    and their images are kept in ``data`` as zlib compressed JSON and
+    the stored files they use stay referenced through ``media``.
+    """
+    id = models.IntegerField(primary_key=True)
+    board = models.ForeignKey(
+        'Board', on_delete=models.CASCADE, related_name='archived_threads'
+    )
+    title = models.CharField(max_length=255)
+    reply_count = models.PositiveIntegerField(default=0)
+    score = models.IntegerField(default=0)
+    date_created = models.DateTimeField()
+    last_bumped_at = models.DateTimeField()
+    date_archived = models.DateTimeField(auto_now_add=True)
+    media = models.JSONField(default=list)
+    data = models.BinaryField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['board', 'date_archived', 'id'],
+                name='archivedthread_board_idx'
+            ),
+            models.Index(
+                fields=['date_archived', 'id'],
+                name='archivedthread_date_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class MediaBlob(models.Model):
+    """Stored media file referenced by user, thread and reply images"""
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    thumbnails = models.JSONField(null=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['date_modified'],
+                name='mediablob_garbage_idx',
+                condition=models.Q(ref_count=0)
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class SearchDocument(models.Model):
+    """Search index entry of a thread (reply is null) or of a reply
+
+    On PostgreSQL the table also has a ``vector`` tsvector column with
+    a GIN index, created by migration 0019, other databases use the
+    ``SearchTerm`` postings instead.
+    """
+    thread = models.ForeignKey(
+        'Thread', on_delete=models.CASCADE, related_name='+'
+    )
+    reply = models.OneToOneField(
+        'Reply', on_delete=models.CASCADE, null=True, related_name='+'
+    )
+    board = models.ForeignKey(
+        'Board', on_delete=models.CASCADE, related_name='+'
+    )
+    date_created = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['thread'],
+                condition=models.Q(reply=None),
+                name='unique_thread_document'
+            ),
+        ]
+
+
+class SearchTerm(models.Model):
+    """Posting of a term in a search document"""
+    document = models.ForeignKey(
+        'SearchDocument', on_delete=models.CASCADE, related_name='terms'
+    )
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['term', 'document'],
+                name='searchterm_term_idx'
+            ),
+        ]
@@ -0,0 +1,344 @@
+import json
+
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from core.models import Board, Thread, Reply, Upvote, Downvote
+from core.search import index_threads, index_replies
+from core.signals import (
+    count_per_thread, instance_media_references, records_imported
+)
+from core.storage import acquire_media
+
+
+# Dump order, referenced rows always come before the rows using them
+MODELS = {
+    'board': Board,
+    'thread': Thread,
+    'reply': Reply,
+    'upvote': Upvote,
+    'downvote': Downvote,
+}
+
+# Lookup restricting each model to the given boards
+BOARD_LOOKUPS = {
+    'board': 'id__in',
+    'thread': 'board__in',
+    'reply': 'root_thread__board__in',
+    'upvote': 'thread__board__in',
+    'downvote': 'thread__board__in',
+}
+
+
+class DumpEncoder(DjangoJSONEncoder):
+    """JSON encoder keeping the microseconds of datetimes"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+
+        return super().default(o)
+
+
+class DumpError(ValueError):
+    """Raised when a dump line cannot be imported"""
+
+
+def _foreign_keys(model):
+    """Return the foreign key fields of model"""
+    return [
+        field for field in model._meta.concrete_fields
+        if field.is_relation
+    ]
+
+
+def _is_user(field):
+    """Return whether field references the user model"""
+    return field.related_model is get_user_model()
+
+
+def export_records(boards=None, chunk_size=2000):
+    """Yield every row as an NDJSON line, streamed from the database
+    with server-side cursors, users are referenced by username"""
+    encoder = DumpEncoder()
+
+    for label, model in MODELS.items():
+        fields = model._meta.concrete_fields
+        columns = [
+            f'{field.name}__username' if _is_user(field) else field.attname
+            for field in fields
+        ]
+        rows = model.objects.order_by('id')
+
+        if boards:
+            rows = rows.filter(**{BOARD_LOOKUPS[label]: boards})
+
+        for row in rows.values_list(*columns).iterator(chunk_size):
+            record = {'model': label}
+            record.update(
+                (field.name, value) for field, value in zip(fields, row)
+            )
+
+            yield encoder.encode(record) + '\n'
+
+
+class Importer:
+    """Batched NDJSON importer keeping primary keys
+
+    Rows are buffered per model and written with ``bulk_create`` every
+    ``batch_size`` rows, foreign keys of a batch are resolved with one
+    query per referenced model. Rows referencing missing users or rows
+    and rows whose id already exists are skipped. Signals are not sent
+    by ``bulk_create``, so imported posts are indexed and their media
+    referenced here, the counters of the threads imported into are
+    recomputed and ``records_imported`` is sent once every row is in.
+    """
+
+    def __init__(self, batch_size=1000, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.pending = {}
+        self.stats = {
+            label: {'imported': 0, 'skipped': 0} for label in MODELS
+        }
+        self.board_ids = set()
+        self.thread_ids = set()
+
+    def feed(self, lines):
+        """Import every line of an iterable of lines"""
+        for number, line in enumerate(lines, 1):
+            if isinstance(line, bytes):
+                line = line.decode()
+
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+                label = record.pop('model', None)
+            except (ValueError, AttributeError):
+                label = None
+
+            if not isinstance(label, str) or label not in MODELS:
+                raise DumpError(f'Invalid record on line {number}')
+
+            # Models are imported in dump order, so earlier models
+            # are flushed before their rows are referenced
+            for other in list(self.pending):
+                if other != label:
+                    self.flush(other)
+
+            batch = self.pending.setdefault(label, [])
+            batch.append(record)
+
+            if len(batch) >= self.batch_size:
+                self.flush(label)
+
+        for label in list(self.pending):
+            self.flush(label)
+
+        self.reset_sequences()
+        self.recount()
+        records_imported.send(
+            sender=self.__class__, board_ids=self.board_ids,
+            thread_ids=self.thread_ids
+        )
+
+        return self.stats
+
+    def _resolve(self, model, batch):
+        """Replace usernames by user ids and drop rows referencing
+        missing rows, return the rows left"""
+        valid = batch
+
+        # Self references are resolved last, once the rows they may
+        # point to in the batch are known to be kept
+        fields = sorted(
+            _foreign_keys(model),
+            key=lambda field: field.related_model is model
+        )
+
+        for field in fields:
+            values = {
+                record.get(field.name) for record in valid
+            } - {None}
+
+            if _is_user(field):
+                found = dict(
+                    get_user_model().objects.filter(
+                        username__in=values
+                    ).values_list('username', 'id')
+                )
+            else:
+                found = set(
+                    field.related_model.objects.filter(
+                        pk__in=values
+                    ).values_list('pk', flat=True)
+                )
+
+                # Rows of the same batch may reference each other
+                if field.related_model is model:
+                    return self._resolve_parents(field, valid, found)
+
+            resolved = []
+
+            for record in valid:
+                value = record.get(field.name)
+
+                if value is not None and value not in found:
+                    continue
+
+                if _is_user(field) and value is not None:
+                    record[field.name] = found[value]
+
+                resolved.append(record)
+
+            valid = resolved
+
+        return valid
+
+    def _resolve_parents(self, field, batch, found):
+        """Drop rows whose parent is neither stored nor kept in the
+        batch, until every parent left is, return parents first"""
+        valid = batch
+
+        while True:
+            kept = found | {record['id'] for record in valid}
+            resolved = [
+                record for record in valid
+                if record.get(field.name) in kept | {None}
+            ]
+
+            if len(resolved) == len(valid):
+                break
+
+            valid = resolved
+
+        return sorted(valid, key=lambda record: record.get('depth') or 0)
+
+    def flush(self, label):
+        """Write the buffered rows of a model"""
+        batch = self.pending.pop(label, [])
+
+        if not batch:
+            return
+
+        model = MODELS[label]
+        fields = {
+            field.name: field.attname
+            for field in model._meta.concrete_fields
+        }
+
+        with transaction.atomic():
+            existing = set(model.objects.filter(
+                pk__in=[record.get('id') for record in batch]
+            ).values_list('pk', flat=True))
+            valid = self._resolve(model, [
+                record for record in batch if record.get('id') not in existing
+            ])
+            objs = [
+                model(**{
+                    fields[name]: value
+                    for name, value in record.items() if name in fields
+                })
+                for record in valid
+            ]
+            self.bulk_create(model, objs)
+            self.created(model, objs)
+
+        stats = self.stats[label]
+        stats['imported'] += len(valid)
+        stats['skipped'] += len(batch) - len(valid)
+
+        if self.progress is not None:
+            self.progress(label, stats)
+
+    def bulk_create(self, model, objs):
+        """Insert objs keeping their creation dates"""
+        stamped = [
+            field.attname for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now_add', False)
+        ]
+        dates = [
+            (obj, [getattr(obj, name) for name in stamped]) for obj in objs
+        ]
+
+        model.objects.bulk_create(objs)
+
+        # bulk_create stamps auto_now_add fields with the current time
+        restored = []
+
+        for obj, values in dates:
+            if obj.pk is None or None in values:
+                continue
+
+            for name, value in zip(stamped, values):
+                setattr(obj, name, value)
+
+            restored.append(obj)
+
+        if stamped and restored:
+            model.objects.bulk_update(restored, stamped)
+
+    def created(self, model, objs):
+        """Index and reference the media of newly created posts and
+        note the boards and threads they change"""
+        if model is Board:
+            self.board_ids.update(obj.pk for obj in objs)
+        elif model is Thread:
+            self.board_ids.update(obj.board_id for obj in objs)
+            self.thread_ids.update(obj.pk for obj in objs)
+        elif model is Reply:
+            self.thread_ids.update(obj.root_thread_id for obj in objs)
+        else:
+            self.thread_ids.update(obj.thread_id for obj in objs)
+
+        if model not in (Thread, Reply):
+            return
+
+        acquire_media(set().union(*map(instance_media_references, objs)))
+
+        if model is Thread:
+            index_threads(objs)
+        else:
+            index_replies(objs)
+
+    def recount(self):
+        """Recompute the reply and vote counters of the threads imported
+        into rather than trusting the counters of the dump"""
+        thread_ids = sorted(self.thread_ids - {None})
+
+        for start in range(0, len(thread_ids), self.batch_size):
+            threads = Thread.objects.filter(
+                pk__in=thread_ids[start:start + self.batch_size]
+            )
+            self.board_ids.update(
+                threads.values_list('board_id', flat=True)
+            )
+            threads.update(
+                reply_count=count_per_thread(Reply, 'root_thread'),
+                upvote_count=count_per_thread(Upvote),
+                downvote_count=count_per_thread(Downvote),
+                top_score=(
+                    count_per_thread(Upvote) - count_per_thread(Downvote)
+                ),
+            )
+
+    def reset_sequences(self):
+        """Move id sequences past the imported primary keys"""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), list(MODELS.values())
+        )
+
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def import_records(lines, batch_size=1000, progress=None):
+    """Import NDJSON lines, return imported and skipped rows per model"""
+    return Importer(batch_size=batch_size, progress=progress).feed(lines)
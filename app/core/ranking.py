@@ -0,0 +1,104 @@
+import math
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import Thread, Reply
+
+
+DEFAULT_SETTINGS = {
+    'REPLY_WEIGHT': 0.5,
+    'VELOCITY_WINDOW': 6,
+    'DECAY': 45000,
+    'LOOKBACK': 12,
+    'BATCH_SIZE': 500,
+}
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def get_ranking_settings():
+    """Return ranking settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'CHAN_RANKING', {}))
+
+
+def hot_score(score, recent_replies, date_created, config=None):
+    """Return the hot score of a thread
+
+    Votes and replies within VELOCITY_WINDOW hours count on a log
+    scale, every DECAY seconds of age are worth one order of magnitude
+    of activity, so the score of a thread only changes with activity
+    and scores of idle threads never need to be recomputed
+    """
+    config = config or get_ranking_settings()
+    activity = score + config['REPLY_WEIGHT'] * recent_replies
+    order = math.log10(max(abs(activity), 1))
+    sign = (activity > 0) - (activity < 0)
+    age = (date_created - EPOCH).total_seconds()
+
+    return round(sign * order + age / config['DECAY'], 7)
+
+
+def recompute_scores(since=None, config=None):
+    """Recompute hot and top scores of threads active since the given
+    time (every thread when None), return the number updated"""
+    config = config or get_ranking_settings()
+    now = timezone.now()
+    window_start = now - timedelta(hours=config['VELOCITY_WINDOW'])
+    recent_replies = Reply.objects.filter(
+        root_thread=OuterRef('pk'), date_created__gte=window_start
+    ).order_by().values('root_thread').annotate(
+        total=Count('id')
+    ).values('total')
+
+    threads = Thread.objects.all()
+
+    if since is not None:
+        threads = threads.filter(
+            Q(last_bumped_at__gte=since) | Q(date_modified__gte=since)
+        )
+
+    threads = threads.annotate(
+        recent_replies=Coalesce(Subquery(recent_replies), 0)
+    ).only(
+        'id', 'upvote_count', 'downvote_count', 'date_created',
+        'hot_score', 'top_score'
+    ).order_by('id')
+
+    batch = []
+    updated = 0
+
+    for thread in threads.iterator(chunk_size=config['BATCH_SIZE']):
+        hot = hot_score(
+            thread.score, thread.recent_replies, thread.date_created, config
+        )
+
+        if (hot, thread.score) == (thread.hot_score, thread.top_score):
+            continue
+
+        thread.hot_score, thread.top_score = hot, thread.score
+        batch.append(thread)
+
+        if len(batch) == config['BATCH_SIZE']:
+            Thread.objects.bulk_update(batch, ['hot_score', 'top_score'])
+            updated += len(batch)
+            batch = []
+
+    if batch:
+        Thread.objects.bulk_update(batch, ['hot_score', 'top_score'])
+        updated += len(batch)
+
+    return updated
+
+
+def recompute_recent_scores(config=None):
+    """Recompute the scores of threads active within LOOKBACK hours,
+    long enough for replies to leave the velocity window"""
+    config = config or get_ranking_settings()
+    since = timezone.now() - timedelta(hours=config['LOOKBACK'])
+
+    return recompute_scores(since=since, config=config)
@@ -0,0 +1,296 @@
+import math
+import re
+import unicodedata
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import (
+    Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+)
+from django.db.models.expressions import RawSQL
+
+from core.models import Thread, Reply, SearchDocument, SearchTerm
+
+
+DEFAULT_SETTINGS = {
+    'CONFIG': 'english',
+    'MAX_TERMS': 10,
+    'TITLE_WEIGHT': 2.0,
+}
+
+TOKEN = re.compile(r'\w+')
+
+VECTOR_SQL = (
+    "setweight(to_tsvector(%s, %s), 'A') || "
+    "setweight(to_tsvector(%s, %s), 'B')"
+)
+
+
+def get_search_settings():
+    """Return search settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'CHAN_SEARCH', {}))
+
+
+def uses_postgres():
+    """Return whether the tsvector index is available"""
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    """Return the normalized terms of text"""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+
+    return [
+        term[:64] for term in TOKEN.findall(text) if len(term) > 1
+    ]
+
+
+def term_weights(title, text, config):
+    """Return the posting weight of each term of a document,
+    a saturated term frequency boosted for title terms"""
+    counts = Counter()
+
+    for term in tokenize(title):
+        counts[term] += config['TITLE_WEIGHT']
+
+    for term in tokenize(text):
+        counts[term] += 1
+
+    return {term: count / (count + 1) for term, count in counts.items()}
+
+
+def index_document(document, title, text, config=None):
+    """Write the vector or the postings of a search document"""
+    config = config or get_search_settings()
+
+    if uses_postgres():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE core_searchdocument SET vector = {VECTOR_SQL} '
+                'WHERE id = %s',
+                [config['CONFIG'], title, config['CONFIG'], text,
+                 document.pk]
+            )
+        return
+
+    SearchTerm.objects.filter(document=document).delete()
+    SearchTerm.objects.bulk_create([
+        SearchTerm(document=document, term=term, weight=weight)
+        for term, weight in term_weights(title, text, config).items()
+    ])
+
+
+def index_thread(thread):
+    """Index the title and content of a thread"""
+    document, _ = SearchDocument.objects.update_or_create(
+        thread_id=thread.pk, reply=None,
+        defaults={
+            'board_id': thread.board_id,
+            'date_created': thread.date_created,
+        }
+    )
+    index_document(document, thread.title, thread.content)
+
+    # Replies follow their thread when it is moved to another board
+    SearchDocument.objects.filter(thread_id=thread.pk).exclude(
+        board_id=thread.board_id
+    ).update(board_id=thread.board_id)
+
+
+def index_reply(reply):
+    """Index the text of a reply"""
+    board_id = Thread.objects.filter(
+        pk=reply.root_thread_id
+    ).values_list('board_id', flat=True).first()
+
+    if board_id is None:
+        return
+
+    document, _ = SearchDocument.objects.update_or_create(
+        reply_id=reply.pk,
+        defaults={
+            'thread_id': reply.root_thread_id,
+            'board_id': board_id,
+            'date_created': reply.date_created,
+        }
+    )
+    index_document(document, '', reply.text)
+
+
+def search(query, board=None, kind=None):
+    """Return the documents matching every term of query,
+    annotated with their ``rank``"""
+    config = get_search_settings()
+    terms = list(dict.fromkeys(tokenize(query)))[:config['MAX_TERMS']]
+    documents = SearchDocument.objects.all()
+
+    if board is not None:
+        documents = documents.filter(board_id=board)
+
+    if kind == 'thread':
+        documents = documents.filter(reply__isnull=True)
+    elif kind == 'reply':
+        documents = documents.filter(reply__isnull=False)
+
+    if not terms:
+        return documents.none()
+
+    if uses_postgres():
+        tsquery = 'plainto_tsquery(%s, %s)'
+        params = [config['CONFIG'], ' '.join(terms)]
+
+        return documents.extra(
+            where=[f'vector @@ {tsquery}'], params=params
+        ).annotate(
+            rank=RawSQL(
+                f'ts_rank_cd(vector, {tsquery})::float8', params,
+                output_field=FloatField()
+            )
+        )
+
+    frequencies = dict(
+        SearchTerm.objects.filter(term__in=terms).values_list(
+            'term'
+        ).annotate(Count('id'))
+    )
+
+    if len(frequencies) < len(terms):
+        return documents.none()
+
+    # Only documents holding the rarest term are ranked
+    rarest = min(terms, key=frequencies.get)
+    candidates = SearchTerm.objects.filter(term=rarest).values('document')
+
+    return documents.filter(id__in=candidates).annotate(
+        rank=_postings_rank(terms, frequencies)
+    ).filter(rank__isnull=False)
+
+
+def _postings_rank(terms, frequencies):
+    """Return a tf-idf rank subquery over the postings of the
+    documents containing every term"""
+    total = SearchDocument.objects.count() or 1
+    idf = Case(
+        *[
+            When(term=term, then=Value(
+                math.log(1 + total / frequencies[term])
+            ))
+            for term in terms
+        ],
+        output_field=FloatField()
+    )
+    postings = SearchTerm.objects.filter(
+        document=OuterRef('pk'), term__in=terms
+    ).order_by().values('document').annotate(
+        matched=Count('id'), score=Sum(F('weight') * idf)
+    ).filter(matched=len(terms)).values('score')
+
+    return Subquery(postings, output_field=FloatField())
+
+
+def index_threads(threads, config=None):
+    """Create the search documents of new threads in bulk"""
+    config = config or get_search_settings()
+    SearchDocument.objects.bulk_create([
+        SearchDocument(
+            thread_id=thread.pk, board_id=thread.board_id,
+            date_created=thread.date_created
+        )
+        for thread in threads
+    ])
+    documents = dict(SearchDocument.objects.filter(
+        thread_id__in=[thread.pk for thread in threads], reply=None
+    ).values_list('thread_id', 'id'))
+    _index_batch([
+        (documents[thread.pk], thread.title, thread.content)
+        for thread in threads
+    ], config)
+
+
+def index_replies(replies, config=None):
+    """Create the search documents of new replies in bulk"""
+    config = config or get_search_settings()
+    boards = dict(Thread.objects.filter(
+        pk__in={reply.root_thread_id for reply in replies}
+    ).values_list('id', 'board_id'))
+    replies = [reply for reply in replies if reply.root_thread_id in boards]
+
+    SearchDocument.objects.bulk_create([
+        SearchDocument(
+            thread_id=reply.root_thread_id, reply_id=reply.pk,
+            board_id=boards[reply.root_thread_id],
+            date_created=reply.date_created
+        )
+        for reply in replies
+    ])
+    documents = dict(SearchDocument.objects.filter(
+        reply_id__in=[reply.pk for reply in replies]
+    ).values_list('reply_id', 'id'))
+    _index_batch([
+        (documents[reply.pk], '', reply.text) for reply in replies
+    ], config)
+
+
+def rebuild_index(batch_size=500):
+    """Recreate every search document, return the number indexed"""
+    config = get_search_settings()
+    SearchDocument.objects.all().delete()
+    indexed = 0
+
+    threads = Thread.objects.only(
+        'id', 'board_id', 'date_created', 'title', 'content'
+    ).order_by('id')
+
+    for batch in _batches(threads.iterator(chunk_size=batch_size),
+                          batch_size):
+        index_threads(batch, config)
+        indexed += len(batch)
+
+    replies = Reply.objects.filter(root_thread__isnull=False).only(
+        'id', 'root_thread_id', 'date_created', 'text'
+    ).order_by('id')
+
+    for batch in _batches(replies.iterator(chunk_size=batch_size),
+                          batch_size):
+        index_replies(batch, config)
+        indexed += len(batch)
+
+    return indexed
+
+
+def _batches(rows, size):
+    """Yield lists of at most size rows"""
+    batch = []
+
+    for row in rows:
+        batch.append(row)
+
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _index_batch(documents, config):
+    """Write the vectors or postings of (document id, title, text)"""
+    if uses_postgres():
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE core_searchdocument SET vector = {VECTOR_SQL} '
+                'WHERE id = %s',
+                [
+                    [config['CONFIG'], title, config['CONFIG'], text, pk]
+                    for pk, title, text in documents
+                ]
+            )
+        return
+
+    SearchTerm.objects.bulk_create([
+        SearchTerm(document_id=pk, term=term, weight=weight)
+        for pk, title, text in documents
+        for term, weight in term_weights(title, text, config).items()
+    ], batch_size=1000)
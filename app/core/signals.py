@@ -0,0 +1,280 @@
+import threading
+
+from contextlib import contextmanager
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver, Signal
+
+from core.images import schedule_image
+from core.ranking import hot_score
+from core.search import index_thread, index_reply
+from core.storage import acquire_media, release_media
+from core.models import (
+    User, Thread, Reply, Upvote, Downvote, ArchivedThread, ImageStatus,
+    reply_tree_path
+)
+
+
+VOTE_COUNTERS = {
+    Upvote: 'upvote_count',
+    Downvote: 'downvote_count',
+}
+
+IMAGE_FIELDS = {
+    User: 'avatar',
+    Thread: 'image',
+    Reply: 'image',
+}
+
+# Sent with ``thread_ids`` after vote counters of several threads are
+# recomputed in bulk (no per-vote signals are sent in that case)
+thread_counters_refreshed = Signal()
+
+# Sent with ``board_ids`` and ``thread_ids`` after an NDJSON dump is
+# imported with ``bulk_create``, which sends no per-row signals
+records_imported = Signal()
+
+_state = threading.local()
+
+
+@contextmanager
+def suspend_vote_counters():
+    """Disable per-vote counter updates in the current thread,
+    used by bulk writers that recompute the counters themselves"""
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = False
+
+
+def count_per_thread(model, field='thread'):
+    """Return a subquery counting rows of model per thread"""
+    rows = model.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(
+        total=Count('id')
+    ).values('total')
+
+    return Coalesce(Subquery(rows), 0)
+
+
+def latest_reply_date(thread_ref='pk'):
+    """Return a subquery of the newest reply date for a thread"""
+    replies = Reply.objects.filter(
+        root_thread=OuterRef(thread_ref)
+    ).order_by('-date_created').values('date_created')
+
+    return Subquery(replies[:1])
+
+
+@receiver(pre_save, sender=Reply)
+def place_reply_in_tree(sender, instance, **kwargs):
+    """Set the root thread and depth of a new reply"""
+    if not instance._state.adding:
+        return
+
+    if instance.reply_id:
+        parent = instance.reply
+        instance.root_thread_id = parent.root_thread_id
+        instance.depth = parent.depth + 1
+    else:
+        instance.root_thread_id = instance.thread_id
+        instance.depth = 0
+
+
+@receiver(post_save, sender=Reply)
+def set_reply_path(sender, instance, created, **kwargs):
+    """Store the materialized path of a new reply"""
+    if not created:
+        return
+
+    parent_path = instance.reply.path if instance.reply_id else ''
+    instance.path = reply_tree_path(instance.pk, parent_path)
+    Reply.objects.filter(pk=instance.pk).update(path=instance.path)
+
+
+@receiver(post_save, sender=Reply)
+def bump_thread_on_reply(sender, instance, created, **kwargs):
+    """Bump the replied thread and increase its reply counter"""
+    if not created or not instance.root_thread_id:
+        return
+
+    Thread.objects.filter(pk=instance.root_thread_id).update(
+        last_bumped_at=instance.date_created,
+        reply_count=F('reply_count') + 1,
+        date_modified=Now()
+    )
+
+
+@receiver(post_delete, sender=Reply)
+def unbump_thread_on_reply_delete(sender, instance, **kwargs):
+    """Restore bump order and reply counter of the thread
+    after one of its replies is deleted"""
+    if not instance.root_thread_id:
+        return
+
+    Thread.objects.filter(
+        pk=instance.root_thread_id, reply_count__gt=0
+    ).update(
+        last_bumped_at=Coalesce(latest_reply_date(), F('date_created')),
+        reply_count=F('reply_count') - 1,
+        date_modified=Now()
+    )
+
+
+@receiver(post_save, sender=Upvote)
+@receiver(post_save, sender=Downvote)
+def count_vote(sender, instance, created, **kwargs):
+    """Increase the vote counter of the voted thread"""
+    if not created or getattr(_state, 'suspended', False):
+        return
+
+    counter = VOTE_COUNTERS[sender]
+    Thread.objects.filter(pk=instance.thread_id).update(
+        date_modified=Now(), **{counter: F(counter) + 1}
+    )
+
+
+@receiver(post_delete, sender=Upvote)
+@receiver(post_delete, sender=Downvote)
+def uncount_vote(sender, instance, **kwargs):
+    """Decrease the vote counter of the thread
+    after a vote is deleted"""
+    if getattr(_state, 'suspended', False):
+        return
+
+    counter = VOTE_COUNTERS[sender]
+    Thread.objects.filter(
+        pk=instance.thread_id, **{f'{counter}__gt': 0}
+    ).update(date_modified=Now(), **{counter: F(counter) - 1})
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Thread)
+@receiver(pre_save, sender=Reply)
+def mark_image_pending(sender, instance, **kwargs):
+    """Flag a newly uploaded image as pending processing"""
+    field = IMAGE_FIELDS[sender]
+    file = getattr(instance, field)
+
+    if file and not file._committed:
+        setattr(instance, f'{field}_status', ImageStatus.PENDING)
+        setattr(instance, f'{field}_thumbnails', {})
+        instance._image_uploaded = True
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Thread)
+@receiver(post_save, sender=Reply)
+def process_uploaded_image(sender, instance, **kwargs):
+    """Hand a newly uploaded image over to the image workers"""
+    if not instance.__dict__.pop('_image_uploaded', False):
+        return
+
+    field = IMAGE_FIELDS[sender]
+    schedule_image(sender, instance.pk, field, getattr(instance, field).name)
+
+
+def media_references(model, name, thumbnails):
+    """Return the stored files referenced by an image field value"""
+    field = IMAGE_FIELDS[model]
+    names = set(thumbnails.values())
+
+    if name and name != model._meta.get_field(field).get_default():
+        names.add(name)
+
+    return names
+
+
+def instance_media_references(instance):
+    """Return the stored files referenced by an instance"""
+    field = IMAGE_FIELDS[type(instance)]
+
+    return media_references(
+        type(instance), getattr(instance, field).name,
+        getattr(instance, f'{field}_thumbnails')
+    )
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Thread)
+@receiver(pre_save, sender=Reply)
+def remember_media_references(sender, instance, update_fields=None,
+                              **kwargs):
+    """Remember the stored files referenced before the save"""
+    field = IMAGE_FIELDS[sender]
+    thumbnails_field = f'{field}_thumbnails'
+
+    if instance._state.adding:
+        instance._media_references = set()
+    elif update_fields is not None and not (
+        {field, thumbnails_field} & set(update_fields)
+    ):
+        instance._media_references = None
+    else:
+        row = sender.objects.filter(pk=instance.pk).values_list(
+            field, thumbnails_field
+        ).first()
+        instance._media_references = (
+            media_references(sender, *row) if row else set()
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Thread)
+@receiver(post_save, sender=Reply)
+def count_media_references(sender, instance, **kwargs):
+    """Update reference counts of added and removed stored files"""
+    previous = instance.__dict__.pop('_media_references', None)
+
+    if previous is None:
+        return
+
+    current = instance_media_references(instance)
+    acquire_media(current - previous)
+    release_media(previous - current)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Thread)
+@receiver(post_delete, sender=Reply)
+def release_media_references(sender, instance, **kwargs):
+    """Release the stored files of a deleted row"""
+    release_media(instance_media_references(instance))
+
+
+@receiver(post_delete, sender=ArchivedThread)
+def release_archived_media(sender, instance, **kwargs):
+    """Release the stored files kept by a deleted archive"""
+    release_media(instance.media)
+
+
+@receiver(post_save, sender=Thread)
+def index_saved_thread(sender, instance, update_fields=None, **kwargs):
+    """Update the search index of a created or edited thread"""
+    if update_fields is not None and not (
+        {'title', 'content', 'board'} & set(update_fields)
+    ):
+        return
+
+    index_thread(instance)
+
+
+@receiver(post_save, sender=Reply)
+def index_saved_reply(sender, instance, update_fields=None, **kwargs):
+    """Update the search index of a created or edited reply"""
+    if update_fields is not None and 'text' not in update_fields:
+        return
+
+    index_reply(instance)
+
+
+@receiver(pre_save, sender=Thread)
+def rank_new_thread(sender, instance, **kwargs):
+    """Give a new thread the hot score of a thread without activity"""
+    if instance._state.adding:
+        instance.hot_score = hot_score(0, 0, timezone.now())
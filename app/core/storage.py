@@ -0,0 +1,135 @@
+import hashlib
+import os
+import tempfile
+
+from collections import Counter, defaultdict
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.db.models.functions import Greatest, Now
+from django.utils.deconstruct import deconstructible
+
+from core.models import MediaBlob
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files after the sha256 digest of
+    their content, so identical uploads are stored once
+
+    Files are hashed while they are streamed to a temporary file and
+    moved under ``<prefix>/<aa>/<bb>/<digest><ext>``, the name given by
+    ``upload_to`` only provides the extension.
+    """
+
+    def __init__(self, prefix='uploads/blobs', **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+
+    def get_available_name(self, name, max_length=None):
+        """Return name unchanged, the final name is only known once
+        the content is hashed"""
+        return name
+
+    def _makedirs(self, directory):
+        """Create directory with the configured permissions"""
+        if self.directory_permissions_mode is None:
+            return os.makedirs(directory, exist_ok=True)
+
+        old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+        try:
+            os.makedirs(
+                directory, self.directory_permissions_mode, exist_ok=True
+            )
+        finally:
+            os.umask(old_umask)
+
+    def _save(self, name, content):
+        incoming = self.path(os.path.join(self.prefix, '.incoming'))
+        self._makedirs(incoming)
+        digest = hashlib.sha256()
+
+        fd, temporary_path = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+
+                    digest.update(chunk)
+                    file.write(chunk)
+
+            digest = digest.hexdigest()
+            ext = os.path.splitext(name)[1].lower()
+            name = os.path.join(
+                self.prefix, digest[:2], digest[2:4], f'{digest}{ext}'
+            )
+            full_path = self.path(name)
+            touch_media(name)
+
+            if os.path.exists(full_path):
+                os.remove(temporary_path)
+            else:
+                self._makedirs(os.path.dirname(full_path))
+                os.replace(temporary_path, full_path)
+
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        return name.replace('\\', '/')
+
+
+def touch_media(name):
+    """Restart the grace period of a stored file before it is reused,
+    waiting for a ``collect_media`` deleting it to finish"""
+    if not MediaBlob.objects.filter(name=name).update(date_modified=Now()):
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(name=name)], ignore_conflicts=True
+        )
+
+
+def group_by_count(names):
+    """Return names grouped by their number of references, a
+    ``Counter`` gives the number of references of each name"""
+    counts = names if isinstance(names, Counter) else Counter(set(names))
+    groups = defaultdict(list)
+
+    for name, count in counts.items():
+        if count > 0:
+            groups[count].append(name)
+
+    return groups
+
+
+def acquire_media(names):
+    """Add one reference to each stored file of names, or the number
+    of references of each file when names is a ``Counter``"""
+    if not names:
+        return
+
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name) for name in names], ignore_conflicts=True
+    )
+
+    for count, group in group_by_count(names).items():
+        MediaBlob.objects.filter(name__in=group).update(
+            ref_count=F('ref_count') + count, date_modified=Now()
+        )
+
+
+def release_media(names):
+    """Remove one reference from each stored file of names, or the
+    number of references of each file when names is a ``Counter``,
+    unreferenced files are deleted by ``collect_media``"""
+    if not names:
+        return
+
+    for count, group in group_by_count(names).items():
+        MediaBlob.objects.filter(name__in=group, ref_count__gt=0).update(
+            ref_count=Greatest(F('ref_count') - count, 0),
+            date_modified=Now()
+        )
@@ -1,9 +1,13 @@
+from io import StringIO
 from unittest.mock import patch
 
 from django.test import TestCase
 from django.core.management import call_command
 from django.db.utils import OperationalError
 
+from core.models import Thread, Reply, Upvote
+from core.tests.test_models import create_user, create_board
+
 
 class CommandTests(TestCase):
 
@@ -21,3 +25,51 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+    def test_backfill_thread_stats(self):
+        """Test backfilling bump order and reply counter
+        of existing threads"""
+        user = create_user()
+        board = create_board(user=user)
+        thread = Thread.objects.create(
+            user=user, board=board,
+            title='old thread', content='old content'
+        )
+        reply = Reply.objects.create(
+            user=user, text='old reply', thread=thread
+        )
+        Upvote.objects.create(user=user, thread=thread)
+        Thread.objects.filter(pk=thread.pk).update(
+            reply_count=0, upvote_count=0,
+            last_bumped_at=thread.date_created
+        )
+
+        call_command('backfill_thread_stats', stdout=StringIO())
+        thread.refresh_from_db()
+
+        self.assertEqual(thread.reply_count, 1)
+        self.assertEqual(thread.upvote_count, 1)
+        self.assertEqual(thread.last_bumped_at, reply.date_created)
+
+    def test_rebuild_reply_tree(self):
+        """Test rebuilding root thread, depth and path of replies"""
+        user = create_user()
+        board = create_board(user=user)
+        thread = Thread.objects.create(
+            user=user, board=board,
+            title='old thread', content='old content'
+        )
+        reply = Reply.objects.create(
+            user=user, text='old reply', thread=thread
+        )
+        nested = Reply.objects.create(
+            user=user, text='old nested reply', reply=reply
+        )
+        Reply.objects.update(root_thread=None, depth=0, path='')
+
+        call_command('rebuild_reply_tree', stdout=StringIO())
+        nested.refresh_from_db()
+
+        self.assertEqual(nested.root_thread, thread)
+        self.assertEqual(nested.depth, 1)
+        self.assertEqual(nested.path, f'{reply.id:010d}.{nested.id:010d}')
@@ -0,0 +1,141 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from unittest.mock import patch
+
+from django.db.backends.sqlite3 import base as sqlite_base
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db import pool as db_pool
+from core.db.pool import (
+    ConnectionPool, ManagedConnectionMixin, PoolTimeout, is_connection_usable
+)
+from core.tests.test_models import create_user
+
+
+DATABASE_URL = reverse('6chan:database')
+
+
+class ManagedSQLiteWrapper(ManagedConnectionMixin,
+                           sqlite_base.DatabaseWrapper):
+    """SQLite wrapper used to exercise the connection management"""
+
+
+class ConnectionManagementTests(SimpleTestCase):
+    """Test the connection pool and connection health checks"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.path = os.path.join(self.directory, 'pool.sqlite3')
+
+    def connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def create_wrapper(self, alias, **params):
+        settings_dict = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': self.path,
+            'ATOMIC_REQUESTS': False, 'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 0, 'OPTIONS': {}, 'TIME_ZONE': None,
+            'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '', 'TEST': {},
+        }
+        settings_dict.update(params)
+        self.addCleanup(db_pool._pools.pop, alias, None)
+
+        return ManagedSQLiteWrapper(settings_dict, alias)
+
+    def test_pool_reuses_connections(self):
+        """Test that released connections are handed out again"""
+        pool = ConnectionPool(1, check=is_connection_usable)
+
+        conn = pool.acquire(self.connect)
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(self.connect), conn)
+        stats = pool.stats()
+        self.assertEqual((stats['created'], stats['reused']), (1, 1))
+
+    def test_pool_timeout(self):
+        """Test that callers wait for a connection up to the timeout"""
+        pool = ConnectionPool(1, timeout=0.01)
+        pool.acquire(self.connect)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(self.connect)
+
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_pool_replaces_broken_connections(self):
+        """Test that idle connections failing the check are replaced"""
+        pool = ConnectionPool(1, check=is_connection_usable)
+        conn = pool.acquire(self.connect)
+        pool.release(conn)
+        conn.close()
+
+        self.assertIsNot(pool.acquire(self.connect), conn)
+        self.assertEqual(pool.stats()['discarded'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_wrapper_returns_connections_to_pool(self):
+        """Test that closing a pooled wrapper keeps the connection"""
+        first = self.create_wrapper('pooled', POOL={'MAX_SIZE': 2})
+        first.ensure_connection()
+        conn = first.connection
+        first.close()
+
+        second = self.create_wrapper('pooled', POOL={'MAX_SIZE': 2})
+        second.ensure_connection()
+
+        self.assertIs(second.connection, conn)
+        self.assertEqual(db_pool.get_pools()['pooled'].stats()['in_use'], 1)
+        second.close()
+
+    def test_health_check_before_reuse(self):
+        """Test that a persistent connection is checked once per request
+        and replaced when unusable"""
+        wrapper = self.create_wrapper(
+            'checked', CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True
+        )
+        wrapper.ensure_connection()
+        conn = wrapper.connection
+        wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(wrapper, 'is_usable', return_value=False) as check:
+            wrapper.ensure_connection()
+            wrapper.ensure_connection()
+
+        self.assertEqual(check.call_count, 1)
+        self.assertIsNot(wrapper.connection, conn)
+        wrapper.close()
+
+
+class DatabaseStatsApiTests(TestCase):
+    """Test the database diagnostics endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_database_stats_admin_only(self):
+        """Test that diagnostics require an admin"""
+        self.client.force_authenticate(user=create_user())
+
+        res = self.client.get(DATABASE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_database_stats(self):
+        """Test that every database is reported"""
+        self.client.force_authenticate(user=create_user(is_admin=True))
+
+        res = self.client.get(DATABASE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        default = res.data['databases']['default']
+        self.assertIn('round_trip_ms', default)
+        self.assertIsNone(default['pool'])
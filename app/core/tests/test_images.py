@@ -0,0 +1,163 @@
+import io
+import shutil
+import tempfile
+
+from unittest.mock import patch
+
+from PIL import Image, PngImagePlugin
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Thread, ImageStatus
+from core.tests.test_models import create_user, create_board
+
+
+THREAD_URL = reverse('6chan:thread-list')
+
+
+def create_jpeg(size=(640, 480), exif=True):
+    """Return a JPEG upload, tagged with an EXIF orientation"""
+    image = Image.new('RGB', size, 'red')
+    buffer = io.BytesIO()
+    params = {}
+
+    if exif:
+        tags = Image.Exif()
+        tags[0x0112] = 6  # Orientation: rotated 90 degrees
+        tags[0x010f] = 'Camera maker'
+        params['exif'] = tags.tobytes()
+
+    image.save(buffer, format='JPEG', **params)
+
+    return SimpleUploadedFile(
+        'photo.jpg', buffer.getvalue(), content_type='image/jpeg'
+    )
+
+
+def create_png(text):
+    """Return a PNG upload carrying a text chunk"""
+    info = PngImagePlugin.PngInfo()
+    info.add_text('Comment', text)
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'blue').save(
+        buffer, format='PNG', pnginfo=info
+    )
+
+    return SimpleUploadedFile(
+        'drawing.png', buffer.getvalue(), content_type='image/png'
+    )
+
+
+class ImagePipelineTests(TestCase):
+    """Test asynchronous processing of uploaded images"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+        self.user = create_user()
+        self.board = create_board(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_thread(self, image):
+
+        return self.client.post(THREAD_URL, {
+            'title': 'image thread',
+            'content': 'image content',
+            'board': self.board.id,
+            'image': image,
+        })
+
+    def test_upload_pending(self):
+        """Test that an upload is pending until a worker processes it"""
+        res = self.post_thread(create_jpeg())
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['image_status'], ImageStatus.PENDING)
+        self.assertEqual(res.data['image_thumbnails'], {})
+
+    @override_settings(CHAN_IMAGES={'EAGER': True})
+    def test_upload_processed(self):
+        """Test that EXIF data is stripped and thumbnails are written"""
+        res = self.post_thread(create_jpeg())
+        thread = Thread.objects.get(id=res.data['id'])
+
+        self.assertEqual(thread.image_status, ImageStatus.READY)
+        self.assertEqual(
+            sorted(thread.image_thumbnails), ['medium', 'small']
+        )
+
+        with thread.image.open('rb') as file:
+            image = Image.open(file)
+            self.assertFalse(image.getexif())
+            self.assertEqual(image.size, (480, 640))
+
+        with default_storage.open(thread.image_thumbnails['small']) as file:
+            self.assertEqual(Image.open(file).size, (112, 150))
+
+        res = self.client.get(
+            reverse('6chan:thread-detail', args=[thread.id])
+        )
+        self.assertTrue(
+            res.data['image_thumbnails']['small'].startswith('http://')
+        )
+
+    @patch('PIL.Image.open', side_effect=AssertionError('decoded'))
+    def test_upload_not_decoded_in_request(self, mock_open):
+        """Test that the request only checks the header of an upload"""
+        res = self.post_thread(create_jpeg())
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        mock_open.assert_not_called()
+
+    def test_upload_not_image_rejected(self):
+        """Test that a file not starting like an image is rejected"""
+        res = self.post_thread(SimpleUploadedFile(
+            'photo.jpg', b'<html></html>', content_type='image/jpeg'
+        ))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
+    @override_settings(CHAN_IMAGES={'EAGER': True})
+    def test_upload_without_exif_stripped(self):
+        """Test that other metadata is dropped from images without EXIF"""
+        res = self.post_thread(create_png('secret location'))
+        thread = Thread.objects.get(id=res.data['id'])
+
+        self.assertEqual(thread.image_status, ImageStatus.READY)
+
+        with thread.image.open('rb') as file:
+            image = Image.open(file)
+            self.assertEqual(image.format, 'PNG')
+            self.assertNotIn('Comment', image.info)
+
+    @override_settings(CHAN_IMAGES={'EAGER': True, 'MAX_DIMENSION': 100})
+    def test_oversized_upload_rejected(self):
+        """Test that images above the size limit are removed"""
+        res = self.post_thread(create_jpeg(exif=False))
+        thread = Thread.objects.get(id=res.data['id'])
+
+        self.assertEqual(thread.image_status, ImageStatus.FAILED)
+        self.assertFalse(thread.image)
+        self.assertEqual(thread.image_thumbnails, {})
+
+    def test_process_images_command(self):
+        """Test processing pending images from the command line"""
+        res = self.post_thread(create_jpeg(exif=False))
+
+        call_command('process_images', stdout=io.StringIO())
+
+        thread = Thread.objects.get(id=res.data['id'])
+        self.assertEqual(thread.image_status, ImageStatus.READY)
@@ -0,0 +1,148 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.views import parse_range, RangeNotSatisfiable
+
+
+def media_url(name):
+
+    return reverse('media', args=[name])
+
+
+class MediaServingTests(TestCase):
+    """Test serving uploaded media files"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+        self.name = default_storage.save(
+            'uploads/thread/image.png', ContentFile(b'0123456789')
+        )
+
+    def get(self, name, **headers):
+        response = self.client.get(media_url(name), **headers)
+        content = b''.join(getattr(response, 'streaming_content', []))
+
+        return response, content
+
+    def test_serve_file(self):
+        """Test serving a content addressed file"""
+        res, content = self.get(self.name)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(content, b'0123456789')
+        self.assertEqual(res['Content-Type'], 'image/png')
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+
+    def test_not_modified(self):
+        """Test that a matching ETag returns 304"""
+        etag = self.get(self.name)[0]['ETag']
+
+        res, _ = self.get(self.name, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_not_modified_weak_and_any(self):
+        """Test that weak validators and ``*`` match the ETag"""
+        etag = self.get(self.name)[0]['ETag']
+
+        for header in [f'W/{etag}', f'"other", {etag}', '*']:
+            res, _ = self.get(self.name, HTTP_IF_NONE_MATCH=header)
+
+            self.assertEqual(res.status_code, 304)
+
+        res, _ = self.get(self.name, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(res.status_code, 200)
+
+    def test_byte_range(self):
+        """Test serving part of a file"""
+        res, content = self.get(self.name, HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(content, b'2345')
+        self.assertEqual(res['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(res['Content-Length'], '4')
+
+    def test_byte_range_not_satisfiable(self):
+        """Test that a range outside the file returns 416"""
+        res, _ = self.get(self.name, HTTP_RANGE='bytes=20-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], 'bytes */10')
+
+    def test_parse_range(self):
+        """Test parsing suffix, open and malformed ranges"""
+        self.assertEqual(parse_range('bytes=-3', 10), (7, 9))
+        self.assertEqual(parse_range('bytes=4-', 10), (4, 9))
+        self.assertEqual(parse_range('bytes=4-100', 10), (4, 9))
+        self.assertIsNone(parse_range('bytes=0-1,4-5', 10))
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=5-2', 10)
+
+    @override_settings(MEDIA_SERVING={'BACKEND': 'x-accel-redirect'})
+    def test_accel_redirect(self):
+        """Test handing the transfer over to nginx"""
+        res, _ = self.get(self.name)
+
+        self.assertEqual(res.content, b'')
+        self.assertEqual(
+            res['X-Accel-Redirect'], f'/protected-media/{self.name}'
+        )
+        self.assertEqual(res['Content-Type'], 'image/png')
+
+    @override_settings(MEDIA_SERVING={'BACKEND': 'x-accel-redirect'})
+    def test_accel_redirect_quoted(self):
+        """Test that the path handed over to nginx is URL quoted"""
+        name = 'summer été #1.png'
+
+        with open(default_storage.path(name), 'wb') as file:
+            file.write(b'summer')
+
+        res, _ = self.get(name)
+
+        self.assertEqual(
+            res['X-Accel-Redirect'],
+            '/protected-media/summer%20%C3%A9t%C3%A9%20%231.png'
+        )
+
+    @override_settings(MEDIA_SERVING={'BACKEND': 'x-sendfile'})
+    def test_sendfile(self):
+        """Test handing the transfer over with X-Sendfile"""
+        res, _ = self.get(self.name)
+
+        self.assertEqual(
+            res['X-Sendfile'], default_storage.path(self.name)
+        )
+
+    def test_mutable_file_revalidated(self):
+        """Test that files which may change are revalidated"""
+        with open(default_storage.path('default.png'), 'wb') as file:
+            file.write(b'default')
+
+        res, _ = self.get('default.png')
+
+        self.assertEqual(res['Cache-Control'], 'public, no-cache')
+
+    def test_missing_file(self):
+        """Test that missing files and path traversal return 404"""
+        self.assertEqual(self.get('missing.png')[0].status_code, 404)
+        self.assertEqual(self.get('../secret')[0].status_code, 404)
+
+    def test_incoming_file_not_served(self):
+        """Test that uploads still being stored are not served"""
+        name = 'uploads/blobs/.incoming/tmp1234'
+
+        with open(default_storage.path(name), 'wb') as file:
+            file.write(b'partial')
+
+        self.assertEqual(self.get(name)[0].status_code, 404)
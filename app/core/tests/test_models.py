@@ -3,6 +3,7 @@ import datetime
 from unittest.mock import patch
 
 from django.test import TestCase
+from django.db import IntegrityError
 from django.contrib.auth import get_user_model
 
 from core.models import (
@@ -225,6 +226,13 @@ class ChanModelTests(TestCase):
 
         self.assertEqual(self.thread.downvote_thread.count(), 1)
 
+    def test_duplicate_vote_not_allowed(self):
+        """Test that user can only vote once per thread"""
+        Upvote.objects.create(user=self.user, thread=self.thread)
+
+        with self.assertRaises(IntegrityError):
+            Upvote.objects.create(user=self.user, thread=self.thread)
+
     def test_create_reply(self):
         """Test create a reply in the db"""
         text = 'test reply'
@@ -264,3 +272,63 @@ class ChanModelTests(TestCase):
             text=text
         ).exists()
         self.assertTrue(is_exists)
+
+    def test_reply_bumps_thread(self):
+        """Test that replying to a thread bumps it and
+        increases its reply counter"""
+        reply = Reply.objects.create(
+            user=self.user,
+            text='bump',
+            thread=self.thread
+        )
+        self.thread.refresh_from_db()
+
+        self.assertEqual(self.thread.reply_count, 1)
+        self.assertEqual(self.thread.last_bumped_at, reply.date_created)
+
+    def test_delete_reply_restores_bump_order(self):
+        """Test that deleting the newest reply restores the thread
+        bump order to the previous reply"""
+        first = Reply.objects.create(
+            user=self.user,
+            text='first',
+            thread=self.thread
+        )
+        last = Reply.objects.create(
+            user=self.user,
+            text='last',
+            thread=self.thread
+        )
+
+        last.delete()
+        self.thread.refresh_from_db()
+
+        self.assertEqual(self.thread.reply_count, 1)
+        self.assertEqual(self.thread.last_bumped_at, first.date_created)
+
+        first.delete()
+        self.thread.refresh_from_db()
+
+        self.assertEqual(self.thread.reply_count, 0)
+        self.assertEqual(
+            self.thread.last_bumped_at, self.thread.date_created
+        )
+
+    def test_nested_reply_bumps_thread(self):
+        """Test that replying to a reply bumps the root thread"""
+        reply = Reply.objects.create(
+            user=self.user,
+            text='reply',
+            thread=self.thread
+        )
+        nested = Reply.objects.create(
+            user=self.user,
+            text='nested reply',
+            reply=reply
+        )
+        self.thread.refresh_from_db()
+
+        self.assertEqual(nested.root_thread, self.thread)
+        self.assertEqual(nested.depth, 1)
+        self.assertEqual(self.thread.reply_count, 2)
+        self.assertEqual(self.thread.last_bumped_at, nested.date_created)
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.routers import ReplicaRouter, replica_reads
+from core.models import Board, Thread
+from core.tests.test_models import create_user, create_board
+
+from chan.cache import get_response_cache
+
+
+BOARDS_URL = reverse('6chan:board-list')
+THREAD_URL = reverse('6chan:thread-list')
+REPLICAS = {'DATABASES': ['replica'], 'COOKIE_NAME': 'chan_primary'}
+
+
+@override_settings(CHAN_REPLICAS=REPLICAS)
+class ReplicaRoutingTests(TestCase):
+    """Test read routing against a primary and a replica, two separate
+    SQLite databases, so rows only found on the replica show where a
+    read was served from
+
+    The replica is added once the test case is set up, outside of its
+    transactions, and only holds rows created in ``setUpClass``.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = dict(
+            connections.databases['default'],
+            ENGINE='django.db.backends.sqlite3',
+            NAME=os.path.join(cls.directory, 'replica.sqlite3'),
+            TEST={}
+        )
+        call_command('migrate', database='replica', verbosity=0)
+
+        # The replica lags behind, it only knows an older board
+        replica_user = get_user_model().objects.db_manager(
+            'replica'
+        ).create_user(
+            email='replica@gmail.com', username='replica', password='pass'
+        )
+        Board.objects.using('replica').create(
+            user=replica_user, name='Replica board', code='rb'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        shutil.rmtree(cls.directory, True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.board = create_board(user=self.user)
+
+    def board_names(self):
+        res = self.client.get(BOARDS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [board['name'] for board in res.data['results']]
+
+    def test_router(self):
+        """Test that only reads inside replica_reads() use a replica"""
+        router = ReplicaRouter()
+
+        self.assertEqual(router.db_for_read(Board), 'default')
+
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Board), 'replica')
+            self.assertEqual(router.db_for_write(Board), 'default')
+
+    def test_safe_requests_read_replica(self):
+        """Test that listings are served from the replica"""
+        self.assertEqual(self.board_names(), ['Replica board'])
+
+    def test_writes_stay_on_primary_and_stick(self):
+        """Test that writes go to the primary and that the writer
+        reads from the primary for a while afterwards"""
+        self.client.force_authenticate(user=self.user)
+
+        res = self.client.post(THREAD_URL, {
+            'title': 'New thread', 'content': 'content',
+            'board': self.board.id,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Thread.objects.using('default').exists())
+        self.assertFalse(Thread.objects.using('replica').exists())
+        self.assertIn('chan_primary', res.cookies)
+        self.assertEqual(self.board_names(), [self.board.name])
+
+        self.client.cookies.pop('chan_primary')
+
+        self.assertEqual(self.board_names(), ['Replica board'])
+
+    def test_response_cache_filled_from_primary(self):
+        """Test that a cache miss is not served from a lagging replica,
+        so the cached payload is current for sticky clients too"""
+        get_response_cache().backend.clear()
+        thread = Thread.objects.create(
+            user=self.user, board=self.board,
+            title='New thread', content='content'
+        )
+        url = reverse('6chan:thread-detail', args=[thread.id])
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], thread.title)
+
+        self.client.cookies['chan_primary'] = '1'
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], thread.title)
@@ -0,0 +1,124 @@
+import io
+import os
+import shutil
+import tempfile
+
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Thread, MediaBlob
+from core.storage import ContentAddressedStorage
+from core.tests.test_models import create_user, create_board
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test deduplicated and reference counted media storage"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+
+        self.user = create_user()
+        self.board = create_board(user=self.user)
+
+    def create_thread(self, content=b'same image'):
+        thread = Thread(
+            user=self.user, board=self.board,
+            title='image thread', content='image content'
+        )
+        thread.image.save('upload.JPG', ContentFile(content), save=False)
+        thread.save()
+
+        return thread
+
+    def test_identical_uploads_stored_once(self):
+        """Test that identical content is stored under one name"""
+        storage = ContentAddressedStorage(location=self.media_root)
+
+        first = storage.save('uploads/thread/a.jpg', ContentFile(b'data'))
+        second = storage.save('uploads/reply/b.jpg', ContentFile(b'data'))
+        other = storage.save('uploads/reply/c.jpg', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(first.startswith('uploads/blobs/'))
+        self.assertTrue(first.endswith('.jpg'))
+        self.assertEqual(
+            os.listdir(storage.path('uploads/blobs/.incoming')), []
+        )
+
+    def test_references_counted(self):
+        """Test that rows referencing a file are counted"""
+        first = self.create_thread()
+        second = self.create_thread()
+
+        self.assertEqual(first.image.name, second.image.name)
+        blob = MediaBlob.objects.get(name=first.image.name)
+        self.assertEqual(blob.ref_count, 2)
+
+        first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+        second.image = None
+        second.save()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+
+    def test_default_avatar_not_counted(self):
+        """Test that the shared default avatar is not counted"""
+        self.assertFalse(
+            MediaBlob.objects.filter(name=self.user.avatar.name).exists()
+        )
+
+    def test_collect_unreferenced_media(self):
+        """Test that unreferenced files are deleted"""
+        kept = self.create_thread(b'kept image')
+        removed = self.create_thread(b'removed image')
+        name = removed.image.name
+        removed.delete()
+
+        call_command('collect_media', grace=0, stdout=io.StringIO())
+
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertTrue(default_storage.exists(kept.image.name))
+
+    def test_reuploaded_media_kept(self):
+        """Test that an unreferenced file uploaded again before it is
+        collected is kept for a new grace period"""
+        removed = self.create_thread(b'reused image')
+        name = removed.image.name
+        removed.delete()
+        MediaBlob.objects.filter(name=name).update(
+            date_modified=timezone.now() - timedelta(hours=2)
+        )
+
+        default_storage.save(
+            'uploads/thread/again.jpg', ContentFile(b'reused image')
+        )
+        call_command('collect_media', stdout=io.StringIO())
+
+        self.assertTrue(default_storage.exists(name))
+        self.assertTrue(MediaBlob.objects.filter(name=name).exists())
+
+    def test_recount_references(self):
+        """Test recomputing reference counts from existing rows"""
+        thread = self.create_thread()
+        MediaBlob.objects.all().delete()
+
+        call_command(
+            'collect_media', recount=True, grace=0, stdout=io.StringIO()
+        )
+
+        blob = MediaBlob.objects.get(name=thread.image.name)
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(default_storage.exists(thread.image.name))
@@ -0,0 +1,194 @@
+import hashlib
+import mimetypes
+import os
+import re
+
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+
+DEFAULT_SETTINGS = {
+    'BACKEND': None,
+    'ACCEL_PREFIX': '/protected-media/',
+    'MAX_AGE': 31536000,
+}
+
+# Digest (content addressed) and uuid file names never change content
+IMMUTABLE_NAME = re.compile(
+    r'^([0-9a-f]{64}|[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12})$'
+)
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a requested byte range is outside the file"""
+
+
+class RangeFile:
+    """File wrapper reading at most length bytes from offset"""
+
+    def __init__(self, file, offset, length):
+        self.file = file
+        self.remaining = length
+        file.seek(offset)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+
+        data = self.file.read(size)
+        self.remaining -= len(data)
+
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def get_media_settings():
+    """Return media serving settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'MEDIA_SERVING', {}))
+
+
+def is_immutable(path):
+    """Return whether the content of a media file can never change"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+
+    return bool(IMMUTABLE_NAME.match(stem.lower()))
+
+
+def media_etag(path, stat):
+    """Return a strong ETag for a media file, derived from the name
+    of immutable files and from the name, size and mtime otherwise"""
+    if is_immutable(path):
+        key = path
+    else:
+        key = f'{path}:{stat.st_size}:{stat.st_mtime_ns}'
+
+    return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def parse_range(header, size):
+    """Return the (start, end) byte range requested by a Range header,
+    None when the whole file should be sent"""
+    match = RANGE.match(header.strip())
+
+    # Multiple or malformed ranges are answered with the whole file
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+
+    return start, end
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve an uploaded media file, handing the transfer over to the
+    front web server when MEDIA_SERVING['BACKEND'] is set"""
+    config = get_media_settings()
+
+    # Hidden files, such as uploads still being stored
+    # under ``.incoming``, are never served
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404('Media file not found')
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Media file not found')
+
+    if not os.path.isfile(full_path):
+        raise Http404('Media file not found')
+
+    etag = media_etag(path, stat)
+    content_type = mimetypes.guess_type(full_path)[0] or (
+        'application/octet-stream'
+    )
+    # Weak validators and ``*`` match as they do for Django views
+    response = get_conditional_response(request, etag=etag)
+
+    if response is None:
+        response = transfer_response(
+            request, config, path, full_path, stat.st_size, etag,
+            content_type
+        )
+
+    response['ETag'] = etag
+
+    if is_immutable(path):
+        response['Cache-Control'] = (
+            'public, max-age=%d, immutable' % config['MAX_AGE']
+        )
+    else:
+        response['Cache-Control'] = 'public, no-cache'
+
+    return response
+
+
+def transfer_response(request, config, path, full_path, size, etag,
+                      content_type):
+    """Return the response sending a media file, or the headers handing
+    it over to the front web server"""
+    if config['BACKEND'] == 'x-accel-redirect':
+        # nginx serves the file, byte ranges included
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = config['ACCEL_PREFIX'] + quote(path)
+    elif config['BACKEND'] == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = quote(os.path.abspath(full_path))
+    else:
+        response = file_response(
+            request, full_path, size, etag, content_type
+        )
+
+    return response
+
+
+def file_response(request, full_path, size, etag, content_type):
+    """Stream a media file, or the requested byte range of it"""
+    response_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            response_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = open(full_path, 'rb')
+
+    if response_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = response_range
+        response = FileResponse(
+            RangeFile(file, start, end - start + 1),
+            content_type=content_type, status=206
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+
+    return response
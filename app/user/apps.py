@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class UserConfig(AppConfig):
     name = 'user'
+
+    def ready(self):
+        """Register token cache signal handlers"""
+        import user.signals  # noqa: F401
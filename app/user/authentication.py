@@ -0,0 +1,138 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+DEFAULT_SETTINGS = {
+    'CACHE': 'default',
+    'TIMEOUT': 300,
+}
+
+# User columns kept in the cache, the others are loaded on access
+USER_FIELDS = ['id', 'is_active', 'is_staff', 'is_superuser']
+
+
+def get_token_cache_settings():
+    """Return token cache settings merged with defaults"""
+    return dict(DEFAULT_SETTINGS, **getattr(settings, 'TOKEN_AUTH_CACHE', {}))
+
+
+class TokenCache:
+    """Cache of authenticated token keys in one of the configured CACHES
+
+    Entries hold the user id and permission flags along with the
+    version of the user they were read at. Deleting a token removes its
+    entry and saving a user bumps its version, so the change applies in
+    every process sharing the cache.
+    """
+
+    def __init__(self, alias='default', timeout=300):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, key):
+        """Return the cache key of a token key, not the token itself"""
+        return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def _version_key(self, user_id):
+        """Return the cache key of a user version counter"""
+        return f'auth:user:{user_id}:version'
+
+    def version(self, user_id):
+        """Return the current version of a user, a missing counter
+        starts from the clock so it never reuses an older version"""
+        key = self._version_key(user_id)
+        version = self.cache.get(key)
+
+        if version is None:
+            self.cache.add(key, time.time_ns(), None)
+            version = self.cache.get(key)
+
+        return version
+
+    def get(self, key):
+        """Return the cached user fields of a token key, None on a miss
+        or when the user changed since"""
+        entry = self.cache.get(self._key(key))
+
+        if entry is None or entry['version'] != self.version(entry['id']):
+            return None
+
+        return entry
+
+    def set(self, key, user, version):
+        """Cache the user fields of a token key read at version"""
+        entry = {name: getattr(user, name) for name in USER_FIELDS}
+        entry['version'] = version
+        self.cache.set(self._key(key), entry, self.timeout)
+
+    def invalidate(self, key):
+        """Remove a token key from the cache, again once the current
+        transaction is committed"""
+        cache_key = self._key(key)
+        self.cache.delete(cache_key)
+        transaction.on_commit(lambda: self.cache.delete(cache_key))
+
+    def invalidate_user(self, user_id):
+        """Bump the version of a user, again once the current
+        transaction is committed, so no entry read before is used"""
+        def bump():
+            try:
+                self.cache.incr(self._version_key(user_id))
+            except ValueError:
+                self.cache.add(
+                    self._version_key(user_id), time.time_ns(), None
+                )
+
+        bump()
+        transaction.on_commit(bump)
+
+
+def _create_token_cache():
+    """Create the token cache from settings"""
+    config = get_token_cache_settings()
+
+    return TokenCache(alias=config['CACHE'], timeout=config['TIMEOUT'])
+
+
+token_cache = _create_token_cache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication keeping authenticated tokens in the shared
+    cache so most requests skip the authtoken/user query
+
+    A cached token authenticates a user built from the cached id and
+    flags, its other fields are loaded when they are accessed.
+    """
+
+    def authenticate_credentials(self, key):
+        """Return the user of the token, from the cache on a hit"""
+        entry = token_cache.get(key)
+
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token_cache.version(user.pk))
+
+            return user, token
+
+        model = get_user_model()
+        names = [
+            field.attname for field in model._meta.concrete_fields
+            if field.attname in USER_FIELDS
+        ]
+        user = model.from_db(None, names, [entry[name] for name in names])
+        token = Token.from_db(None, ['key', 'user_id'], [key, user.pk])
+
+        return user, token
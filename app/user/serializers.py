@@ -4,13 +4,19 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate
 from django.utils.translation import ugettext_lazy as _
 
+from chan.serializers import ImageUploadMixin, ThumbnailsField
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(ImageUploadMixin, serializers.ModelSerializer):
     """Serializer for Custom user model"""
+    avatar_thumbnails = ThumbnailsField()
 
     class Meta:
         model = get_user_model()
-        fields = ['email', 'username', 'date_of_birth', 'password', 'avatar']
+        fields = [
+            'email', 'username', 'date_of_birth', 'password',
+            'avatar', 'avatar_status', 'avatar_thumbnails'
+        ]
         extra_kwargs = {
             'password': {
                 'write_only': True,
@@ -23,14 +29,18 @@ class UserSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)
 
 
-class ManageUserSerializer(serializers.ModelSerializer):
+class ManageUserSerializer(ImageUploadMixin, serializers.ModelSerializer):
     """Serializer for custom user model
     (without password field)
     """
+    avatar_thumbnails = ThumbnailsField()
 
     class Meta:
         model = get_user_model()
-        fields = ['email', 'username', 'date_of_birth', 'avatar']
+        fields = [
+            'email', 'username', 'date_of_birth',
+            'avatar', 'avatar_status', 'avatar_thumbnails'
+        ]
 
 
 class ChangePasswordSerializer(serializers.ModelSerializer):
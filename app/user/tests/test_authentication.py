@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import CachedTokenAuthentication, token_cache
+
+
+PROFILE_URL = reverse('user:profile')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test shared caching of authenticated tokens"""
+
+    def setUp(self):
+        caches[token_cache.alias].clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            username='testuser',
+            password='testpass'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_token_skips_query(self):
+        """Test that a cached token is authenticated without queries"""
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = authentication.authenticate_credentials(
+                self.token.key
+            )
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertTrue(user.is_active)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_deleted_token_rejected(self):
+        """Test that a deleted token stops authenticating"""
+        self.client.get(PROFILE_URL)
+
+        self.token.delete()
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_rejected(self):
+        """Test that deactivating a user applies immediately"""
+        self.client.get(PROFILE_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_holds_no_user_instance(self):
+        """Test that only the user id and flags are cached and each
+        request gets its own user instance"""
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+
+        first, _ = authentication.authenticate_credentials(self.token.key)
+        second, _ = authentication.authenticate_credentials(self.token.key)
+        entry = token_cache.get(self.token.key)
+
+        self.assertIsNot(first._state, second._state)
+        self.assertEqual(set(entry), {
+            'id', 'is_active', 'is_staff', 'is_superuser', 'version'
+        })
+
+    def test_profile_update_reads_current_user(self):
+        """Test that writing the profile does not save the cached user
+        over changes made meanwhile"""
+        self.client.get(PROFILE_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            email='changed@gmail.com'
+        )
+
+        res = self.client.patch(PROFILE_URL, {'username': 'renamed'})
+        self.user.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user.username, 'renamed')
+        self.assertEqual(self.user.email, 'changed@gmail.com')
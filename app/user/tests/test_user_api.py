@@ -1,9 +1,9 @@
 import datetime
+import hashlib
 import tempfile
 import os
 import shutil
 
-from unittest.mock import patch
 from PIL import Image
 
 from django.test import TestCase
@@ -36,6 +36,15 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
+def blob_name(file):
+    """Return the content addressed name of an uploaded jpeg file"""
+    file.seek(0)
+    digest = hashlib.sha256(file.read()).hexdigest()
+    file.seek(0)
+
+    return f'uploads/blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+
+
 class PublicUserApiTests(TestCase):
     """Test publicly user API"""
 
@@ -43,7 +52,7 @@ class PublicUserApiTests(TestCase):
         self.client = APIClient()
 
     def tearDown(self):
-        directory = 'uploads/avatar'
+        directory = 'uploads/blobs'
         path = os.path.join(settings.MEDIA_ROOT, directory)
 
         shutil.rmtree(path, ignore_errors=True)
@@ -81,16 +90,12 @@ class PublicUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertEqual(user.date_of_birth, payload['date_of_birth'])
 
-    @patch('uuid.uuid4')
-    def test_create_user_with_avatar(self, mock_uuid):
+    def test_create_user_with_avatar(self):
         """Test creating a new user in API with avatar"""
         with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
-            uuid = 'test-uuid'
-            mock_uuid.return_value = uuid
-
             image = Image.new('RGB', (100, 100))
             image.save(ntf, format='JPEG')
-            ntf.seek(0)
+            filename = blob_name(ntf)
 
             payload = create_payload(avatar=ntf)
             res = self.client.post(
@@ -100,14 +105,10 @@ class PublicUserApiTests(TestCase):
                 email=payload['email'],
                 username=payload['username']
             )
-            filepath = os.path.join(
-                '/app/' + settings.MEDIA_ROOT,
-                f'uploads/avatar/{uuid}.jpg'
-            )
 
             self.assertEqual(res.status_code, status.HTTP_201_CREATED)
             self.assertIn('avatar', res.data)
-            self.assertEqual(user.avatar.path, filepath)
+            self.assertEqual(user.avatar.name, filename)
 
     def test_create_user_invalid_email(self):
         """Test creating a new user with invalid payload
@@ -224,7 +225,7 @@ class PrivateUserApiTests(TestCase):
         self.client.force_authenticate(user=self.user)
 
     def tearDown(self):
-        directory = 'uploads/avatar'
+        directory = 'uploads/blobs'
         path = os.path.join(settings.MEDIA_ROOT, directory)
 
         shutil.rmtree(path, ignore_errors=True)
@@ -257,21 +258,16 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.username, payload['username'])
         self.assertEqual(self.user.email, payload['email'])
 
-    @patch('uuid.uuid4')
-    def test_update_avatar_user(self, mock_uuid):
+    def test_update_avatar_user(self):
         """Test updating avatar profile user is successful"""
         with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
-            uuid = 'test-uuid'
-            mock_uuid.return_value = uuid
-
             image = Image.new('RGB', (100, 100))
             image.save(ntf, format='JPEG')
-            ntf.seek(0)
+            filename = blob_name(ntf)
 
             res = self.client.patch(
                 PROFILE_URL, {'avatar': ntf}, format='multipart'
             )
-            filename = f'uploads/avatar/{uuid}.jpg'
             self.user.refresh_from_db()
 
             self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -1,6 +1,5 @@
 from rest_framework import (
     generics,
-    authentication,
     permissions
 )
 from rest_framework.authtoken.views import ObtainAuthToken
@@ -8,12 +7,16 @@ from rest_framework.settings import api_settings
 
 from django.contrib.auth import get_user_model
 
+from chan.throttling import ThrottledMixin
+
 from user import serializers
+from user.authentication import CachedTokenAuthentication
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(ThrottledMixin, generics.CreateAPIView):
     """Create a new user in the system"""
     serializer_class = serializers.UserSerializer
+    throttle_actions = {'post': 'signup'}
 
 
 class CreateTokenView(ObtainAuthToken):
@@ -25,21 +28,23 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage updating profile user in the system"""
     serializer_class = serializers.ManageUserSerializer
-    authentication_classes = [authentication.TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
     permission_classes = [permissions.IsAuthenticated, ]
 
     def get_object(self):
-        """Retrieve and return authentication user"""
-        return self.request.user
+        """Retrieve and return authentication user, read again as the
+        authenticated one may come from the token cache"""
+        return get_user_model().objects.get(pk=self.request.user.pk)
 
 
 class ChangePasswordView(generics.UpdateAPIView):
     """Manage change password profile user in the system"""
     serializer_class = serializers.ChangePasswordSerializer
-    authentication_classes = [authentication.TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
     permission_classes = [permissions.IsAuthenticated, ]
     queryset = get_user_model().objects.all()
 
     def get_object(self):
-        """Retrieve and return authentication user"""
-        return self.request.user
+        """Retrieve and return authentication user, read again as the
+        authenticated one may come from the token cache"""
+        return get_user_model().objects.get(pk=self.request.user.pk)